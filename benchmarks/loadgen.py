@@ -0,0 +1,223 @@
+"""
+loadgen.py
+
+Load generator: N simulated Clubhouse sessions against a local stand-in server.
+
+Every session joins a room and then behaves like cli.py does while sitting in it:
+ping every 30 s, refresh the roster, raise a hand once in a while, update the bio.
+Intervals can be sped up with --speed. For each concurrency level it reports
+throughput, latency percentiles, errors, CPU, memory and thread count.
+With --rtc every session also joins the voice channel with the headless fake engine.
+
+    python -m benchmarks.loadgen --sessions 1,16,64,256 --duration 30 --speed 10
+    python -m benchmarks.loadgen --url http://127.0.0.1:8080/api --sessions 100
+    python -m benchmarks.loadgen --sessions 256 --rtc
+"""
+
+import os
+import sys
+import json
+import math
+import time
+import random
+import argparse
+import threading
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from clubhouse.clubhouse import Clubhouse
+from clubhouse.rtc import FakeEngine
+
+# (action, interval in seconds before --speed, jitter)
+ACTIONS = (
+    ("ping", 30, 0.1),
+    ("refresh", 10, 0.5),
+    ("hand_raise", 120, 0.5),
+    ("bio", 60, 0.5),
+)
+
+def percentile(values, pct):
+    """ (list of float, float) -> float
+
+    Nearest-rank percentile of sorted values.
+    """
+    if not values:
+        return 0.0
+    index = max(0, min(len(values) - 1, math.ceil(pct / 100 * len(values)) - 1))
+    return values[index]
+
+def rss_bytes():
+    """ () -> int
+
+    Current resident memory of this process (Linux), or the peak elsewhere.
+    """
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+class Session:
+    """ One simulated user sitting in a room. """
+
+    def __init__(self, index, api_url, rooms, speed, stop, seed, rtc=False):
+        self.user_id = 100000 + index
+        self.client = Clubhouse(
+            user_id=str(self.user_id),
+            user_token=f"load-{index}",
+            user_device=f"load-{index}",
+            api_url=api_url
+        )
+        self.rng = random.Random(seed * 7919 + index)
+        self.channel = rooms[index % len(rooms)]
+        self.speed = speed
+        self.stop = stop
+        self.latencies = []
+        self.errors = 0
+        self.rtc = None
+        self.rtc_join = None
+        if rtc:
+            self.rtc = FakeEngine(volume_interval=0.5 / speed, seed=seed * 7919 + index)
+            self.rtc.on_join(lambda channel, user_id, elapsed: setattr(self, "rtc_join", elapsed))
+
+    def _call(self, method, *args):
+        start = time.perf_counter()
+        result = None
+        try:
+            result = getattr(self.client, method)(*args)
+            if not result.get("success"):
+                self.errors += 1
+        except Exception:
+            self.errors += 1
+        self.latencies.append(time.perf_counter() - start)
+        return result
+
+    def run(self):
+        channel_info = self._call("join_channel", self.channel)
+        if self.rtc and channel_info and channel_info.get("success"):
+            self.rtc.join(channel_info.get("token", ""), self.channel, self.user_id, speakers=[
+                user["user_id"] for user in channel_info.get("users", []) if user.get("is_speaker")
+            ])
+        self._call("active_ping", self.channel)
+        now = time.monotonic()
+        due = {
+            name: now + self.rng.uniform(0, interval / self.speed)
+            for name, interval, _ in ACTIONS
+        }
+        while not self.stop.is_set():
+            name = min(due, key=due.get)
+            if self.stop.wait(max(0.0, due[name] - time.monotonic())):
+                break
+            if name == "ping":
+                self._call("active_ping", self.channel)
+            elif name == "refresh":
+                self._call("get_channel", self.channel)
+            elif name == "hand_raise":
+                self._call("audience_reply", self.channel, True, False)
+            elif name == "bio":
+                self._call("update_bio", f"load test {self.rng.random()}")
+            interval, jitter = next((i, j) for n, i, j in ACTIONS if n == name)
+            due[name] += interval / self.speed * (1 + self.rng.uniform(-jitter, jitter))
+        if self.rtc:
+            self.rtc.leave()
+        self._call("leave_channel", self.channel)
+
+def run_level(sessions, api_url, rooms, duration, speed, seed=1, rtc=False):
+    """ (int, str, list of str, float, float, int, bool) -> dict
+
+    Run one concurrency level. return the measured figures
+    """
+    stop = threading.Event()
+    workers = [Session(i, api_url, rooms, speed, stop, seed, rtc) for i in range(sessions)]
+    threads = [threading.Thread(target=w.run, daemon=True) for w in workers]
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+    peak_threads = peak_rss = 0
+    for thread in threads:
+        thread.start()
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        peak_threads = max(peak_threads, threading.active_count())
+        peak_rss = max(peak_rss, rss_bytes())
+        time.sleep(min(0.5, max(0.0, deadline - time.monotonic())))
+    stop.set()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - wall_start
+    cpu = time.process_time() - cpu_start
+
+    latencies = sorted(l for w in workers for l in w.latencies)
+    rtc_joins = sorted(w.rtc_join for w in workers if w.rtc_join is not None)
+    return {
+        "sessions": sessions,
+        "requests": len(latencies),
+        "errors": sum(w.errors for w in workers),
+        "throughput": len(latencies) / wall,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "max_ms": (latencies[-1] if latencies else 0) * 1000,
+        "cpu_pct": cpu / wall * 100,
+        "rss_mb": peak_rss / 2 ** 20,
+        "threads": peak_threads,
+        "rtc_joined": len(rtc_joins),
+        "rtc_join_p50_ms": percentile(rtc_joins, 50) * 1000,
+        "rtc_volume_events": sum(w.rtc.stats["volume_events"] for w in workers if w.rtc),
+    }
+
+def main():
+    """
+    Parse arguments and run every concurrency level
+    """
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", default="1,16,64", help="comma separated concurrency levels")
+    parser.add_argument("--duration", type=float, default=20, help="seconds per level")
+    parser.add_argument("--speed", type=float, default=10, help="divide the real intervals by this")
+    parser.add_argument("--url", help="use an already running stand-in server")
+    parser.add_argument("--latency", type=float, default=0.02, help="stand-in latency (in-process server only)")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rooms", type=int, default=20)
+    parser.add_argument("--room-size", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--rtc", action="store_true", help="also join the voice channel (fake engine)")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    server = None
+    api_url = args.url
+    rooms = [f"room{i:05d}" for i in range(args.rooms)]
+    if not api_url:
+        from benchmarks.standin import StandinServer
+        server = StandinServer(
+            latency=args.latency, error_rate=args.error_rate,
+            rooms=args.rooms, room_size=args.room_size, seed=args.seed
+        )
+        api_url = server.start()
+        print("[!] The stand-in server runs in this process; CPU and memory include it.")
+
+    header = f"{'sessions':>8} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8} {'errors':>7} {'cpu %':>6} {'rss MB':>7} {'threads':>7}"
+    print(header)
+    results = []
+    try:
+        for level in (int(n) for n in args.sessions.split(",") if n.strip()):
+            r = run_level(level, api_url, rooms, args.duration, args.speed, args.seed, args.rtc)
+            results.append(r)
+            print(f"{r['sessions']:>8} {r['throughput']:>9.1f} {r['p50_ms']:>8.1f} {r['p95_ms']:>8.1f} "
+                  f"{r['p99_ms']:>8.1f} {r['max_ms']:>8.1f} {r['errors']:>7} {r['cpu_pct']:>6.0f} "
+                  f"{r['rss_mb']:>7.1f} {r['threads']:>7}")
+            if args.rtc:
+                print(f"{'':>8} rtc: {r['rtc_joined']} joined (p50 {r['rtc_join_p50_ms']:.0f} ms), "
+                      f"{r['rtc_volume_events']} volume events")
+    finally:
+        if server:
+            server.stop()
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as output:
+            json.dump(results, output, indent=2)
+
+if __name__ == "__main__":
+    main()
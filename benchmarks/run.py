@@ -0,0 +1,285 @@
+"""
+run.py
+
+Benchmark suite for the client hot paths, against synthetic fixtures only.
+
+    python -m benchmarks.run                   # run everything and print the results
+    python -m benchmarks.run --save            # store the results as the new baseline
+    python -m benchmarks.run --check           # fail if a case got slower than the baseline
+    python -m benchmarks.run --only render     # only cases whose name contains "render"
+
+Cases needing a missing dependency (requests, rich) are skipped.
+
+Timings depend on the machine, so no baseline is shipped: run --save once on the
+machine that runs --check (e.g. on the main branch in CI). Without a baseline file,
+--check says so and skips the comparison instead of failing.
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import contextlib
+import statistics
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+CASES = []
+
+def case(name, unit="op"):
+    """ (str, str) -> decorator
+
+    Register a benchmark case. The decorated function gets the shared context and
+    returns (callable, number of units per call); the callable is what gets timed.
+    """
+    def decorator(func):
+        CASES.append((name, unit, func))
+        return func
+    return decorator
+
+class Skip(Exception):
+    """ Raised by a case that cannot run here. """
+
+def measure(func, units=1, min_time=0.5, repeat=5):
+    """ (callable, int, float, int) -> float
+
+    Median seconds per unit over `repeat` rounds of at least min_time / repeat seconds.
+    """
+    func()  # warm up
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            func()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time / repeat:
+            break
+        loops *= 2
+    rounds = [elapsed]
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(loops):
+            func()
+        rounds.append(time.perf_counter() - start)
+    return statistics.median(rounds) / (loops * units)
+
+class Context:
+    """ Fixtures shared by the cases, created on first use. """
+
+    def __init__(self, room_size=5000):
+        self.room_size = room_size
+        self._server = None
+
+    @property
+    def server(self):
+        if self._server is None:
+            from benchmarks.standin import StandinServer
+            self._server = StandinServer(rooms=20, room_size=self.room_size)
+            self._server.start()
+        return self._server
+
+    def client(self):
+        try:
+            from clubhouse.clubhouse import Clubhouse
+            return Clubhouse(user_id="1", user_token="benchmark", user_device="benchmark", api_url=self.server.url)
+        except ImportError as error:
+            raise Skip(error)
+
+    def channel_payload(self):
+        from benchmarks.standin import StandinState
+        state = StandinState(rooms=1, room_size=self.room_size)
+        return state.channel_payload(next(iter(state.rooms.values())), 1)
+
+    def close(self):
+        if self._server is not None:
+            self._server.stop()
+
+def _cli():
+    try:
+        import cli
+    except ImportError as error:
+        raise Skip(error)
+    return cli
+
+def _endpoint_case(method, *args):
+    def setup(ctx):
+        client = ctx.client()
+        return (lambda: getattr(client, method)(*args)), 1
+    return setup
+
+for _method, _args in (
+        ("get_channels", ()),
+        ("get_channel", ("room00000",)),
+        ("active_ping", ("room00000",)),
+        ("update_bio", ("benchmark bio",)),
+        ("me", ()),
+    ):
+    case(f"request.{_method}")(_endpoint_case(_method, *_args))
+
+@case("json.decode_get_channel", unit="payload")
+def _json_decode(ctx):
+    raw = json.dumps(ctx.channel_payload())
+    return (lambda: json.loads(raw)), 1
+
+@case("render.print_channel_list", unit="render")
+def _render_channel_list(ctx):
+    cli = _cli()
+    channels = {"success": True, "channels": [
+        {"channel": f"ch{i:06d}", "topic": f"Topic {i}" * 3, "is_social_mode": i % 3 == 0,
+         "is_private": False, "num_speakers": 5, "num_all": 120}
+        for i in range(200)
+    ]}
+
+    class _Stub:
+        def get_channels(self):
+            return channels
+
+    def run():
+        with contextlib.redirect_stdout(io.StringIO()):
+            cli.print_channel_list(_Stub(), 80)
+    return run, 1
+
+@case("render.print_user_list", unit="render")
+def _render_user_list(ctx):
+    cli = _cli()
+    users = ctx.channel_payload()["users"]
+
+    def run():
+        with contextlib.redirect_stdout(io.StringIO()):
+            cli.print_user_list(users, users[-1]["user_id"], 80)
+    return run, 1
+
+@case("roster.lookup_scan", unit="lookup")
+def _roster_scan(ctx):
+    users = ctx.channel_payload()["users"]
+    targets = [u["user_id"] for u in users[::max(1, len(users) // 100)]]
+
+    def run():
+        for target in targets:
+            for user in users:
+                if user["user_id"] == target:
+                    break
+    return run, len(targets)
+
+@case("roster.lookup_index", unit="lookup")
+def _roster_index(ctx):
+    from clubhouse.roster import roster_of
+    users = ctx.channel_payload()["users"]
+    targets = [u["user_id"] for u in users[::max(1, len(users) // 100)]]
+
+    def run():
+        roster = roster_of(users)
+        for target in targets:
+            roster.get(target)
+    return run, len(targets)
+
+@case("pagination.get_club_members", unit="user")
+def _pagination(ctx):
+    from clubhouse.utils import iter_pages
+    client = ctx.client()
+
+    def run():
+        for _ in iter_pages(client.get_club_members, "users", 1, page_size=50):
+            pass
+    return run, 2000
+
+def load_baseline(filename=BASELINE):
+    """ (str) -> dict """
+    try:
+        with open(filename, encoding="utf-8") as baseline:
+            return json.load(baseline).get("results", {})
+    except (OSError, ValueError):
+        return {}
+
+def save_baseline(results, filename=BASELINE):
+    """ (dict, str) -> NoneType """
+    with open(filename, "w", encoding="utf-8") as baseline:
+        json.dump({
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "saved_at": int(time.time()),
+            "results": results,
+        }, baseline, indent=2, sort_keys=True)
+
+def run(only=None, min_time=0.5, room_size=5000):
+    """ (str, float, int) -> dict
+
+    Run the cases. return {name: seconds per unit}
+    """
+    ctx = Context(room_size)
+    results = {}
+    try:
+        for name, unit, setup in CASES:
+            if only and only not in name:
+                continue
+            try:
+                func, units = setup(ctx)
+                results[name] = measure(func, units, min_time)
+            except Skip as reason:
+                print(f"  {name:<32} skipped ({reason})")
+                continue
+            print(f"  {name:<32} {results[name] * 1e6:12.2f} us/{unit}")
+    finally:
+        ctx.close()
+    return results
+
+def check(results, baseline, threshold):
+    """ (dict, dict, float) -> list of str
+
+    Cases slower than baseline * (1 + threshold).
+    """
+    regressions = []
+    for name, value in sorted(results.items()):
+        before = baseline.get(name)
+        if before and value > before * (1 + threshold):
+            regressions.append(f"{name}: {before * 1e6:.2f} -> {value * 1e6:.2f} us (+{(value / before - 1) * 100:.0f}%)")
+    return regressions
+
+def main():
+    """
+    Parse arguments, run the suite, save or check the baseline
+    """
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--only", help="run cases whose name contains this")
+    parser.add_argument("--min-time", type=float, default=0.5, help="seconds spent per case")
+    parser.add_argument("--room-size", type=int, default=5000)
+    parser.add_argument("--save", action="store_true", help="store results as the baseline")
+    parser.add_argument("--check", action="store_true", help="exit 1 on regressions")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown (0.25 = 25%%)")
+    parser.add_argument("--baseline", default=BASELINE)
+    args = parser.parse_args()
+
+    results = run(args.only, args.min_time, args.room_size)
+    if args.save:
+        merged = dict(load_baseline(args.baseline), **results)
+        save_baseline(merged, args.baseline)
+        print(f"[.] Baseline saved to {args.baseline}")
+    if args.check:
+        if not os.path.exists(args.baseline):
+            print(f"[!] No baseline at {args.baseline}, nothing to check against. "
+                  "Run with --save on this machine to create one.")
+            return
+        baseline = load_baseline(args.baseline)
+        if not baseline:
+            print(f"[-] Cannot read the baseline in {args.baseline}; run with --save to replace it.")
+            sys.exit(1)
+        missing = sorted(name for name in results if name not in baseline)
+        if missing:
+            print(f"[!] Not in the baseline, not checked: {', '.join(missing)}")
+        regressions = check(results, baseline, args.threshold)
+        if regressions:
+            print(f"[-] {len(regressions)} regression(s) over {args.threshold * 100:.0f}%:")
+            for line in regressions:
+                print(f"    {line}")
+            sys.exit(1)
+        print("[.] No regressions.")
+
+if __name__ == "__main__":
+    main()
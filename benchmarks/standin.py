@@ -0,0 +1,441 @@
+"""
+standin.py
+
+Local stand-in for the Clubhouse API, for offline benchmarking and load testing.
+
+It answers the endpoints used by cli.py (lobby, rooms, pings, hand raises, speaker
+invites, moderation, profile updates, follows) from synthetic data, or from recorded
+responses saved as <fixtures>/<endpoint>.json. Latency, error rate and room sizes are
+configurable and the synthetic data is generated from a seed, so runs are repeatable.
+
+    python -m benchmarks.standin --port 8080 --latency 0.05 --error-rate 0.01 --room-size 500
+
+    >>> server = StandinServer(latency=0.02, rooms=20, room_size=300)
+    >>> url = server.start()
+    >>> client = Clubhouse(user_id="1", user_token="x", user_device="x", api_url=url)
+    >>> client.get_channels()
+"""
+
+import os
+import json
+import time
+import random
+import argparse
+import threading
+from collections import Counter
+from urllib.parse import urlparse, parse_qs
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+def save_fixture(directory, endpoint, result):
+    """ (str, str, dict) -> NoneType
+
+    Save a real API response as the recorded answer for an endpoint.
+
+    >>> save_fixture("fixtures", "get_channels", clubhouse.get_channels())
+    """
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, f"{endpoint}.json"), "w", encoding="utf-8") as fixture:
+        json.dump(result, fixture, ensure_ascii=False)
+
+def make_user(user_id, rng, **fields):
+    """ (int, random.Random) -> dict
+
+    Synthetic user as returned in room and list payloads.
+    """
+    user = {
+        "user_id": user_id,
+        "name": f"User {user_id}",
+        "username": f"user{user_id}",
+        "first_name": "User",
+        "photo_url": f"https://example.invalid/{user_id}.jpg",
+        "bio": "x" * rng.randint(0, 120),
+        "is_speaker": False,
+        "is_moderator": False,
+        "is_invited_as_speaker": False,
+        "is_followed_by_speaker": rng.random() < 0.3,
+        "is_new": rng.random() < 0.05,
+        "time_joined_as_speaker": None,
+        "skintone": 1,
+    }
+    user.update(fields)
+    return user
+
+class StandinState:
+    """
+    StandinState Class
+
+    Synthetic rooms, users and profile data shared by every request.
+    """
+
+    def __init__(self, rooms=20, room_size=200, speakers=8, seed=1):
+        """ (StandinState, int, int, int, int) -> NoneType """
+        self.lock = threading.Lock()
+        self.rng = random.Random(seed)
+        self.rooms = {}
+        self.profiles = {}
+        next_user = 1000
+        for index in range(rooms):
+            channel = f"room{index:05d}"
+            users = {}
+            for position in range(room_size):
+                speaker = position < speakers
+                users[next_user] = make_user(
+                    next_user, self.rng,
+                    is_speaker=speaker,
+                    is_moderator=position < 2,
+                    time_joined_as_speaker=1616271523 if speaker else None
+                )
+                next_user += 1
+            self.rooms[channel] = {
+                "channel": channel,
+                "channel_id": index + 1,
+                "topic": f"Synthetic room {index}",
+                "is_private": False,
+                "is_social_mode": False,
+                "users": users,
+            }
+        self.max_user_id = next_user
+
+    def channel_summary(self, room):
+        """ (StandinState, dict) -> dict """
+        users = room["users"].values()
+        return {
+            "channel": room["channel"],
+            "channel_id": room["channel_id"],
+            "topic": room["topic"],
+            "is_private": room["is_private"],
+            "is_social_mode": room["is_social_mode"],
+            "num_speakers": sum(1 for u in users if u["is_speaker"]),
+            "num_all": len(room["users"]),
+            "users": [u for u in users if u["is_speaker"]][:8],
+        }
+
+    def channel_payload(self, room, user_id=None):
+        """ (StandinState, dict, int) -> dict """
+        return dict(
+            self.channel_summary(room),
+            success=True,
+            token=f"agora-token-{room['channel']}-{user_id}",
+            pubnub_token="pubnub-token",
+            pubnub_heartbeat_value=30,
+            pubnub_heartbeat_interval=25,
+            users=list(room["users"].values()),
+        )
+
+    def user_page(self, seed, params, total=500):
+        """ (StandinState, int, dict, int) -> dict
+
+        A page of a synthetic user list (followers, following, club members...).
+        """
+        page_size = int(params.get("page_size", 50))
+        page = int(params.get("page", 1))
+        start = (page - 1) * page_size
+        rng = random.Random(seed * 1000003 + page)
+        users = [
+            make_user(1000 + (seed * 7919 + i) % 100000, rng)
+            for i in range(start, min(start + page_size, total))
+        ]
+        return {
+            "success": True,
+            "users": users,
+            "count": total,
+            "next": page + 1 if start + page_size < total else None,
+            "previous": page - 1 if page > 1 else None,
+        }
+
+class StandinHandler(BaseHTTPRequestHandler):
+    """ Request handler. The server object carries the configuration and the state. """
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        """ Keep the console quiet """
+
+    def _reply(self, status, payload):
+        """ (StandinHandler, int, dict) -> NoneType """
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _handle(self):
+        """ (StandinHandler) -> NoneType """
+        server = self.server
+        url = urlparse(self.path)
+        endpoint = url.path.rstrip("/").rsplit("/", 1)[-1]
+        params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        length = int(self.headers.get("Content-Length") or 0)
+        if length:
+            try:
+                params.update(json.loads(self.rfile.read(length) or b"{}") or {})
+            except ValueError:
+                pass
+        user_id = self.headers.get("CH-UserID")
+        user_id = int(user_id) if user_id and user_id.isdigit() else 0
+
+        with server.state.lock:
+            server.counts[endpoint] += 1
+            delay = server.latency * (1 + server.jitter * (2 * server.rng.random() - 1))
+            fail = server.rng.random() < server.error_rate
+        if delay > 0:
+            time.sleep(delay)
+        if fail:
+            self._reply(500, {"success": False, "error_message": "Injected error"})
+            return
+
+        fixture = server.fixtures.get(endpoint)
+        if fixture is not None:
+            self._reply(200, fixture)
+            return
+        handler = getattr(self, f"api_{endpoint}", None)
+        if handler is None:
+            self._reply(404, {"success": False, "error_message": f"Unknown endpoint {endpoint}"})
+            return
+        try:
+            with server.state.lock:
+                status, payload = handler(server.state, params, user_id)
+        except Exception as error:
+            status, payload = 500, {"success": False, "error_message": repr(error)}
+        self._reply(status, payload)
+
+    do_GET = _handle
+    do_POST = _handle
+
+    # Endpoints. Each returns (status, payload) and runs with the state lock held.
+
+    @staticmethod
+    def _room(state, params):
+        return state.rooms.get(params.get("channel"))
+
+    @staticmethod
+    def _ok(**fields):
+        payload = {"success": True}
+        payload.update(fields)
+        return 200, payload
+
+    @staticmethod
+    def _missing():
+        return 200, {"success": False, "error_message": "That room is no longer available"}
+
+    def api_check_waitlist_status(self, state, params, user_id):
+        return self._ok(is_waitlisted=False, is_onboarding=False)
+
+    def api_me(self, state, params, user_id):
+        profile = state.profiles.setdefault(user_id, make_user(user_id, state.rng))
+        return self._ok(user_profile=profile, num_invites=0, has_unread_notifications=False)
+
+    def api_get_profile(self, state, params, user_id):
+        target = int(params.get("user_id") or 0)
+        profile = state.profiles.get(target) or make_user(target, random.Random(target))
+        return self._ok(user_profile=dict(profile, num_followers=100, num_following=50))
+
+    def api_get_channels(self, state, params, user_id):
+        channels = [state.channel_summary(room) for room in state.rooms.values()]
+        return self._ok(channels=channels, events=[])
+
+    def api_get_channel(self, state, params, user_id):
+        room = self._room(state, params)
+        return self._ok(**self._payload(state, room, user_id)) if room else self._missing()
+
+    @staticmethod
+    def _payload(state, room, user_id):
+        payload = state.channel_payload(room, user_id)
+        payload.pop("success")
+        return payload
+
+    def api_join_channel(self, state, params, user_id):
+        room = self._room(state, params)
+        if not room:
+            return self._missing()
+        if user_id not in room["users"]:
+            room["users"][user_id] = make_user(user_id, state.rng)
+        return self._ok(**self._payload(state, room, user_id))
+
+    def api_leave_channel(self, state, params, user_id):
+        room = self._room(state, params)
+        if room:
+            room["users"].pop(user_id, None)
+        return self._ok()
+
+    def api_create_channel(self, state, params, user_id):
+        channel = f"new{len(state.rooms):05d}"
+        state.rooms[channel] = {
+            "channel": channel,
+            "channel_id": len(state.rooms) + 1,
+            "topic": params.get("topic") or "",
+            "is_private": bool(params.get("is_private")),
+            "is_social_mode": bool(params.get("is_social_mode")),
+            "users": {user_id: make_user(user_id, state.rng, is_speaker=True, is_moderator=True)},
+        }
+        return self._ok(**self._payload(state, state.rooms[channel], user_id))
+
+    def api_active_ping(self, state, params, user_id):
+        return self._ok(should_leave=self._room(state, params) is None)
+
+    def _set_fields(self, state, params, target, **fields):
+        room = self._room(state, params)
+        if not room:
+            return self._missing()
+        user = room["users"].get(int(target or 0))
+        if not user:
+            return 200, {"success": False, "error_message": "User is not in the room"}
+        user.update(fields)
+        return self._ok()
+
+    def api_audience_reply(self, state, params, user_id):
+        return self._set_fields(state, params, user_id, raise_hands=bool(params.get("raise_hands")))
+
+    def api_accept_speaker_invite(self, state, params, user_id):
+        room = self._room(state, params)
+        if not room or not room["users"].get(user_id, {}).get("is_invited_as_speaker"):
+            return 200, {"success": False, "error_message": "You have not been invited to speak"}
+        return self._set_fields(state, params, user_id, is_speaker=True, is_invited_as_speaker=False)
+
+    def api_invite_speaker(self, state, params, user_id):
+        return self._set_fields(state, params, params.get("user_id"), is_invited_as_speaker=True, raise_hands=False)
+
+    def api_uninvite_speaker(self, state, params, user_id):
+        return self._set_fields(state, params, params.get("user_id"), is_speaker=False, is_moderator=False)
+
+    def api_make_moderator(self, state, params, user_id):
+        return self._set_fields(state, params, params.get("user_id"), is_moderator=True)
+
+    def api_mute_speaker(self, state, params, user_id):
+        return self._set_fields(state, params, params.get("user_id"), is_muted=True)
+
+    def api_block_from_channel(self, state, params, user_id):
+        room = self._room(state, params)
+        if room:
+            room["users"].pop(int(params.get("user_id") or 0), None)
+        return self._ok() if room else self._missing()
+
+    def _update_profile(self, state, user_id, **fields):
+        state.profiles.setdefault(user_id, make_user(user_id, state.rng)).update(fields)
+        return self._ok()
+
+    def api_update_bio(self, state, params, user_id):
+        return self._update_profile(state, user_id, bio=params.get("bio"))
+
+    def api_update_name(self, state, params, user_id):
+        return self._update_profile(state, user_id, name=params.get("name"))
+
+    def api_update_displayname(self, state, params, user_id):
+        return self._update_profile(state, user_id, displayname=params.get("name"))
+
+    def api_update_username(self, state, params, user_id):
+        return self._update_profile(state, user_id, username=params.get("username"))
+
+    def api_update_skintone(self, state, params, user_id):
+        return self._update_profile(state, user_id, skintone=params.get("skintone"))
+
+    def api_follow(self, state, params, user_id):
+        return self._ok()
+
+    def api_unfollow(self, state, params, user_id):
+        return self._ok()
+
+    def api_follow_multiple(self, state, params, user_id):
+        return self._ok()
+
+    def api_get_following(self, state, params, user_id):
+        return self._ok(**state.user_page(int(params.get("user_id") or 1), params))
+
+    def api_get_followers(self, state, params, user_id):
+        return self._ok(**state.user_page(int(params.get("user_id") or 1) + 1, params))
+
+    def api_get_club_members(self, state, params, user_id):
+        return self._ok(**state.user_page(int(params.get("club_id") or 1) + 2, params, total=2000))
+
+    def api_refresh_token(self, state, params, user_id):
+        stamp = int(time.time())
+        return self._ok(access=f"access-{stamp}", refresh=f"refresh-{stamp}")
+
+class StandinServer(ThreadingHTTPServer):
+    """
+    StandinServer Class
+
+    latency: mean seconds added to every request
+    jitter: latency varies by +/- this fraction
+    error_rate: share of requests answered with HTTP 500
+    """
+
+    daemon_threads = True
+    request_queue_size = 1024
+
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0, jitter=0.2, error_rate=0.0,
+                 rooms=20, room_size=200, speakers=8, fixtures=None, seed=1):
+        """ (StandinServer, str, int, float, float, float, int, int, int, str, int) -> NoneType """
+        super().__init__((host, port), StandinHandler)
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rng = random.Random(seed)
+        self.state = StandinState(rooms, room_size, speakers, seed)
+        self.counts = Counter()
+        self.fixtures = {}
+        if fixtures:
+            for name in os.listdir(fixtures):
+                if name.endswith(".json"):
+                    with open(os.path.join(fixtures, name), encoding="utf-8") as fixture:
+                        self.fixtures[name[:-len(".json")]] = json.load(fixture)
+        self._thread = None
+
+    @property
+    def url(self):
+        """ (StandinServer) -> str
+
+        Value to pass as Clubhouse(api_url=...)
+        """
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/api"
+
+    def start(self):
+        """ (StandinServer) -> str
+
+        Serve in a background thread. return the API url
+        """
+        self._thread = threading.Thread(target=self.serve_forever)
+        self._thread.daemon = True
+        self._thread.start()
+        return self.url
+
+    def stop(self):
+        """ (StandinServer) -> NoneType """
+        self.shutdown()
+        self.server_close()
+
+def main():
+    """
+    Run the stand-in server in the foreground
+    """
+    parser = argparse.ArgumentParser(description="Local stand-in for the Clubhouse API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--latency", type=float, default=0.0, help="mean added latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.2)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rooms", type=int, default=20)
+    parser.add_argument("--room-size", type=int, default=200)
+    parser.add_argument("--speakers", type=int, default=8)
+    parser.add_argument("--fixtures", help="directory of recorded <endpoint>.json responses")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    server = StandinServer(
+        args.host, args.port, args.latency, args.jitter, args.error_rate,
+        args.rooms, args.room_size, args.speakers, args.fixtures, args.seed
+    )
+    print(f"[.] Stand-in API listening on {server.url}")
+    print(f"    CLUBHOUSE_API_URL={server.url} python cli.py")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(f"[.] Requests served: {dict(server.counts)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""
+startup.py
+
+Benchmark: time from launching `python cli.py` to the first lobby render.
+
+Every run starts a fresh interpreter in a scratch directory holding a stub
+setting.ini (and, unless --cold, a lobby.json snapshot), and runs cli.main() with a
+FakeTransport answering the startup calls (no network). That covers the cli import,
+the config read, the Warmer, the waitlist and `me` checks and the Lobby snapshot
+up to the first table drawn. The wall time is measured by the parent process.
+
+    python -m benchmarks.startup --runs 10
+    python -m benchmarks.startup --cold
+    python -m benchmarks.startup --importtime
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import statistics
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CONFIG = """[Account]
+user_device = bench-device
+user_id = 1
+user_token = bench-token
+"""
+
+SNIPPET = """
+import os, sys, io, contextlib
+sys.path.insert(0, %(root)r)
+from clubhouse import transport
+
+channels = %(channels)r
+fake = transport.FakeTransport({
+    "get_channels": channels,
+    "check_waitlist_status": {"success": True, "is_waitlisted": False},
+    "me": {"success": True, "user_profile": {"user_id": 1, "username": "bench"}},
+})
+transport.TRANSPORTS["fake"] = lambda: fake
+os.environ["CLUBHOUSE_TRANSPORT"] = "fake"
+
+import cli
+
+class Rendered(Exception):
+    pass
+
+_print_channel_list = cli.print_channel_list
+
+def print_channel_list(*args, **kwargs):
+    _print_channel_list(*args, **kwargs)
+    raise Rendered
+
+cli.print_channel_list = print_channel_list
+try:
+    with contextlib.redirect_stdout(io.StringIO()):
+        cli.main()
+except Rendered:
+    print("LOBBY_RENDERED", flush=True)
+sys.stdout.flush()
+# Skip waiting for the background threads (warmer, lobby refresh, topics)
+os._exit(0)
+"""
+
+def make_channels(count):
+    """ (int) -> dict
+
+    A get_channels answer with count synthetic channels.
+    """
+    return {"success": True, "channels": [
+        {"channel": f"ch{i:06d}", "topic": f"Topic {i}", "is_social_mode": False,
+         "is_private": False, "num_speakers": 5, "num_all": 120}
+        for i in range(count)
+    ]}
+
+def run_once(channels=50, extra_args=(), cold=False):
+    """ (int, tuple, bool) -> (float, str)
+
+    Run one fresh interpreter. return (seconds to first lobby render, stderr)
+    cold: start without a lobby.json snapshot
+    """
+    with tempfile.TemporaryDirectory() as workdir:
+        with open(os.path.join(workdir, "setting.ini"), "w") as config:
+            config.write(CONFIG)
+        if not cold:
+            with open(os.path.join(workdir, "lobby.json"), "w", encoding="utf-8") as snapshot:
+                json.dump({"updated_at": time.time(), "channels": make_channels(channels)}, snapshot)
+        start = time.perf_counter()
+        proc = subprocess.Popen(
+            [sys.executable, *extra_args, "-c", SNIPPET % {"root": ROOT, "channels": make_channels(channels)}],
+            cwd=workdir,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+        )
+        for line in proc.stdout:
+            if line.startswith("LOBBY_RENDERED"):
+                elapsed = time.perf_counter() - start
+                break
+        else:
+            elapsed = None
+        _, stderr = proc.communicate()
+    if elapsed is None:
+        raise Exception(f"cli.py did not render the lobby:\n{stderr}")
+    return elapsed, stderr
+
+def top_imports(stderr, limit=15):
+    """ (str, int) -> list of (int, str)
+
+    Parse `-X importtime` output. return the slowest imports (cumulative microseconds)
+    """
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        rows.append((int(cumulative), name.strip()))
+    return sorted(rows, reverse=True)[:limit]
+
+def main():
+    """
+    Parse arguments and print the benchmark result
+    """
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--channels", type=int, default=50)
+    parser.add_argument("--cold", action="store_true", help="start without a saved lobby snapshot")
+    parser.add_argument("--importtime", action="store_true", help="show the slowest imports")
+    args = parser.parse_args()
+
+    run_once(args.channels, cold=args.cold)  # warm the OS file cache
+    timings = [run_once(args.channels, cold=args.cold)[0] for _ in range(args.runs)]
+    snapshot = "no snapshot" if args.cold else "lobby snapshot on disk"
+    print(f"startup to first lobby render ({snapshot}) over {args.runs} runs:")
+    print(f"  min    {min(timings) * 1000:8.1f} ms")
+    print(f"  median {statistics.median(timings) * 1000:8.1f} ms")
+    print(f"  max    {max(timings) * 1000:8.1f} ms")
+
+    if args.importtime:
+        _, stderr = run_once(args.channels, ("-X", "importtime"), args.cold)
+        print("slowest imports (cumulative):")
+        for cumulative, name in top_imports(stderr):
+            print(f"  {cumulative / 1000:8.1f} ms  {name}")
+
+if __name__ == "__main__":
+    main()
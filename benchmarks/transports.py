@@ -0,0 +1,118 @@
+"""
+transports.py
+
+Benchmark: the HTTP backends of clubhouse/transport.py under concurrency.
+
+One client per backend sends `--calls` active_ping requests to the stand-in server from
+1, 16 and 256 threads at once, and the throughput and latency percentiles are reported.
+Backends whose dependency is missing (httpx for http2) are skipped.
+
+    python -m benchmarks.transports
+    python -m benchmarks.transports --concurrency 1,16,256 --calls 2000 --latency 0.02
+    python -m benchmarks.transports --url https://h2-capable-server/api --transports http2
+
+The stand-in server only speaks HTTP/1.1, so the http2 backend is skipped against it
+(it would only measure httpx's HTTP/1.1 pool); point --url at an HTTP/2 server to
+compare multiplexing with the requests pool.
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from clubhouse.clubhouse import Clubhouse
+from clubhouse.transport import TRANSPORTS
+from benchmarks.loadgen import percentile
+
+def run_backend(name, api_url, concurrency, calls, channel="room00000"):
+    """ (str, str, int, int, str) -> dict
+
+    Send `calls` requests from `concurrency` threads. return the measured figures
+    """
+    transport = TRANSPORTS[name]()
+    client = Clubhouse(user_id="1", user_token="benchmark", user_device="benchmark",
+                       api_url=api_url, transport=transport)
+
+    def one(_):
+        """ return (seconds, True if the call succeeded) """
+        start = time.perf_counter()
+        try:
+            ok = bool(client.active_ping(channel).get("success"))
+        except Exception:
+            ok = False
+        return time.perf_counter() - start, ok
+
+    try:
+        one(None)  # open the connection(s) before timing
+        wall_start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            outcomes = list(executor.map(one, range(calls)))
+        wall = time.perf_counter() - wall_start
+    finally:
+        transport.close()
+    latencies = sorted(latency for latency, _ in outcomes)
+    errors = sum(1 for _, ok in outcomes if not ok)
+    return {
+        "transport": name,
+        "concurrency": concurrency,
+        "calls": calls,
+        "errors": errors,
+        "throughput": calls / wall,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "max_ms": latencies[-1] * 1000,
+    }
+
+def main():
+    """
+    Parse arguments and run every backend at every concurrency level
+    """
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--transports", default="requests,http2", help="comma separated backends")
+    parser.add_argument("--concurrency", default="1,16,256", help="comma separated levels")
+    parser.add_argument("--calls", type=int, default=1000, help="requests per level")
+    parser.add_argument("--url", help="use an already running server")
+    parser.add_argument("--latency", type=float, default=0.01, help="stand-in latency (in-process server only)")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    server = None
+    api_url = args.url
+    if not api_url:
+        from benchmarks.standin import StandinServer
+        server = StandinServer(latency=args.latency, rooms=1, room_size=20)
+        api_url = server.start()
+
+    print(f"{'transport':>10} {'threads':>7} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8} {'errors':>7}")
+    results = []
+    try:
+        for name in (n.strip() for n in args.transports.split(",") if n.strip()):
+            if name == "http2" and server:
+                print(f"{name:>10} skipped (the stand-in only speaks HTTP/1.1, use --url with an HTTP/2 server)")
+                continue
+            for level in (int(n) for n in args.concurrency.split(",") if n.strip()):
+                try:
+                    r = run_backend(name, api_url, level, max(args.calls, level))
+                except ImportError as reason:
+                    print(f"{name:>10} skipped ({reason})")
+                    break
+                results.append(r)
+                print(f"{name:>10} {level:>7} {r['throughput']:>9.1f} {r['p50_ms']:>8.1f} {r['p95_ms']:>8.1f} "
+                      f"{r['p99_ms']:>8.1f} {r['max_ms']:>8.1f} {r['errors']:>7}")
+    finally:
+        if server:
+            server.stop()
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as output:
+            json.dump(results, output, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+warmup.py
+
+Benchmark: first request of a fresh client, cold vs. pre-warmed.
+
+- cold: new client, empty DNS cache, the first get_channels pays DNS + connect (+ TLS)
+- warm: new client warmed with clubhouse.warmup.Warmer first, then get_channels
+
+    python -m benchmarks.warmup --runs 20
+    python -m benchmarks.warmup --url https://www.clubhouseapi.com/api --runs 5
+
+Against the local stand-in (http://localhost) there is no TLS and DNS is the hosts
+file, so the gap is much smaller than against the real API.
+"""
+
+import os
+import sys
+import time
+import argparse
+import statistics
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from clubhouse.clubhouse import Clubhouse
+from clubhouse.warmup import DNSCache, Warmer
+
+def first_request(api_url, transport, warm):
+    """ (str, str, bool) -> (float, dict)
+
+    Seconds taken by the first get_channels of a new client, and the warm-up timings.
+    """
+    dns_cache = DNSCache()
+    dns_cache.install()
+    try:
+        client = Clubhouse(user_id="1", user_token="benchmark", user_device="benchmark",
+                           api_url=api_url, transport=transport)
+        timings = Warmer(client, dns_cache).warm() if warm else {}
+        start = time.perf_counter()
+        client.get_channels()
+        elapsed = time.perf_counter() - start
+        client.transport.close()
+    finally:
+        dns_cache.uninstall()
+    return elapsed, timings
+
+def main():
+    """
+    Parse arguments and compare cold and warm first requests
+    """
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--url", help="use this server instead of the in-process stand-in")
+    parser.add_argument("--transport", default="requests")
+    parser.add_argument("--latency", type=float, default=0.0, help="stand-in latency (in-process server only)")
+    args = parser.parse_args()
+
+    server = None
+    api_url = args.url
+    if not api_url:
+        from benchmarks.standin import StandinServer
+        server = StandinServer(latency=args.latency, rooms=5, room_size=20)
+        # Go through the resolver like a real host name would.
+        api_url = server.start().replace("127.0.0.1", "localhost")
+
+    try:
+        cold, warm, warmups = [], [], []
+        for _ in range(args.runs):
+            cold.append(first_request(api_url, args.transport, False)[0])
+            elapsed, timings = first_request(api_url, args.transport, True)
+            warm.append(elapsed)
+            warmups.append(timings)
+    finally:
+        if server:
+            server.stop()
+
+    print(f"{'':>6} {'median ms':>10} {'min ms':>8} {'max ms':>8}")
+    for name, values in (("cold", cold), ("warm", warm)):
+        print(f"{name:>6} {statistics.median(values) * 1000:>10.2f} {min(values) * 1000:>8.2f} {max(values) * 1000:>8.2f}")
+    dns = [t["dns_ms"] for t in warmups if t.get("dns_ms") is not None]
+    connect = [t["connect_ms"] for t in warmups if t.get("connect_ms") is not None]
+    if dns and connect:
+        print(f"[.] warm-up itself: DNS {statistics.median(dns):.2f} ms, connect {statistics.median(connect):.2f} ms (median)")
+
+if __name__ == "__main__":
+    main()
@@ -8,31 +8,67 @@ RTC: For voice communication
 
 import os
 import sys
+import argparse
 import threading
 import configparser
-import keyboard
-from SwSpotify import spotify,SpotifyNotRunning, SpotifyPaused #For spotify function
+from concurrent.futures import ThreadPoolExecutor
 from time import gmtime, strftime # Timestamp
 from rich.table import Table
 from rich.console import Console
 from clubhouse.clubhouse import Clubhouse
+from clubhouse.export import export_clubs
+from clubhouse.mutations import MutationQueue
+from clubhouse.moderation import bulk_action, select_users, split_outcomes
+from clubhouse.automod import AutoModerator, InviteRaisedHands, MuteIdleSpeakers, PromoteAdmins
+from clubhouse.utils import iter_pages
+from clubhouse.ratelimit import DEFAULT_LIMITER
+from clubhouse.credentials import CredentialManager
+from clubhouse.lobby import Lobby
+from clubhouse.warmup import DNSCache, Warmer
+from clubhouse.nowplaying import NowPlayingWatcher, make_source, song_bio
+from clubhouse.rtc import make_engine
+from clubhouse.recorder import RoomRecorder
+from clubhouse.topics import TopicCatalog
+from clubhouse.search import SearchHelper
+from clubhouse.events import EventStream, RoomEvents, open_sink
+from clubhouse.watcher import RoomWatcher
+from clubhouse.profiling import Profiler
 
 # Set some global variables
-try:
-    import agorartc
-    RTC = agorartc.createRtcEngineBridge()
-    eventHandler = agorartc.RtcEngineEventHandlerBase()
-    RTC.initEventHandler(eventHandler)
-    # 0xFFFFFFFE will exclude Chinese servers from Agora's servers.
-    RTC.initialize(Clubhouse.AGORA_KEY, None, agorartc.AREA_CODE_GLOB & 0xFFFFFFFE)
+# The voice engine, keyboard hooks and Spotify are only loaded when first needed,
+# so browsing the lobby does not pay for them.
+RTC = None
+_RTC_LOADED = False
+# Set by --profile / CLUBHOUSE_PROFILE
+PROFILER = None
+# Keeps the connection to the API warm, started by main()
+WARMER = None
+# Set by --events / CLUBHOUSE_EVENTS
+EVENTS = None
+
+def get_rtc():
+    """ () -> clubhouse.rtc.RtcEngine
+
+    Create and configure the voice engine on first use.
+    CLUBHOUSE_RTC=fake uses the headless engine (no audio, simulated speakers).
+    return None if the SDK is not installed or CLUBHOUSE_RTC is unknown
+    """
+    global RTC, _RTC_LOADED
+    if _RTC_LOADED:
+        return RTC
+    _RTC_LOADED = True
+    try:
+        RTC = make_engine(os.environ.get("CLUBHOUSE_RTC", "agora"))
+    except ImportError:
+        return None
+    except ValueError as error:
+        # Unknown CLUBHOUSE_RTC
+        print(f"[-] {error}")
+        return None
     # Enhance voice quality
-    if RTC.setAudioProfile(
-            agorartc.AUDIO_PROFILE_MUSIC_HIGH_QUALITY_STEREO,
-            agorartc.AUDIO_SCENARIO_GAME_STREAMING
-        ) < 0:
+    if not RTC.set_audio_profile("music_high_quality_stereo", "game_streaming"):
         print("[-] Failed to set the high quality audio profile")
-except ImportError:
-    RTC = None
+    return RTC
 
 def set_interval(interval):
     """ (int) -> decorator
@@ -54,8 +90,8 @@ def set_interval(interval):
         return wrap
     return decorator
 
-def write_config(user_id, user_token, user_device, filename='setting.ini'):
-    """ (str, str, str, str) -> bool
+def write_config(user_id, user_token, user_device, filename='setting.ini', refresh_token=None):
+    """ (str, str, str, str, str) -> bool
 
     Write Config. return True on successful file write
     """
@@ -65,6 +101,8 @@ def write_config(user_id, user_token, user_device, filename='setting.ini'):
         "user_id": user_id,
         "user_token": user_token,
     }
+    if refresh_token:
+        config["Account"]["refresh_token"] = refresh_token
     with open(filename, 'w') as config_file:
         config.write(config_file)
     return True
@@ -132,10 +170,11 @@ def process_onboarding(client):
         print("    Try registering by real device if this process pops again.")
         break
 
-def print_channel_list(client, max_limit=20):
-    """ (Clubhouse) -> NoneType
+def print_channel_list(client, max_limit=20, channels=None):
+    """ (Clubhouse, int, dict) -> NoneType
 
     Print list of channels
+    channels: a get_channels answer to print instead of fetching one
     """
     # Get channels and print out
     console = Console()
@@ -145,7 +184,9 @@ def print_channel_list(client, max_limit=20):
     table.add_column("topic")
     table.add_column("speaker_count")
     table.add_column("total_count")
-    channels = client.get_channels()['channels']
+    if channels is None:
+        channels = client.get_channels()
+    channels = channels['channels']
     i = 0
     for channel in channels:
         i += 1
@@ -162,13 +203,212 @@ def print_channel_list(client, max_limit=20):
         )
     console.print(table)
 
+def print_user_list(users, user_id, max_limit=20):
+    """ (list of dict, str, int) -> bool
+
+    Print users of a channel (TOP max_limit only).
+    return True if user_id is a speaker in the channel
+    """
+    console = Console()
+    table = Table(show_header=True, header_style="bold magenta")
+    table.add_column("user_id", style="cyan", justify="right")
+    table.add_column("username")
+    table.add_column("name")
+    table.add_column("is_speaker")
+    table.add_column("is_moderator")
+    for user in users[:max_limit]:
+        table.add_row(
+            str(user['user_id']),
+            str(user['name']),
+            str(user['username']),
+            str(user['is_speaker']),
+            str(user['is_moderator']),
+        )
+    console.print(table)
+    # Check if the user is the speaker
+    _user_id = int(user_id)
+    for user in users:
+        if user['user_id'] == _user_id:
+            return bool(user['is_speaker'])
+    return False
+
+def process_export(client):
+    """ (Clubhouse) -> NoneType
+
+    Export members (and optionally followers) of one or more clubs.
+    Interrupted exports continue where they stopped when run again.
+    """
+    club_ids = input("[.] Enter club_id(s) to export (comma separated): ")
+    club_ids = [_id.strip() for _id in club_ids.split(",") if _id.strip().isdigit()]
+    if not club_ids:
+        print("[-] No valid club_id given.")
+        return
+    file_format = input("[.] Format? (jsonl/csv): ") or "jsonl"
+    while file_format not in ("jsonl", "csv"):
+        file_format = input("[.] Error! Format? (jsonl/csv): ")
+    followers = input("[.] Include followers?(y/n): ") == 'y'
+    results = export_clubs(client, club_ids, "export", file_format, return_followers=followers)
+    for club_id, result in results.items():
+        if isinstance(result, Exception):
+            print(f"[-] Club {club_id}: export failed, run again to resume. ({result})")
+        else:
+            print(f"[.] Club {club_id}: {result} users exported to export/club_{club_id}.{file_format}")
+
+def process_topics(catalog):
+    """ (TopicCatalog) -> NoneType
+
+    Browse the topic tree and list the clubs of a topic.
+    The tree is loaded once in the background (catalog.start()) and kept in memory;
+    it is only downloaded again once a day.
+    """
+    if not catalog.loaded.wait(10):
+        print("[-] The topics are still loading, try again in a moment")
+        return
+    try:
+        catalog.refresh_if_stale()
+    except Exception as error:
+        if not catalog.by_id:
+            print(f"[-] Cannot load the topics ({error})")
+            return
+        print(f"[-] Cannot refresh the topics, using the saved ones ({error})")
+    topic = input("[.] Enter a topic title or id (empty for the main topics): ").strip()
+    topic_id = None
+    if topic:
+        try:
+            topic_id = catalog.resolve(topic)
+        except Exception as error:
+            print(f"[-] {error}")
+            return
+    for _id, _topic in catalog.by_id.items():
+        if _topic["parent_id"] == topic_id:
+            print(f"  {_id}: {_topic.get('title')}")
+    if topic_id is None:
+        return
+    result = catalog.get_clubs_for_topic(topic_id)
+    for club in result.get("clubs", []):
+        print(f"[club] {club.get('club_id')}: {club.get('name')}")
+
+def process_search(searches):
+    """ (dict of SearchHelper) -> NoneType
+
+    Search users or clubs. Results are cached, and a longer query whose shorter form
+    already returned everything is answered without another request.
+    """
+    kind = "clubs" if input("[.] Search users(u) or clubs(c)? : ").strip() == "c" else "users"
+    search = searches[kind]
+    while True:
+        query = input(f"[.] Search {kind} (empty to stop): ").strip()
+        if not query:
+            return
+        result = search.search(query)
+        if not result.get("success", True):
+            print(f"[-] Search failed ({result.get('error_message')})")
+            continue
+        items = result.get(kind) or []
+        for item in items[:20]:
+            if kind == "users":
+                print(f"[user] {item.get('user_id')}: {item.get('name')} (@{item.get('username')})")
+            else:
+                print(f"[club] {item.get('club_id')}: {item.get('name')}")
+        if not items:
+            print("[-] Nothing found")
+
+def process_moderation(client, channel_name, users, user_id, action, prompt, shortcuts=None):
+    """ (Clubhouse, str, list of dict, int, str, str, dict) -> NoneType
+
+    Ask for user_id(s), or a shortcut from `shortcuts` ({name: roster filter}),
+    and run the moderation action for all of them at once.
+    """
+    answer = input(prompt).strip()
+    if shortcuts and answer in shortcuts:
+        user_ids = select_users(users, exclude=(user_id,), **shortcuts[answer])
+    else:
+        try:
+            wanted = [int(_id) for _id in answer.split(",") if _id.strip()]
+        except ValueError:
+            print("Bad input!")
+            return
+        present = {int(user['user_id']) for user in users}
+        for _id in wanted:
+            if _id not in present:
+                print(f"ID not found: {_id}")
+        user_ids = [_id for _id in wanted if _id in present]
+    if not user_ids:
+        print("Nobody to update.")
+        return
+    succeeded, failed = split_outcomes(bulk_action(client, action, channel_name, user_ids))
+    print(f"[.] {action}: {len(succeeded)}/{len(user_ids)} done.")
+    for _id, error in failed.items():
+        print(f"[-] {_id}: {error}")
+
+def process_automod(client, channel_name, room):
+    """ (Clubhouse, str, RoomWatcher) -> AutoModerator
+
+    Ask which rules to enable and start auto-moderating the room.
+    return None if no rule was chosen
+    """
+    rules = []
+    if input("[.] Invite raised hands from users you follow?(y/n): ") == 'y':
+        following = client.me(return_following_ids=True).get("following_ids") or []
+        rules.append(InviteRaisedHands(following))
+    rtc = get_rtc()
+    if rtc:
+        idle = input("[.] Mute speakers idle for how many minutes? (empty: never): ")
+        if idle.strip().isdigit():
+            rules.append(MuteIdleSpeakers(int(idle) * 60))
+    else:
+        # Without the voice engine nobody would ever look active.
+        print("[-] Muting idle speakers needs the voice engine, which is not available")
+    club_id = input("[.] Make the admins of this club_id moderators (empty: skip): ")
+    if club_id.strip().isdigit():
+        # Only the first pages are read, so a big club does not hold up the prompt.
+        try:
+            admins = [
+                user['user_id'] for user in iter_pages(
+                    client.get_club_members, "users", int(club_id),
+                    max_pages=4, rate_limiter=DEFAULT_LIMITER
+                )
+                if user.get('is_admin')
+            ]
+        except Exception as error:
+            print(f"[-] Cannot read the club members ({error})")
+        else:
+            rules.append(PromoteAdmins(admins))
+    if not rules:
+        return None
+    automod = AutoModerator(client, channel_name, rules)
+    if rtc:
+        # Who talks, for the idle speaker rule
+        automod.listen(rtc)
+    automod.watch(room)
+    print(f"[.] Auto-moderation on: {', '.join(rule.name for rule in rules)}")
+    return automod
+
+def process_profile(command):
+    """ (str) -> NoneType
+
+    "profile" dumps the reports, "profile on" / "profile off" start and stop profiling.
+    """
+    global PROFILER
+    if command == "profile on":
+        if PROFILER is None:
+            PROFILER = Profiler(cpu=True, heap=True)
+        PROFILER.start()
+        print("[.] Profiling on. Type \"profile\" to write a report.")
+    elif command == "profile off":
+        if PROFILER:
+            PROFILER.stop()
+        print("[.] Profiling off. The CPU samples so far are kept for \"profile\".")
+    else:
+        for _file in (PROFILER or Profiler()).dump("profiles"):
+            print(f"[.] Wrote {_file}")
+
 def chat_main(client):
     """ (Clubhouse) -> NoneType
 
     Main function for chat
     """
     max_limit = 80
-    prev_song = None
     channel_speaker_permission = False
     _wait_func = None
     _ping_func = None
@@ -190,10 +430,14 @@ def chat_main(client):
         Continue to ping alive every 30 seconds.
         """
         try:
-            client.active_ping(channel_name)
-        except:
+            result = client.active_ping(channel_name)
+            if EVENTS:
+                EVENTS.emit("ping", channel=channel_name, success=bool(result.get("success")))
+        except Exception as error:
             time = strftime("%Y-%m-%d %H:%M:%S", gmtime())
             print("["+time+"]"+" Error in _ping_keep_alive occur.")
+            if EVENTS:
+                EVENTS.error("active_ping", error)
         return True
 
     @set_interval(10)
@@ -217,34 +461,34 @@ def chat_main(client):
                 return False
         return True
 
-    @set_interval(1)
-    def _update_song_bio(client, m_bio, prev_song):
-        try:
-            song,artist = spotify.current()
-        except:
-            client.update_bio(m_bio)
-        else:
-            if(song != prev_song):
-                m_songname = "♫𝗡𝗼𝘄 𝗣𝗹𝗮𝘆𝗶𝗻𝗴: "+song+"\n♫𝗔𝗿𝘁𝗶𝘀𝘁: "+artist+"\n如果個Now playing無update可以refresh多幾次\n\n"
-                new_bio = m_songname + m_bio
-                try:
-                    client.update_bio(new_bio)
-                    prev_song = song
-                except:
-                    time = strftime("%Y-%m-%d %H:%M:%S", gmtime())
-                    print("["+time+"]"+" Error updating bio.")
-                    print("Song Name: "+song+"\nArtist: "+artist)
-
-        return True
+    # The lobby is drawn from the last saved channel list right away,
+    # and redrawn when the fresh one arrives.
+    lobby = Lobby(client)
+    lobby_prompt = "[.] Create Room(c)/ Join Room(j)/ Export Club(e)/ Topics(t)/ Search(s)/ Quit(quit)? : "
+    # Loaded in the background now, so "t" answers from memory
+    topics = TopicCatalog(client).start()
+    # Kept for the session, so repeated and refined searches are answered from the cache
+    searches = {kind: SearchHelper(client, kind) for kind in ("users", "clubs")}
+    lobby_state = {'waiting': False}
+
+    def _redraw_lobby(channels):
+        if lobby_state['waiting']:
+            print()
+            print_channel_list(client, max_limit, channels)
+            print(lobby_prompt, end="", flush=True)
 
     while True:
         # Choose which channel to enter.
         # Join the talk on success.
         m_bio = ""
-        user_me = client.me()
         user_id = client.HEADERS.get("CH-UserID")
-        print_channel_list(client, max_limit)
-        lobby_command = input("[.] Create Room(c)/ Join Room(j)/ Quit(quit)? : ")
+        print_channel_list(client, max_limit, lobby.channels)
+        if lobby.is_stale:
+            print("[.] Showing the last known rooms, updating...")
+        lobby_state['waiting'] = True
+        lobby.refresh(on_update=_redraw_lobby)
+        lobby_command = input(lobby_prompt)
+        lobby_state['waiting'] = False
         yes_no = ['y','n']
         if (lobby_command == 'j'):
             channel_name = input("[.] Enter channel_name: ")
@@ -281,46 +525,46 @@ def chat_main(client):
                 if not channel_info['success']:
                     print(f"[-] Error while joining the channel ({channel_info['error_message']})")
                     continue
+        elif (lobby_command == 'e'):
+            process_export(client)
+            continue
+        elif (lobby_command == 't'):
+            process_topics(topics)
+            continue
+        elif (lobby_command == 's'):
+            process_search(searches)
+            continue
         elif (lobby_command == 'quit'):
             break
         else:
             continue
         # Set up thread to update bio with song and artist
+        # CLUBHOUSE_NOW_PLAYING picks another player: ytmusic, mpris, file:<path>
         spoti = input("Are you using spotify? (y/n)")
+        _spoti_func = None
         if(spoti == 'y'):
-            _spoti_func = _update_song_bio(client,m_bio,prev_song)
+            try:
+                source = make_source(os.environ.get("CLUBHOUSE_NOW_PLAYING", "spotify"))
+            except Exception as error:
+                # Unknown source name, missing package, bad ytmusic auth file, ...
+                print(f"[-] Cannot read the current song ({error})")
+            else:
+                bio_queue = MutationQueue(client, window=5)
+                # Only track changes reach the queue, which collapses rapid ones into one call.
+                _spoti_func = NowPlayingWatcher(
+                    source, lambda track: bio_queue.update_bio(song_bio(track, m_bio))
+                ).start()
         # List currently available users (TOP 20 only.)
         # Also, check for the current user's speaker permission.
-        channel_speaker_permission = False
-        console = Console()
-        table = Table(show_header=True, header_style="bold magenta")
-        table.add_column("user_id", style="cyan", justify="right")
-        table.add_column("username")
-        table.add_column("name")
-        table.add_column("is_speaker")
-        table.add_column("is_moderator")
-        users = channel_info['users']
-        i = 0
-        for user in users:
-            i += 1
-            if i > max_limit:
-                break
-            table.add_row(
-                str(user['user_id']),
-                str(user['name']),
-                str(user['username']),
-                str(user['is_speaker']),
-                str(user['is_moderator']),
-            )
-            # Check if the user is the speaker
-            if user['user_id'] == int(user_id):
-                channel_speaker_permission = bool(user['is_speaker'])
-        console.print(table)
+        channel_speaker_permission = print_user_list(channel_info['users'], user_id, max_limit)
         print("Setting RTC...")
         # Check for the voice level.
-        if RTC:
+        rtc = get_rtc()
+        if rtc:
             token = channel_info['token']
-            RTC.joinChannel(token, channel_name, "", int(user_id))
+            rtc.join(token, channel_name, int(user_id), speakers=[
+                _user['user_id'] for _user in channel_info['users'] if _user.get('is_speaker')
+            ])
         else:
             print("[!] Agora SDK is not installed.")
             print("    You may not speak or listen to the conversation.")
@@ -330,6 +574,33 @@ def chat_main(client):
         client.active_ping(channel_name)
         _ping_func = _ping_keep_alive(client, channel_name)
         _wait_func = None
+        keyboard = None
+
+        _automod = None
+
+        # One get_channel poller for everything that follows the room
+        # (recorder, event stream, auto-moderation). It only polls while one is on.
+        _room = RoomWatcher(client, channel_name)
+
+        # Record who is in the room when CLUBHOUSE_RECORD_DIR is set
+        _recorder = None
+        if os.environ.get("CLUBHOUSE_RECORD_DIR"):
+            _recorder = RoomRecorder(client, os.environ["CLUBHOUSE_RECORD_DIR"])
+            _recorder.watch(_room)
+
+        # Stream joins, leaves and role changes when --events is given
+        _room_events = None
+        if EVENTS:
+            _room_events = RoomEvents(EVENTS)
+            _room_events.watch(_room)
+
+        # The headless engine simulates whoever is on stage
+        if RTC and hasattr(RTC, "apply_diff"):
+            _room.subscribe(lambda channel, info, diff, now: RTC.apply_diff(diff))
+
+        # The join answer is the first snapshot
+        _room.update(channel_info)
+        _room.start()
 
         # Add raise_hands key bindings for speaker permission
         # Sorry for the bad quality
@@ -343,6 +614,7 @@ def chat_main(client):
                     _hotkey = "ctrl+shift+h"
 
                 print(f"[*] Press [{_hotkey}] to raise your hands for the speaker permission.")
+                import keyboard
                 keyboard.add_hotkey(
                     _hotkey,
                     _request_speaker_permission,
@@ -356,84 +628,80 @@ def chat_main(client):
             #Print Current user in the room
             if(command_input == 'r'):
                 channel_info = client.get_channel(channel_name)
-                channel_speaker_permission = False
-                console = Console()
-                table = Table(show_header=True, header_style="bold magenta")
-                table.add_column("user_id", style="cyan", justify="right")
-                table.add_column("username")
-                table.add_column("name")
-                table.add_column("is_speaker")
-                table.add_column("is_moderator")
-                users = channel_info['users']
-                i = 0
-                for user in users:
-                    i += 1
-                    if i > max_limit:
-                        break
-                    table.add_row(
-                        str(user['user_id']),
-                        str(user['name']),
-                        str(user['username']),
-                        str(user['is_speaker']),
-                        str(user['is_moderator']),
-                    )
-                    # Check if the user is the speaker
-                    if user['user_id'] == int(user_id):
-                        channel_speaker_permission = bool(user['is_speaker'])
-                console.print(table)
+                channel_speaker_permission = print_user_list(channel_info['users'], user_id, max_limit)
 
             #Print Command List
             elif (command_input == "help"):
                 print("r: refresh room user list")
                 print("quit: quit the app")
-                print("invite: invite user in the audience to speak")
-                print("uninvite: move speaker to the audience")
-                print("set mod: set moderator")
+                print("invite: invite users in the audience to speak ('hands': everyone raising a hand)")
+                print("uninvite: move speakers to the audience ('speakers': every speaker but moderators)")
+                print("mute: mute speakers ('speakers': every speaker but moderators)")
+                print("set mod: set moderators")
+                print("automod: turn rule-based auto-moderation on/off, 'automod stats' for what it did")
                 print("user info: print details user info in the room")
                 print("lobby: print current lobby list")
+                print("profile: dump thread stacks (and CPU/heap profiles when on) to profiles/")
+                print("profile on / profile off: start or stop the CPU and heap profilers")
 
-            #Invite Person to speak
+            #Invite Person(s) to speak
             elif (command_input == 'invite'):
-                id_invite = input("Enter the user_id to invite: ")
-                users = channel_info['users']
-                success = False
-                for user in users:
-                    if user['user_id'] == int(id_invite):
-                        client.invite_speaker(channel_name,int(id_invite))
-                        print("Invited.")
-                        success = True
-                if not success:
-                    print("ID not found")
-
-            #Move speak to audience
+                process_moderation(
+                    client, channel_name, channel_info['users'], user_id, "invite_speaker",
+                    "Enter the user_id(s) to invite (comma separated, or 'hands'): ",
+                    {"hands": {"raise_hands": True, "is_speaker": False}}
+                )
+
+            #Move speaker(s) to audience
             elif (command_input == 'uninvite'):
-                id_invite = input("Enter the user_id to invite: ")
-                users = channel_info['users']
-                success = False
-                for user in users:
-                    if user['user_id'] == int(id_invite):
-                        client.uninvite_speaker(channel_name,int(id_invite))
-                        print("Moved to audience.")
-                        success = True
-                if not success:
-                    print("ID not found")
+                process_moderation(
+                    client, channel_name, channel_info['users'], user_id, "uninvite_speaker",
+                    "Enter the user_id(s) to move to the audience (comma separated, or 'speakers'): ",
+                    {"speakers": {"is_speaker": True, "is_moderator": False}}
+                )
+
+            #Mute speaker(s)
+            elif (command_input == 'mute'):
+                process_moderation(
+                    client, channel_name, channel_info['users'], user_id, "mute_speaker",
+                    "Enter the user_id(s) to mute (comma separated, or 'speakers'): ",
+                    {"speakers": {"is_speaker": True, "is_moderator": False}}
+                )
 
             #Print lobby list
             elif (command_input == 'lobby'):
                 print_channel_list(client, max_limit)
 
-            #Set Moderator
+            #Set Moderator(s)
             elif (command_input == "set mod"):
-                id_invite = input("Enter the user_id to set as moderator: ")
-                users = channel_info['users']
-                success = False
-                for user in users:
-                    if user['user_id'] == int(id_invite):
-                        client.make_moderator(channel_name,int(id_invite))
-                        print("Set.")
-                        success = True
-                if not success:
-                    print("ID not found")
+                process_moderation(
+                    client, channel_name, channel_info['users'], user_id, "make_moderator",
+                    "Enter the user_id(s) to set as moderator (comma separated): "
+                )
+
+            #Toggle auto-moderation
+            elif (command_input == "automod"):
+                if _automod:
+                    _automod.stop()
+                    _automod = None
+                    print("[.] Auto-moderation off.")
+                else:
+                    _automod = process_automod(client, channel_name, _room)
+
+            #Auto-moderation actions and rule latency
+            elif (command_input == "automod stats"):
+                if not _automod:
+                    print("Auto-moderation is off.")
+                else:
+                    for entry in list(_automod.log)[-20:]:
+                        print(entry)
+                    for name, stats in _automod.stats().items():
+                        print(f"{name}: {stats['evaluations']} evaluations, {stats['actions']} actions, "
+                              f"avg {stats['avg_ms']:.3f} ms, max {stats['max_ms']:.3f} ms")
+
+            #Dump profiling reports without leaving the room, or turn profiling on/off
+            elif (command_input in ("profile", "profile on", "profile off")):
+                process_profile(command_input)
 
             #Print User Info
             elif (command_input == "user info"):
@@ -446,18 +714,28 @@ def chat_main(client):
                 break
             else:
                 print("Bad input!")
-        keyboard.unhook_all()
+        if keyboard:
+            keyboard.unhook_all()
 
         # Safely leave the channel upon quitting the channel.
         if _ping_func:
             _ping_func.set()
         if _wait_func:
             _wait_func.set()
+        _room.stop()
+        if _recorder:
+            _recorder.stop()
+        if _room_events:
+            _room_events.stop()
+        if _automod:
+            _automod.stop()
         if _spoti_func:
-            _spoti_func.set()
-            client.update_bio(m_bio)
+            _spoti_func.stop()
+            bio_queue.update_bio(m_bio)
+            bio_queue.flush()
+            print(f"[.] Bio updates: {bio_queue.stats['sent']} sent, {bio_queue.saved} saved.")
         if RTC:
-            RTC.leaveChannel()
+            RTC.leave()
         client.leave_channel(channel_name)
 
 def user_authentication(client):
@@ -487,7 +765,7 @@ def user_authentication(client):
     user_id = result['user_profile']['user_id']
     user_token = result['auth_token']
     user_device = client.HEADERS.get("CH-DeviceId")
-    write_config(user_id, user_token, user_device)
+    write_config(user_id, user_token, user_device, refresh_token=result.get('refresh_token'))
 
     print("[.] Writing configuration file complete.")
 
@@ -499,7 +777,9 @@ def user_authentication(client):
     client = Clubhouse(
         user_id=user_id,
         user_token=user_token,
-        user_device=user_device
+        user_device=user_device,
+        api_url=client.API_URL,
+        transport=client.transport
     )
     if result['is_onboarding']:
         process_onboarding(client)
@@ -512,37 +792,103 @@ def main():
     """
     # Initialize configuration
     client = None
+    # CLUBHOUSE_API_URL points the client at another server (e.g. benchmarks/standin.py)
+    api_url = os.environ.get("CLUBHOUSE_API_URL")
+    # Resolve the API host and connect in the background while the configuration
+    # is read and the prompts are answered; the clients below share the connections.
+    # CLUBHOUSE_TRANSPORT picks the HTTP backend ("requests" or "http2")
+    global WARMER
+    if WARMER is None:
+        _client = Clubhouse(api_url=api_url, transport=os.environ.get("CLUBHOUSE_TRANSPORT"))
+        # CLUBHOUSE_DNS_CACHE=1 caches DNS answers for the whole process
+        dns_cache = DNSCache().install() if os.environ.get("CLUBHOUSE_DNS_CACHE") else None
+        WARMER = Warmer(_client, dns_cache).start()
+    transport = WARMER.client.transport
     user_config = read_config()
     user_id = user_config.get('user_id')
     user_token = user_config.get('user_token')
     user_device = user_config.get('user_device')
+    refresh_token = user_config.get('refresh_token')
 
     # Check if user is authenticated
     if user_id and user_token and user_device:
         client = Clubhouse(
             user_id=user_id,
             user_token=user_token,
-            user_device=user_device
+            user_device=user_device,
+            api_url=api_url,
+            transport=transport
         )
+        # Refresh the token before it expires, and save the new one
+        if refresh_token:
+            client = CredentialManager(
+                client,
+                refresh_token,
+                on_refresh=lambda access, refresh: write_config(
+                    str(user_id), access, user_device, refresh_token=refresh
+                )
+            )
+
+        # Both checks are sent at once
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            _waitlist = executor.submit(client.check_waitlist_status)
+            _me = executor.submit(client.me)
 
         # Check if user is still on the waitlist
-        _check = client.check_waitlist_status()
+        _check = _waitlist.result()
         if _check['is_waitlisted']:
             print("[!] You're still on the waitlist. Find your friends to get yourself in.")
             return
 
         # Check if user has not signed up yet.
-        _check = client.me()
+        _check = _me.result()
         if not _check['user_profile'].get("username"):
             process_onboarding(client)
 
         chat_main(client)
     else:
-        client = Clubhouse()
+        client = Clubhouse(api_url=api_url, transport=transport)
         user_authentication(client)
         main()
 
+def parse_args():
+    """ () -> argparse.Namespace
+
+    Parse command line options.
+    """
+    parser = argparse.ArgumentParser(description="Sample CLI Clubhouse Client")
+    parser.add_argument(
+        "--profile",
+        default=os.environ.get("CLUBHOUSE_PROFILE", ""),
+        help="enable profiling: cpu, heap, cpu,heap or all (default: $CLUBHOUSE_PROFILE)"
+    )
+    parser.add_argument(
+        "--events",
+        default=os.environ.get("CLUBHOUSE_EVENTS", ""),
+        help="write room events as JSON lines to a file, tcp:host:port or unix:path (default: $CLUBHOUSE_EVENTS)"
+    )
+    parser.add_argument(
+        "--events-buffer", type=int, default=1000,
+        help="events buffered while the reader is slow (default: 1000)"
+    )
+    parser.add_argument(
+        "--events-policy", choices=("drop", "block"), default="drop",
+        help="when the buffer is full: drop new events or wait for the reader (default: drop)"
+    )
+    args = parser.parse_args()
+    if args.events in ("-", "stdout"):
+        # stdout is where the prompts and tables go
+        parser.error("--events cannot write to stdout in this interactive client, use a file or a socket")
+    return args
+
 if __name__ == "__main__":
+    args = parse_args()
+    PROFILER = Profiler.from_env(args.profile)
+    if PROFILER:
+        PROFILER.start()
+        print("[.] Profiling enabled. Type \"profile\" in a room to write a report.")
+    if args.events:
+        EVENTS = EventStream(open_sink(args.events), args.events_buffer, args.events_policy)
     try:
         main()
     except Exception:
@@ -551,3 +897,7 @@ if __name__ == "__main__":
         for _file in file_list:
             if _file.endswith(".dmp"):
                 os.remove(_file)
+    finally:
+        # Write the events still buffered
+        if EVENTS:
+            EVENTS.close()
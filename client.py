@@ -12,29 +12,39 @@ import os
 import sys
 import threading
 import configparser
-import keyboard
-import agorartc
-from SwSpotify import spotify,SpotifyNotRunning, SpotifyPaused #For spotify function
 from time import gmtime, strftime # Timestamp
 from rich.table import Table
 from rich.console import Console
 from clubhouse.clubhouse import Clubhouse
+from clubhouse.nowplaying import NowPlayingWatcher, make_source, song_bio
+from clubhouse.rtc import make_engine
 
 class client:
     def __init__(self):
-        self.rtc = self.setup_rtc()
+        self._rtc = None
+        self._rtc_loaded = False
         self.client = self.check_auth()
         self.channel_speaker_permission = False
         self._wait_func = None
         self._ping_func = None
         self._bio = None
-        self._prev_song = None #For spotify function
         self._user_id = None
         self._channel_name = None
         self._channel_info = None
         self.max_limit = 50
         self.yes_no = ['y','n']
 
+    @property
+    def rtc(self):
+        '''
+        The Agora engine, created on first use
+        return None if it could not be set up
+        '''
+        if not self._rtc_loaded:
+            self._rtc_loaded = True
+            self._rtc = self.setup_rtc()
+        return self._rtc
+
     def setup_rtc(self):
         '''
         Set Up Rtc:
@@ -42,15 +52,9 @@ class client:
         return None on Fail
         '''
         try:
-            rtc = agorartc.createRtcEngineBridge()
-            eventHandler = agorartc.RtcEngineEventHandlerBase()
-            rtc.initEventHandler(eventHandler)
-            rtc.initialize(Clubhouse.AGORA_KEY, None, agorartc.AREA_CODE_GLOB & 0xFFFFFFFE) #exclude Chinese server
+            rtc = make_engine(os.environ.get("CLUBHOUSE_RTC", "agora"))
             # Enhance Voice Quality
-            if rtc.setAudioProfile(
-                    agorartc.AUDIO_PROFILE_MUSIC_HIGH_QUALITY_STEREO,
-                    agorartc.AUDIO_SCENARIO_GAME_STREAMING
-                ) < 0:
+            if not rtc.set_audio_profile():
                 print("> ! Error while setting up the audio profile !")
             return rtc
         except:
@@ -286,26 +290,20 @@ class client:
             print("["+time+"]"+" Error in _ping_keep_alive occur.")
         return True   
 
-    @self.set_interval(3)
     def _update_song_bio(self, m_bio):
-        try:
-            song, artist = spotify.current()
-        except:
+        """ Put the current spotify song in the bio whenever it changes. """
+        def _on_change(track):
             # Spotify not running / The song is paused
-            pass
-        else:
-            if(song != self._prev_song):
-                m_songname = "♫𝗡𝗼𝘄 𝗣𝗹𝗮𝘆𝗶𝗻𝗴: "+song+"\n♫𝗔𝗿𝘁𝗶𝘀𝘁: "+artist+"\n如果個Now playing無update可以refresh多幾次\n\n"
-                new_bio = m_songname + m_bio
-                try:
-                    self.client.update_bio(new_bio)
-                    self._prev_song = song
-                except:
-                    #Error may occur if json has bad request
-                    time = strftime("%Y-%m-%d %H:%M:%S", gmtime())
-                    print("["+time+"]"+" Error updating bio.")
-                    print("Song Name: "+song+"\nArtist: "+artist)
-        return True
+            if not track:
+                return
+            try:
+                self.client.update_bio(song_bio(track, m_bio))
+            except:
+                #Error may occur if json has bad request
+                time = strftime("%Y-%m-%d %H:%M:%S", gmtime())
+                print("["+time+"]"+" Error updating bio.")
+                print("Song Name: "+track[0]+"\nArtist: "+track[1])
+        return NowPlayingWatcher(make_source("spotify"), _on_change).start()
 
     def run(self):
         if self.client == None:
@@ -0,0 +1,357 @@
+"""
+automod.py
+
+Rule-based auto-moderation for a room you moderate.
+
+Every snapshot of the room (get_channel) is turned into a roster diff (roster.py), and
+the rules only look at what changed: who joined, who left, whose role changed. The
+actions they ask for are sent through moderation.bulk_action under the shared rate
+limiter, from a worker thread of the moderator, so a slow call never holds up the
+watcher and its other subscribers. Evaluation time is kept per rule.
+
+MuteIdleSpeakers only knows who talks through the voice engine (listen()); without
+one it would mute everyone on stage, so watch() and start() refuse to run it.
+
+    >>> automod = AutoModerator(clubhouse, channel, [
+    ...     InviteRaisedHands(following_ids),
+    ...     MuteIdleSpeakers(idle=300),
+    ...     PromoteAdmins(admin_ids),
+    ... ])
+    >>> automod.watch(room_watcher)          # or automod.start(interval=10)
+    ...
+    >>> automod.stats()
+    {'invite_raised_hands': {'evaluations': 12, 'actions': 3, 'avg_ms': 0.01, 'max_ms': 0.04}, ...}
+"""
+
+import time
+import heapq
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from .roster import roster_of, diff_rosters, is_empty_diff
+from .moderation import bulk_action
+from .watcher import RoomWatcher
+
+class Rule:
+    """
+    Rule Class
+
+    Subclasses implement evaluate(), returning the (action, user_id) pairs to run.
+    `action` is one of moderation.BULK_ACTIONS.
+    """
+
+    name = "rule"
+    # True when the rule relies on speaker activity from the voice engine
+    needs_activity = False
+
+    def evaluate(self, roster, diff, now):
+        """ (Rule, dict, dict, float) -> list of (str, int)
+
+        roster: the room after the change
+        diff: roster.diff_rosters(previous, roster)
+        """
+        raise NotImplementedError
+
+    def next_deadline(self):
+        """ (Rule) -> float
+
+        Earliest time the rule wants to be evaluated even if nothing changed, or None.
+        """
+        return None
+
+def _became(diff, field):
+    """ (dict, str) -> list of int
+
+    Users for whom `field` turned true, either by joining or by a role change.
+    """
+    users = [user_id for user_id, entry in diff["joined"].items() if entry.get(field)]
+    users.extend(user_id for user_id, fields in diff["changed"].items() if fields.get(field))
+    return users
+
+class InviteRaisedHands(Rule):
+    """ Invite to speak the raised hands of the given users (e.g. the ones you follow). """
+
+    name = "invite_raised_hands"
+
+    def __init__(self, user_ids):
+        """ (InviteRaisedHands, iterable of int) -> NoneType """
+        self.user_ids = {int(user_id) for user_id in user_ids}
+
+    def evaluate(self, roster, diff, now):
+        return [
+            ("invite_speaker", user_id) for user_id in _became(diff, "raise_hands")
+            if user_id in self.user_ids and not roster[user_id].get("is_speaker")
+        ]
+
+class PromoteAdmins(Rule):
+    """ Make the given users (e.g. club admins) moderators once they are on stage. """
+
+    name = "promote_admins"
+
+    def __init__(self, user_ids):
+        """ (PromoteAdmins, iterable of int) -> NoneType """
+        self.user_ids = {int(user_id) for user_id in user_ids}
+
+    def evaluate(self, roster, diff, now):
+        return [
+            ("make_moderator", user_id) for user_id in _became(diff, "is_speaker")
+            if user_id in self.user_ids and not roster[user_id].get("is_moderator")
+        ]
+
+class MuteIdleSpeakers(Rule):
+    """
+    Mute speakers that have been idle for `idle` seconds.
+
+    A speaker is active when they get on stage and whenever touch() is called for them
+    (e.g. from the audio volume indication). Deadlines are kept in a heap, so only the
+    speakers that are due get looked at.
+    """
+
+    name = "mute_idle_speakers"
+    needs_activity = True
+
+    def __init__(self, idle=300, exclude_moderators=True):
+        """ (MuteIdleSpeakers, float, bool) -> NoneType """
+        self.idle = idle
+        self.exclude_moderators = exclude_moderators
+        self.last_active = {}
+        self._deadlines = []
+        self._lock = threading.Lock()
+
+    def touch(self, user_id, now=None):
+        """ (MuteIdleSpeakers, int, float) -> NoneType
+
+        Record activity of a speaker.
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            if int(user_id) in self.last_active:
+                self.last_active[int(user_id)] = now
+
+    def evaluate(self, roster, diff, now):
+        with self._lock:
+            for user_id in _became(diff, "is_speaker"):
+                self.last_active[user_id] = now
+                heapq.heappush(self._deadlines, (now + self.idle, user_id))
+            for user_id in diff["left"]:
+                self.last_active.pop(user_id, None)
+            for user_id, fields in diff["changed"].items():
+                if fields.get("is_speaker") is False:
+                    self.last_active.pop(user_id, None)
+
+            actions = []
+            while self._deadlines and self._deadlines[0][0] <= now:
+                _, user_id = heapq.heappop(self._deadlines)
+                last = self.last_active.get(user_id)
+                if last is None:
+                    continue
+                if last + self.idle > now:
+                    # Active since the deadline was set: check again later.
+                    heapq.heappush(self._deadlines, (last + self.idle, user_id))
+                    continue
+                del self.last_active[user_id]
+                entry = roster.get(user_id, {})
+                if self.exclude_moderators and entry.get("is_moderator"):
+                    continue
+                actions.append(("mute_speaker", user_id))
+            return actions
+
+    def next_deadline(self):
+        with self._lock:
+            return self._deadlines[0][0] if self._deadlines else None
+
+class AutoModerator:
+    """
+    AutoModerator Class
+
+    Feed it room snapshots with update(), subscribe it to a RoomWatcher with watch(),
+    or let start() poll get_channel. Rules with needs_activity need listen() first.
+    """
+
+    def __init__(self, client, channel, rules, rate_limiter=None, dry_run=False, log_size=1000):
+        """ (AutoModerator, Clubhouse, str, list of Rule, RateLimiter, bool, int) -> NoneType
+        dry_run: evaluate the rules but do not send anything
+        log_size: actions kept in `log` (oldest dropped first)
+        """
+        self.client = client
+        self.channel = channel
+        self.rules = list(rules)
+        self.rate_limiter = rate_limiter
+        self.dry_run = dry_run
+        self.roster = {}
+        self.log = deque(maxlen=log_size)
+        self._stats = {rule.name: {"evaluations": 0, "actions": 0, "total": 0.0, "max": 0.0} for rule in self.rules}
+        self._lock = threading.Lock()
+        self._watcher = None
+        self._owned = None
+        self._rtc = None
+        self._executor = None
+
+    def activity(self, user_ids, now=None):
+        """ (AutoModerator, list of int, float) -> NoneType
+
+        Report that these users are talking (see MuteIdleSpeakers.touch).
+        """
+        for rule in self.rules:
+            if hasattr(rule, "touch"):
+                for user_id in user_ids:
+                    rule.touch(user_id, now)
+
+    def _on_volume(self, speakers):
+        self.activity([user_id for user_id, volume in speakers if volume > 0])
+
+    def listen(self, rtc):
+        """ (AutoModerator, rtc.RtcEngine) -> NoneType
+
+        Take speaker activity from the voice engine's volume reports.
+        """
+        rtc.on_volume(self._on_volume)
+        self._rtc = rtc
+
+    def _evaluate(self, users, now):
+        """ (AutoModerator, list of dict, float) -> dict
+
+        Evaluate the rules on the changes since the previous snapshot.
+        return {(action, user_id): rule name}
+        """
+        with self._lock:
+            roster = roster_of(users)
+            diff = diff_rosters(self.roster, roster)
+            self.roster = roster
+            wanted = {}
+            for rule in self.rules:
+                deadline = rule.next_deadline()
+                if is_empty_diff(diff) and (deadline is None or deadline > now):
+                    continue
+                start = time.perf_counter()
+                actions = rule.evaluate(roster, diff, now)
+                elapsed = time.perf_counter() - start
+                stats = self._stats[rule.name]
+                stats["evaluations"] += 1
+                stats["actions"] += len(actions)
+                stats["total"] += elapsed
+                stats["max"] = max(stats["max"], elapsed)
+                for action, user_id in actions:
+                    wanted.setdefault((action, int(user_id)), rule.name)
+        return wanted
+
+    def _run(self, wanted):
+        """ (AutoModerator, dict) -> list of dict
+
+        Send the actions asked for by _evaluate.
+        """
+        by_action = {}
+        for action, user_id in wanted:
+            by_action.setdefault(action, []).append(user_id)
+        report = []
+        for action, user_ids in by_action.items():
+            if self.dry_run:
+                outcomes = {user_id: {"success": True, "error": None} for user_id in user_ids}
+            else:
+                outcomes = bulk_action(self.client, action, self.channel, user_ids, rate_limiter=self.rate_limiter)
+            for user_id, outcome in outcomes.items():
+                report.append({
+                    "rule": wanted[(action, user_id)],
+                    "action": action,
+                    "user_id": user_id,
+                    "success": outcome["success"],
+                    "error": outcome["error"],
+                })
+        self.log.extend(report)
+        return report
+
+    def update(self, users, now=None):
+        """ (AutoModerator, list of dict, float) -> list of dict
+
+        Evaluate the rules on the changes since the previous snapshot and run the actions.
+        return [{"rule", "action", "user_id", "success", "error"}]
+        """
+        now = time.time() if now is None else now
+        return self._run(self._evaluate(users, now))
+
+    def poll(self, now=None):
+        """ (AutoModerator, float) -> list of dict
+
+        Fetch the room once and update.
+        """
+        channel_info = self.client.get_channel(self.channel)
+        if not channel_info.get("success"):
+            return []
+        return self.update(channel_info.get("users", []), now)
+
+    def stats(self):
+        """ (AutoModerator) -> dict
+
+        {rule: {"evaluations", "actions", "avg_ms", "max_ms"}}
+        """
+        with self._lock:
+            return {
+                name: {
+                    "evaluations": stats["evaluations"],
+                    "actions": stats["actions"],
+                    "avg_ms": stats["total"] / stats["evaluations"] * 1000 if stats["evaluations"] else 0.0,
+                    "max_ms": stats["max"] * 1000,
+                }
+                for name, stats in self._stats.items()
+            }
+
+    def _on_snapshot(self, channel, channel_info, diff, now):
+        if not channel_info.get("success"):
+            return
+        wanted = self._evaluate(channel_info.get("users", []), now)
+        executor = self._executor
+        if wanted and executor:
+            # Actions run in order on one worker, off the watcher's thread.
+            executor.submit(self._run, wanted)
+
+    def _check_rules(self):
+        """ (AutoModerator) -> NoneType
+
+        Raise ValueError if a rule needs speaker activity and nothing reports it.
+        """
+        if self._rtc is None:
+            blind = [rule.name for rule in self.rules if rule.needs_activity]
+            if blind:
+                raise ValueError(f"{', '.join(blind)} needs the voice engine: call listen(rtc) first")
+
+    def watch(self, watcher):
+        """ (AutoModerator, RoomWatcher) -> NoneType
+
+        Evaluate the rules on every snapshot the watcher takes, starting with its last one.
+        Raises ValueError if a rule needs speaker activity and listen() was not called.
+        """
+        self._check_rules()
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="automod")
+        watcher.subscribe(self._on_snapshot)
+        self._watcher = watcher
+        if watcher.channel_info is not None:
+            self._on_snapshot(watcher.channel, watcher.channel_info, None, time.time())
+
+    def start(self, interval=10):
+        """ (AutoModerator, float) -> RoomWatcher
+
+        Poll the room every interval seconds with a watcher of its own.
+        Call stop to stop.
+        """
+        watcher = RoomWatcher(self.client, self.channel, interval)
+        self.watch(watcher)
+        self._owned = watcher
+        return watcher.start(immediate=True)
+
+    def stop(self):
+        """ (AutoModerator) -> NoneType """
+        if self._watcher:
+            self._watcher.unsubscribe(self._on_snapshot)
+            self._watcher = None
+        if self._owned:
+            self._owned.stop()
+            self._owned = None
+        if self._rtc:
+            self._rtc.off(self._on_volume)
+            self._rtc = None
+        if self._executor:
+            # Actions already queued are still sent.
+            self._executor.shutdown(wait=False)
+            self._executor = None
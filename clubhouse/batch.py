@@ -0,0 +1,280 @@
+"""
+batch.py
+
+Run many different Clubhouse calls in one round of parallel I/O.
+
+Callers submit a list of (endpoint, args) items. Read-only calls run concurrently.
+Writes that touch the same thing (the same channel, user, club, or your own profile)
+run one after another in submission order, while unrelated writes still run in
+parallel. Every call takes a token from a shared rate limiter, and every item gets its
+own result or error.
+
+    >>> results = run_batch(clubhouse, [
+    ...     ("get_club", {"club_id": 1234}),
+    ...     ("get_club_members", (1234,)),
+    ...     ("invite_speaker", {"channel": "MR35Dy96", "user_id": 1}),
+    ...     ("make_moderator", {"channel": "MR35Dy96", "user_id": 1}),   # runs after the invite
+    ... ])
+"""
+
+import inspect
+from concurrent.futures import ThreadPoolExecutor
+
+from .ratelimit import DEFAULT_LIMITER
+from .utils import iter_pages
+
+# Endpoint registry.
+#   readonly: safe to run concurrently with anything
+#   scope:    argument whose value orders writes (same value -> same queue)
+#   group:    fixed queue name for writes without a natural scope
+# Writes with neither scope nor group share the "account" queue.
+# Auth calls, photo upload and the unimplemented endpoints are left out on purpose.
+ENDPOINTS = {
+    # Account / app
+    "check_for_update": {"readonly": True},
+    "get_release_notes": {"readonly": True},
+    "check_waitlist_status": {"readonly": True},
+    "get_settings": {"readonly": True},
+    "me": {"readonly": True},
+    "add_email": {"group": "profile"},
+    "record_action_trails": {},
+
+    # Profile
+    "update_bio": {"group": "profile"},
+    "update_name": {"group": "profile"},
+    "update_displayname": {"group": "profile"},
+    "update_username": {"group": "profile"},
+    "update_skintone": {"group": "profile"},
+    "update_twitter_username": {"group": "profile"},
+    "update_instagram_username": {"group": "profile"},
+    "add_user_topic": {"group": "profile"},
+    "remove_user_topic": {"group": "profile"},
+
+    # Users
+    "get_profile": {"readonly": True},
+    "get_following": {"readonly": True},
+    "get_followers": {"readonly": True},
+    "get_mutual_follows": {"readonly": True},
+    "get_online_friends": {"readonly": True},
+    "get_suggested_follows_similar": {"readonly": True},
+    "get_suggested_follows_all": {"readonly": True},
+    "search_users": {"readonly": True},
+    "follow": {"scope": "user_id"},
+    "unfollow": {"scope": "user_id"},
+    "block": {"scope": "user_id"},
+    "unblock": {"scope": "user_id"},
+    "follow_multiple": {},
+    "update_follow_notifications": {"scope": "user_id"},
+    "ignore_suggested_follow": {"scope": "user_id"},
+    "invite_from_waitlist": {"scope": "user_id"},
+    "invite_to_app": {"scope": "phone_number"},
+
+    # Channels
+    "get_channels": {"readonly": True},
+    "get_channel": {"readonly": True},
+    "get_welcome_channel": {"readonly": True},
+    "get_suggested_speakers": {"readonly": True},
+    "get_create_channel_targets": {"readonly": True},
+    "create_channel": {},
+    "join_channel": {"scope": "channel"},
+    "leave_channel": {"scope": "channel"},
+    "hide_channel": {"scope": "channel"},
+    "make_channel_public": {"scope": "channel"},
+    "make_channel_social": {"scope": "channel"},
+    "end_channel": {"scope": "channel"},
+    "active_ping": {"scope": "channel"},
+    "audience_reply": {"scope": "channel"},
+    "change_handraise_settings": {"scope": "channel"},
+    "accept_speaker_invite": {"scope": "channel"},
+    "reject_speaker_invite": {"scope": "channel"},
+    "invite_speaker": {"scope": "channel"},
+    "uninvite_speaker": {"scope": "channel"},
+    "mute_speaker": {"scope": "channel"},
+    "make_moderator": {"scope": "channel"},
+    "block_from_channel": {"scope": "channel"},
+    "invite_to_existing_channel": {"scope": "channel"},
+    "invite_to_new_channel": {"scope": "channel"},
+    "update_channel_flags": {"scope": "channel"},
+    "report_incident": {"scope": "channel"},
+    "accept_new_channel_invite": {"scope": "channel_invite_id"},
+    "reject_new_channel_invite": {"scope": "channel_invite_id"},
+    "cancel_new_channel_invite": {"scope": "channel_invite_id"},
+
+    # Notifications
+    "get_notifications": {"readonly": True},
+    "get_actionable_notifications": {"readonly": True},
+    "ignore_actionable_notification": {"scope": "actionable_notification_id"},
+
+    # Events
+    "get_event": {"readonly": True},
+    "get_events": {"readonly": True},
+    "get_events_to_start": {"readonly": True},
+    "get_events_for_user": {"readonly": True},
+    "create_event": {"group": "events"},
+    "edit_event": {"group": "events"},
+    "delete_event": {"group": "events"},
+
+    # Clubs
+    "get_club": {"readonly": True},
+    "get_club_members": {"readonly": True},
+    "get_clubs": {"readonly": True},
+    "get_club_nominations": {"readonly": True},
+    "search_clubs": {"readonly": True},
+    "follow_club": {"scope": "club_id"},
+    "unfollow_club": {"scope": "club_id"},
+    "accept_club_member_invite": {"scope": "club_id"},
+    "add_club_admin": {"scope": "club_id"},
+    "remove_club_admin": {"scope": "club_id"},
+    "add_club_member": {"scope": "club_id"},
+    "remove_club_member": {"scope": "club_id"},
+    "approve_club_nomination": {"scope": "club_id"},
+    "reject_club_nomination": {"scope": "club_id"},
+    "add_club_topic": {"scope": "club_id"},
+    "remove_club_topic": {"scope": "club_id"},
+    "update_is_follow_allowed": {"scope": "club_id"},
+    "update_is_membership_private": {"scope": "club_id"},
+    "update_is_community": {"scope": "club_id"},
+    "update_club_description": {"scope": "club_id"},
+
+    # Topics
+    "get_all_topics": {"readonly": True},
+    "get_topic": {"readonly": True},
+    "get_clubs_for_topic": {"readonly": True},
+    "get_users_for_topic": {"readonly": True},
+
+    # Contacts
+    "get_suggested_follows_friends_only": {"group": "contacts"},
+    "get_suggested_invites": {"group": "contacts"},
+    "get_suggested_club_invites": {"group": "contacts"},
+}
+
+def _normalize(item):
+    """ (tuple or dict) -> dict
+
+    Accept ("endpoint", {kwargs}), ("endpoint", [args]), ("endpoint", [args], {kwargs})
+    or {"endpoint": ..., "args": [...], "kwargs": {...}, "group": ...}.
+    """
+    if isinstance(item, dict):
+        return {
+            "endpoint": item["endpoint"],
+            "args": tuple(item.get("args", ())),
+            "kwargs": dict(item.get("kwargs", {})),
+            "group": item.get("group"),
+        }
+    endpoint, *rest = item
+    args, kwargs = (), {}
+    for part in rest:
+        if isinstance(part, dict):
+            kwargs = dict(part)
+        else:
+            args = tuple(part)
+    return {"endpoint": endpoint, "args": args, "kwargs": kwargs, "group": None}
+
+def queue_key(client, item):
+    """ (Clubhouse, dict) -> str
+
+    Queue the item runs in. return None when it can run concurrently with anything
+    """
+    if item["group"]:
+        return f"group:{item['group']}"
+    spec = ENDPOINTS[item["endpoint"]]
+    if spec.get("readonly"):
+        return None
+    if spec.get("scope"):
+        method = getattr(client, item["endpoint"])
+        bound = inspect.signature(method).bind_partial(*item["args"], **item["kwargs"])
+        value = bound.arguments.get(spec["scope"])
+        return f"{spec['scope']}:{value}"
+    return f"group:{spec.get('group', 'account')}"
+
+def run_batch(client, items, max_workers=8, rate_limiter=None, stop_on_error=False):
+    """ (Clubhouse, list, int, RateLimiter, bool) -> list of dict
+
+    Run the items and return one result per item, in the same order:
+        {"endpoint": str, "success": bool, "result": dict or None, "error": str or None}
+    With stop_on_error, an error skips the rest of the same queue.
+    """
+    limiter = rate_limiter or DEFAULT_LIMITER
+    items = [_normalize(item) for item in items]
+    results = [None] * len(items)
+    queues = {}
+    for index, item in enumerate(items):
+        if item["endpoint"] not in ENDPOINTS:
+            results[index] = {
+                "endpoint": item["endpoint"],
+                "success": False,
+                "result": None,
+                "error": f"Unknown endpoint: {item['endpoint']}",
+            }
+            continue
+        try:
+            key = queue_key(client, item)
+        except TypeError as error:
+            results[index] = {"endpoint": item["endpoint"], "success": False, "result": None, "error": str(error)}
+            continue
+        queues.setdefault(key if key is not None else f"item:{index}", []).append(index)
+
+    def _run_queue(indexes):
+        failed = False
+        for index in indexes:
+            item = items[index]
+            if failed and stop_on_error:
+                results[index] = {"endpoint": item["endpoint"], "success": False, "result": None,
+                                  "error": "Skipped after an earlier error"}
+                continue
+            limiter.acquire()
+            try:
+                result = getattr(client, item["endpoint"])(*item["args"], **item["kwargs"])
+                success = bool(result.get("success", True)) if isinstance(result, dict) else True
+                error = None if success else (result.get("error_message") or "Request failed")
+            except Exception as exc:
+                result, success, error = None, False, repr(exc)
+            failed = failed or not success
+            results[index] = {"endpoint": item["endpoint"], "success": success, "result": result, "error": error}
+
+    if queues:
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(queues)))) as executor:
+            list(executor.map(_run_queue, queues.values()))
+    return results
+
+def club_dashboard(client, club_id, rate_limiter=None, max_event_pages=5):
+    """ (Clubhouse, int, RateLimiter, int) -> dict
+
+    Everything needed to show a club, fetched in one round of parallel requests.
+    get_events is paged (up to max_event_pages) alongside, since the club's events
+    can be on any page. errors is keyed like the result: club, members, followers, events.
+    """
+    limiter = rate_limiter or DEFAULT_LIMITER
+    labels = ("club", "members", "followers")
+
+    def _events():
+        return [
+            event for event in iter_pages(client.get_events, "events", is_filtered=False,
+                                          page_size=25, max_pages=max_event_pages, rate_limiter=limiter)
+            if (event.get("club") or {}).get("club_id") == int(club_id)
+        ]
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        events = executor.submit(_events)
+        results = run_batch(client, [
+            ("get_club", {"club_id": club_id}),
+            ("get_club_members", {"club_id": club_id, "return_followers": False, "return_members": True}),
+            ("get_club_members", {"club_id": club_id, "return_followers": True, "return_members": False}),
+        ], rate_limiter=limiter)
+        errors = {label: r["error"] for label, r in zip(labels, results) if not r["success"]}
+        try:
+            club_events = events.result()
+        except Exception as error:
+            club_events = []
+            errors["events"] = str(error)
+    club, members, followers = (r["result"] or {} for r in results)
+    return {
+        "club": club.get("club"),
+        "topics": club.get("topics", []),
+        "members": members.get("users", []),
+        "num_members": members.get("count"),
+        "followers": followers.get("users", []),
+        "num_followers": followers.get("count"),
+        "events": club_events,
+        "errors": errors,
+    }
@@ -11,11 +11,15 @@ Please make sure to know what you're trying to do!
 Sending an odd API request could result in a permanent ban on your account.
 """
 
+import copy
 import uuid
 import random
 import secrets
+import inspect
 import functools
-import requests
+import threading
+
+from .transport import make_transport
 
 class Clubhouse:
     """
@@ -28,6 +32,9 @@ class Clubhouse:
         @unstable_endpoint
             - This means that the endpoint is never tested.
             - Likely to be endpoints that were taken from a static analysis
+
+        @single_flight
+            - Idempotent read: identical calls made while one is in flight share its result.
     """
 
     # App/API Information
@@ -62,7 +69,7 @@ class Clubhouse:
         "CH-AppBuild": f"{API_BUILD_ID}",
         "CH-AppVersion": f"{API_BUILD_VERSION}",
         "User-Agent": f"{API_UA}",
-        "Connection": "close",
+        "Connection": "keep-alive",
         "Content-Type": "application/json; charset=utf-8",
         "Cookie": f"__cfduid={secrets.token_hex(21)}{random.randint(1, 9)}"
     }
@@ -86,10 +93,70 @@ class Clubhouse:
             return func(self, *args, **kwargs)
         return wrap
 
-    def __init__(self, user_id='', user_token='', user_device=''):
-        """ (Clubhouse, str, str, str) -> NoneType
-        Set authenticated information
+    def single_flight(func):
+        """ Share one in-flight request between identical concurrent calls.
+
+        Callers that arrive while the same call (same arguments) is running wait for it
+        and get a copy of its result (so one caller changing it does not affect the
+        others), or the same exception. Nothing is cached: the next call after it
+        returns goes to the server again.
         """
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        def wrap(self, *args, **kwargs):
+            try:
+                bound = signature.bind(self, *args, **kwargs)
+                bound.apply_defaults()
+                key = (func.__name__, tuple(bound.arguments.items())[1:])
+                hash(key)
+            except TypeError:
+                return func(self, *args, **kwargs)
+
+            with self._flight_lock:
+                self.single_flight_stats["calls"] += 1
+                flight = self._in_flight.get(key)
+                leader = flight is None
+                if leader:
+                    flight = self._in_flight[key] = {"done": threading.Event(), "followers": 0}
+                else:
+                    flight["followers"] += 1
+                    self.single_flight_stats["collapsed"] += 1
+            if not leader:
+                flight["done"].wait()
+                if "error" in flight:
+                    raise flight["error"]
+                return copy.deepcopy(flight["result"])
+            try:
+                result = func(self, *args, **kwargs)
+            except BaseException as error:
+                flight["error"] = error
+                raise
+            finally:
+                with self._flight_lock:
+                    del self._in_flight[key]
+                    followers = flight["followers"]
+                if followers and "error" not in flight:
+                    # The leader's caller may change its result: the others copy a snapshot.
+                    flight["result"] = copy.deepcopy(result)
+                flight["done"].set()
+            return result
+        return wrap
+
+    def __init__(self, user_id='', user_token='', user_device='', api_url=None, transport=None):
+        """ (Clubhouse, str, str, str, str, Transport) -> NoneType
+        Set authenticated information
+        api_url overrides API_URL (e.g. to talk to a local stand-in server)
+        transport: HTTP backend, or its name ("requests", "http2", "fake"). See transport.py
+        """
+        self.transport = make_transport(transport)
+        # Copy the headers so that several clients can live in one process.
+        self.HEADERS = dict(self.HEADERS)
+        self._in_flight = {}
+        self._flight_lock = threading.Lock()
+        self.single_flight_stats = {"calls": 0, "collapsed": 0}
+        if api_url:
+            self.API_URL = api_url.rstrip("/")
         self.HEADERS['CH-UserID'] = user_id if user_id else "(null)"
         if user_token:
             self.HEADERS['Authorization'] = f"Token {user_token}"
@@ -125,7 +192,7 @@ class Clubhouse:
         data = {
             "phone_number": phone_number
         }
-        req = requests.post(f"{self.API_URL}/start_phone_number_auth", headers=self.HEADERS, json=data)
+        req = self.transport.post(f"{self.API_URL}/start_phone_number_auth", headers=self.HEADERS, json=data)
         return req.json()
 
     @unstable_endpoint
@@ -139,7 +206,7 @@ class Clubhouse:
         data = {
             "phone_number": phone_number
         }
-        req = requests.post(f"{self.API_URL}/call_phone_number_auth", headers=self.HEADERS, json=data)
+        req = self.transport.post(f"{self.API_URL}/call_phone_number_auth", headers=self.HEADERS, json=data)
         return req.json()
 
     @unstable_endpoint
@@ -153,7 +220,7 @@ class Clubhouse:
         data = {
             "phone_number": phone_number
         }
-        req = requests.post(f"{self.API_URL}/resend_phone_number_auth", headers=self.HEADERS, json=data)
+        req = self.transport.post(f"{self.API_URL}/resend_phone_number_auth", headers=self.HEADERS, json=data)
         return req.json()
 
     def complete_phone_number_auth(self, phone_number, verification_code):
@@ -169,7 +236,7 @@ class Clubhouse:
             "phone_number": phone_number,
             "verification_code": verification_code
         }
-        req = requests.post(f"{self.API_URL}/complete_phone_number_auth", headers=self.HEADERS, json=data)
+        req = self.transport.post(f"{self.API_URL}/complete_phone_number_auth", headers=self.HEADERS, json=data)
         return req.json()
 
     def check_for_update(self, is_testflight=False):
@@ -182,25 +249,27 @@ class Clubhouse:
         {'has_update': False, 'success': True}
         """
         query = f"is_testflight={int(is_testflight)}"
-        req = requests.get(f"{self.API_URL}/check_for_update?{query}", headers=self.HEADERS)
+        req = self.transport.get(f"{self.API_URL}/check_for_update?{query}", headers=self.HEADERS)
         return req.json()
 
     @require_authentication
+    @single_flight
     def get_release_notes(self):
         """ (Clubhouse) -> dict
 
         Get release notes.
         """
-        req = requests.post(f"{self.API_URL}/get_release_notes", headers=self.HEADERS)
+        req = self.transport.post(f"{self.API_URL}/get_release_notes", headers=self.HEADERS)
         return req.json()
 
     @require_authentication
+    @single_flight
     def check_waitlist_status(self):
         """ (Clubhouse) -> dict
 
         Check whether you're still on a waitlist or not.
         """
-        req = requests.post(f"{self.API_URL}/check_waitlist_status", headers=self.HEADERS)
+        req = self.transport.post(f"{self.API_URL}/check_waitlist_status", headers=self.HEADERS)
         return req.json()
 
     @require_authentication
@@ -213,7 +282,7 @@ class Clubhouse:
         data = {
             "email": email
         }
-        req = requests.post(f"{self.API_URL}/add_email", headers=self.HEADERS, json=data)
+        req = self.transport.post(f"{self.API_URL}/add_email", headers=self.HEADERS, json=data)
         return req.json()
 
     @require_authentication
@@ -227,7 +296,7 @@ class Clubhouse:
         }
         tmp = self.HEADERS['Content-Type']
         self.HEADERS.pop("Content-Type")
-        req = requests.post(f"{self.API_URL}/update_photo", headers=self.HEADERS, files=files)
+        req = self.transport.post(f"{self.API_URL}/update_photo", headers=self.HEADERS, files=files)
         self.HEADERS['Content-Type'] = tmp
         return req.json()
 
@@ -244,7 +313,7 @@ class Clubhouse:
             "user_id": int(user_id),
             "source": source
         }
-        req = requests.post(f"{self.API_URL}/follow", headers=self.HEADERS, json=data)
+        req = self.transport.post(f"{self.API_URL}/follow", headers=self.HEADERS, json=data)
         return req.json()
 
     @require_authentication
@@ -256,7 +325,7 @@ class Clubhouse:
         data = {
             "user_id": int(user_id)
         }
-        req = requests.post(f"{self.API_URL}/unfollow", headers=self.HEADERS, json=data)
+        req = self.transport.post(f"{self.API_URL}/unfollow", headers=self.HEADERS, json=data)
         return req.json()
 
     @require_authentication
@@ -268,7 +337,7 @@ class Clubhouse:
         data = {
             "user_id": int(user_id)
         }
-        req = requests.post(f"{self.API_URL}/block", headers=self.HEADERS, json=data)
+        req = self.transport.post(f"{self.API_URL}/block", headers=self.HEADERS, json=data)
         return req.json()
 
     @require_authentication
@@ -280,7 +349,7 @@ class Clubhouse:
         data = {
             "user_id": int(user_id)
         }
-        req = requests.post(f"{self.API_URL}/unblock", headers=self.HEADERS, json=data)
+        req = self.transport.post(f"{self.API_URL}/unblock", headers=self.HEADERS, json=data)
         return req.json()
 
     @require_authentication
@@ -296,7 +365,7 @@ class Clubhouse:
             "user_id": user_id,
             "source": source
         }
-        req = requests.post(f"{self.API_URL}/follow_multiple", headers=self.HEADERS, json=data)
+        req = self.transport.post(f"{self.API_URL}/follow_multiple", headers=self.HEADERS, json=data)
         return req.json()
 
     @require_authentication
@@ -309,7 +378,7 @@ class Clubhouse:
             "club_id": int(club_id),
             "source_topic_id": source_topic_id
         }
-        req = requests.post(f"{self.API_URL}/follow_club", headers=self.HEADERS, json=data)
+        req = self.transport.post(f"{self.API_URL}/follow_club", headers=self.HEADERS, json=data)
         return req.json()
 
     @require_authentication
@@ -322,7 +391,7 @@ class Clubhouse:
             "club_id": int(club_id),
             "source_topic_id": source_topic_id
         }
-        req = requests.post(f"{self.API_URL}/unfollow_club", headers=self.HEADERS, json=data)
+        req = self.transport.post(f"{self.API_URL}/unfollow_club", headers=self.HEADERS, json=data)
         return req.json()
 
     @require_authentication
@@ -336,10 +405,11 @@ class Clubhouse:
             "user_id": int(user_id),
             "notification_type": int(notification_type)
         }
-        req = requests.post(f"{self.API_URL}/update_follow_notifications", headers=self.HEADERS, json=data)
+        req = self.transport.post(f"{self.API_URL}/update_follow_notifications", headers=self.HEADERS, json=data)
         return req.json()
 
     @require_authentication
+    @single_flight
     def get_suggested_follows_similar(self, user_id):
         """ (Clubhouse, int) -> dict
 
@@ -348,7 +418,7 @@ class Clubhouse:
         data = {
             "user_id": int(user_id),
         }
-        req = requests.post(f"{self.API_URL}/get_suggested_follows_similar", headers=self.HEADERS, json=data)
+        req = self.transport.post(f"{self.API_URL}/get_suggested_follows_similar", headers=self.HEADERS, json=data)
         return req.json()
 
     @require_authentication
@@ -363,10 +433,11 @@ class Clubhouse:
             "upload_contacts": upload_contacts,
             "contacts": contacts
         }
-        req = requests.post(f"{self.API_URL}/get_suggested_follows_friends_only", headers=self.HEADERS, json=data)
+        req = self.transport.post(f"{self.API_URL}/get_suggested_follows_friends_only", headers=self.HEADERS, json=data)
         return req.json()
 
     @require_authentication
+    @single_flight
     def get_suggested_follows_all(self, in_onboarding=True, page_size=50, page=1):
         """ (Clubhouse, bool, int, int) -> dict
 
@@ -377,7 +448,7 @@ class Clubhouse:
             page_size,
             page
         )
-        req = requests.get(f"{self.API_URL}/get_suggested_follows_all?{query}", headers=self.HEADERS)
+        req = self.transport.get(f"{self.API_URL}/get_suggested_follows_all?{query}", headers=self.HEADERS)
         return req.json()
 
     @require_authentication
@@ -389,10 +460,11 @@ class Clubhouse:
         data = {
             "user_id": int(user_id)
         }
-        req = requests.post(f"{self.API_URL}/user_id", headers=self.HEADERS, json=data)
+        req = self.transport.post(f"{self.API_URL}/user_id", headers=self.HEADERS, json=data)
         return req.json()
 
     @require_authentication
+    @single_flight
     def get_event(self, event_id=None, user_ids=None, club_id=None, is_member_only=False, event_hashid=None, description=None, time_start_epoch=None, name=None):
         """ (Clubhouse, int, list, int, bool, int, str, int, str) -> dict
 
@@ -408,7 +480,7 @@ class Clubhouse:
             "time_start_epoch": time_start_epoch,
             "name": name
         }
-        req = requests.post(f"{self.API_URL}/get_event", headers=self.HEADERS, json=data)
+        req = self.transport.post(f"{self.API_URL}/get_event", headers=self.HEADERS, json=data)
         return req.json()
 
     @require_authentication
@@ -427,7 +499,7 @@ class Clubhouse:
             "time_start_epoch": time_start_epoch,
             "name": name
         }
-        req = requests.post(f"{self.API_URL}/edit_event", headers=self.HEADERS, json=data)
+        req = self.transport.post(f"{self.API_URL}/edit_event", headers=self.HEADERS, json=data)
         return req.json()
 
     @require_authentication
@@ -446,7 +518,7 @@ class Clubhouse:
             "time_start_epoch": time_start_epoch,
             "name": name
         }
-        req = requests.post(f"{self.API_URL}/edit_event", headers=self.HEADERS, json=data)
+        req = self.transport.post(f"{self.API_URL}/edit_event", headers=self.HEADERS, json=data)
         return req.json()
 
     @require_authentication
@@ -465,10 +537,11 @@ class Clubhouse:
             "time_start_epoch": time_start_epoch,
             "name": name
         }
-        req = requests.post(f"{self.API_URL}/delete_event", headers=self.HEADERS, json=data)
+        req = self.transport.post(f"{self.API_URL}/delete_event", headers=self.HEADERS, json=data)
         return req.json()
 
     @require_authentication
+    @single_flight
     def get_events(self, is_filtered=True, page_size=25, page=1):
         """ (Clubhouse, bool, int, int) -> dict
 
@@ -480,10 +553,11 @@ class Clubhouse:
             page_size,
             page
         )
-        req = requests.get(f"{self.API_URL}/get_events?{query}", headers=self.HEADERS)
+        req = self.transport.get(f"{self.API_URL}/get_events?{query}", headers=self.HEADERS)
         return req.json()
 
     @require_authentication
+    @single_flight
     def get_club(self, club_id, source_topic_id=None):
         """ (Clubhouse, int, int) -> dict
 
@@ -493,10 +567,11 @@ class Clubhouse:
             "club_id": int(club_id),
             "source_topic_id": source_topic_id
         }
-        req = requests.post(f"{self.API_URL}/get_club", headers=self.HEADERS, json=data)
+        req = self.transport.post(f"{self.API_URL}/get_club", headers=self.HEADERS, json=data)
         return req.json()
 
     @require_authentication
+    @single_flight
     def get_club_members(self, club_id, return_followers=False, return_members=True, page_size=50, page=1):
         """ (Clubhouse, int, bool, bool, int, int) -> dict
 
@@ -509,25 +584,27 @@ class Clubhouse:
             page_size,
             page
         )
-        req = requests.get(f"{self.API_URL}/get_club_members?{query}", headers=self.HEADERS)
+        req = self.transport.get(f"{self.API_URL}/get_club_members?{query}", headers=self.HEADERS)
         return req.json()
 
     @require_authentication
+    @single_flight
     def get_settings(self):
         """ (Clubhouse) -> dict
 
         Receive user's settings.
         """
-        req = requests.get(f"{self.API_URL}/get_settings", headers=self.HEADERS)
+        req = self.transport.get(f"{self.API_URL}/get_settings", headers=self.HEADERS)
         return req.json()
 
     @require_authentication
+    @single_flight
     def get_welcome_channel(self):
         """ (Clubhouse) -> dict
 
         Seems to be called upon sign up. Does not seem to return much data.
         """
-        req = requests.get(f"{self.API_URL}/get_welcome_channel", headers=self.HEADERS)
+        req = self.transport.get(f"{self.API_URL}/get_welcome_channel", headers=self.HEADERS)
         return req.json()
 
     @require_authentication
@@ -541,7 +618,7 @@ class Clubhouse:
             "channel": channel,
             "hide": hide
         }
-        req = requests.post(f"{self.API_URL}/hide_channel", headers=self.HEADERS, json=data)
+        req = self.transport.post(f"{self.API_URL}/hide_channel", headers=self.HEADERS, json=data)
         return req.json()
 
     @require_authentication
@@ -555,7 +632,7 @@ class Clubhouse:
             "attribution_source": attribution_source,
             "attribution_details": attribution_details, # base64_json
         }
-        req = requests.post(f"{self.API_URL}/join_channel", headers=self.HEADERS, json=data)
+        req = self.transport.post(f"{self.API_URL}/join_channel", headers=self.HEADERS, json=data)
         return req.json()
 
     @require_authentication
@@ -568,7 +645,7 @@ class Clubhouse:
             "channel": channel,
             "channel_id": None
         }
-        req = requests.post(f"{self.API_URL}/leave_channel", headers=self.HEADERS, json=data)
+        req = self.transport.post(f"{self.API_URL}/leave_channel", headers=self.HEADERS, json=data)
         return req.json()
 
     @require_authentication
@@ -582,7 +659,7 @@ class Clubhouse:
             "channel": channel,
             "channel_id": channel_id
         }
-        req = requests.post(f"{self.API_URL}/make_channel_public", headers=self.HEADERS, json=data)
+        req = self.transport.post(f"{self.API_URL}/make_channel_public", headers=self.HEADERS, json=data)
         return req.json()
 
     @require_authentication
@@ -596,7 +673,7 @@ class Clubhouse:
             "channel": channel,
             "channel_id": channel_id
         }
-        req = requests.post(f"{self.API_URL}/make_channel_social", headers=self.HEADERS, json=data)
+        req = self.transport.post(f"{self.API_URL}/make_channel_social", headers=self.HEADERS, json=data)
         return req.json()
 
     @require_authentication
@@ -609,7 +686,7 @@ class Clubhouse:
             "channel": channel,
             "channel_id": channel_id
         }
-        req = requests.post(f"{self.API_URL}/end_channel", headers=self.HEADERS, json=data)
+        req = self.transport.post(f"{self.API_URL}/end_channel", headers=self.HEADERS, json=data)
         return req.json()
 
     @require_authentication
@@ -622,7 +699,7 @@ class Clubhouse:
             "channel": channel,
             "user_id": int(user_id)
         }
-        req = requests.post(f"{self.API_URL}/make_moderator", headers=self.HEADERS, json=data)
+        req = self.transport.post(f"{self.API_URL}/make_moderator", headers=self.HEADERS, json=data)
         return req.json()
 
     @require_authentication
@@ -635,10 +712,11 @@ class Clubhouse:
             "channel": channel,
             "user_id": int(user_id)
         }
-        req = requests.post(f"{self.API_URL}/block_from_channel", headers=self.HEADERS, json=data)
+        req = self.transport.post(f"{self.API_URL}/block_from_channel", headers=self.HEADERS, json=data)
         return req.json()
 
     @require_authentication
+    @single_flight
     def get_profile(self, user_id):
         """ (Clubhouse, str) -> dict
 
@@ -647,10 +725,11 @@ class Clubhouse:
         data = {
             "user_id": int(user_id)
         }
-        req = requests.post(f"{self.API_URL}/get_profile", headers=self.HEADERS, json=data)
+        req = self.transport.post(f"{self.API_URL}/get_profile", headers=self.HEADERS, json=data)
         return req.json()
 
     @require_authentication
+    @single_flight
     def me(self, return_blocked_ids=False, timezone_identifier="Asia/Tokyo", return_following_ids=False):
         """ (Clubhouse, bool, str, bool) -> dict
 
@@ -661,10 +740,11 @@ class Clubhouse:
             "timezone_identifier": timezone_identifier,
             "return_following_ids": return_following_ids
         }
-        req = requests.post(f"{self.API_URL}/me", headers=self.HEADERS, json=data)
+        req = self.transport.post(f"{self.API_URL}/me", headers=self.HEADERS, json=data)
         return req.json()
 
     @require_authentication
+    @single_flight
     def get_following(self, user_id, page_size=50, page=1):
         """ (Clubhouse, str, int, int) -> dict
 
@@ -675,10 +755,11 @@ class Clubhouse:
             page_size,
             page
         )
-        req = requests.get(f"{self.API_URL}/get_following?{query}", headers=self.HEADERS)
+        req = self.transport.get(f"{self.API_URL}/get_following?{query}", headers=self.HEADERS)
         return req.json()
 
     @require_authentication
+    @single_flight
     def get_followers(self, user_id, page_size=50, page=1):
         """ (Clubhouse, str, int, int) -> dict
 
@@ -689,10 +770,11 @@ class Clubhouse:
             page_size,
             page
         )
-        req = requests.get(f"{self.API_URL}/get_followers?{query}", headers=self.HEADERS)
+        req = self.transport.get(f"{self.API_URL}/get_followers?{query}", headers=self.HEADERS)
         return req.json()
 
     @require_authentication
+    @single_flight
     def get_mutual_follows(self, user_id, page_size=50, page=1):
         """ (Clubhouse, str, int, int) -> dict
 
@@ -703,28 +785,31 @@ class Clubhouse:
             page_size,
             page
         )
-        req = requests.get(f"{self.API_URL}/get_mutual_follows?{query}", headers=self.HEADERS)
+        req = self.transport.get(f"{self.API_URL}/get_mutual_follows?{query}", headers=self.HEADERS)
         return req.json()
 
     @require_authentication
+    @single_flight
     def get_all_topics(self):
         """ (Clubhouse) -> dict
 
         Get list of topics, based on the server's channel selection algorithm
         """
-        req = requests.get(f"{self.API_URL}/get_all_topics", headers=self.HEADERS)
+        req = self.transport.get(f"{self.API_URL}/get_all_topics", headers=self.HEADERS)
         return req.json()
 
     @require_authentication
+    @single_flight
     def get_channels(self):
         """ (Clubhouse) -> dict
 
         Get list of channels, based on the server's channel selection algorithm
         """
-        req = requests.get(f"{self.API_URL}/get_channels", headers=self.HEADERS)
+        req = self.transport.get(f"{self.API_URL}/get_channels", headers=self.HEADERS)
         return req.json()
 
     @require_authentication
+    @single_flight
     def get_channel(self, channel, channel_id=None):
         """ (Clubhouse, str, int) -> dict
 
@@ -734,7 +819,7 @@ class Clubhouse:
             "channel": channel,
             "channel_id": channel_id
         }
-        req = requests.post(f"{self.API_URL}/get_channel", headers=self.HEADERS, json=data)
+        req = self.transport.post(f"{self.API_URL}/get_channel", headers=self.HEADERS, json=data)
         return req.json()
 
     @require_authentication
@@ -747,7 +832,7 @@ class Clubhouse:
             "channel": channel,
             "chanel_id": None
         }
-        req = requests.post(f"{self.API_URL}/active_ping", headers=self.HEADERS, json=data)
+        req = self.transport.post(f"{self.API_URL}/active_ping", headers=self.HEADERS, json=data)
         return req.json()
 
     @require_authentication
@@ -761,7 +846,7 @@ class Clubhouse:
             "raise_hands": raise_hands,
             "unraise_hands": unraise_hands
         }
-        req = requests.post(f"{self.API_URL}/audience_reply", headers=self.HEADERS, json=data)
+        req = self.transport.post(f"{self.API_URL}/audience_reply", headers=self.HEADERS, json=data)
         return req.json()
 
     @require_authentication
@@ -786,7 +871,7 @@ class Clubhouse:
             "is_enabled": is_enabled,
             "handraise_permission": handraise_permission
         }
-        req = requests.post(f"{self.API_URL}/change_handraise_settings", headers=self.HEADERS, json=data)
+        req = self.transport.post(f"{self.API_URL}/change_handraise_settings", headers=self.HEADERS, json=data)
         return req.json()
 
     @require_authentication
@@ -801,35 +886,38 @@ class Clubhouse:
         data = {
             "skintone": skintone
         }
-        req = requests.post(f"{self.API_URL}/update_skintone", headers=self.HEADERS, json=data)
+        req = self.transport.post(f"{self.API_URL}/update_skintone", headers=self.HEADERS, json=data)
         return req.json()
 
     @require_authentication
+    @single_flight
     def get_notifications(self, page_size=20, page=1):
         """ (Clubhouse, int, int) -> dict
 
         Get my notifications.
         """
         query = f"page_size={page_size}&page={page}"
-        req = requests.get(f"{self.API_URL}/get_notifications?{query}", headers=self.HEADERS)
+        req = self.transport.get(f"{self.API_URL}/get_notifications?{query}", headers=self.HEADERS)
         return req.json()
 
     @require_authentication
+    @single_flight
     def get_actionable_notifications(self):
         """ (Clubhouse, int, int) -> dict
 
         Get notifications. This may return some notifications that require some actions
         """
-        req = requests.get(f"{self.API_URL}/get_actionable_notifications", headers=self.HEADERS)
+        req = self.transport.get(f"{self.API_URL}/get_actionable_notifications", headers=self.HEADERS)
         return req.json()
 
     @require_authentication
+    @single_flight
     def get_online_friends(self):
         """ (Clubhouse) -> dict
 
         List all online friends.
         """
-        req = requests.post(f"{self.API_URL}/get_online_friends", headers=self.HEADERS, json={})
+        req = self.transport.post(f"{self.API_URL}/get_online_friends", headers=self.HEADERS, json={})
         return req.json()
 
     @require_authentication
@@ -843,7 +931,7 @@ class Clubhouse:
             "channel": channel,
             "user_id": int(user_id)
         }
-        req = requests.post(f"{self.API_URL}/accept_speaker_invite", headers=self.HEADERS, json=data)
+        req = self.transport.post(f"{self.API_URL}/accept_speaker_invite", headers=self.HEADERS, json=data)
         return req.json()
 
     @require_authentication
@@ -856,7 +944,7 @@ class Clubhouse:
             "channel": channel,
             "user_id": int(user_id)
         }
-        req = requests.post(f"{self.API_URL}/reject_speaker_invite", headers=self.HEADERS, json=data)
+        req = self.transport.post(f"{self.API_URL}/reject_speaker_invite", headers=self.HEADERS, json=data)
         return req.json()
 
     @require_authentication
@@ -869,7 +957,7 @@ class Clubhouse:
             "channel": channel,
             "user_id": int(user_id)
         }
-        req = requests.post(f"{self.API_URL}/invite_speaker", headers=self.HEADERS, json=data)
+        req = self.transport.post(f"{self.API_URL}/invite_speaker", headers=self.HEADERS, json=data)
         return req.json()
 
     @require_authentication
@@ -882,7 +970,7 @@ class Clubhouse:
             "channel": channel,
             "user_id": int(user_id)
         }
-        req = requests.post(f"{self.API_URL}/uninvite_speaker", headers=self.HEADERS, json=data)
+        req = self.transport.post(f"{self.API_URL}/uninvite_speaker", headers=self.HEADERS, json=data)
         return req.json()
 
     @require_authentication
@@ -895,10 +983,11 @@ class Clubhouse:
             "channel": channel,
             "user_id": int(user_id)
         }
-        req = requests.post(f"{self.API_URL}/mute_speaker", headers=self.HEADERS, json=data)
+        req = self.transport.post(f"{self.API_URL}/mute_speaker", headers=self.HEADERS, json=data)
         return req.json()
 
     @require_authentication
+    @single_flight
     def get_suggested_speakers(self, channel):
         """ (Clubhouse, str) -> dict
 
@@ -907,7 +996,7 @@ class Clubhouse:
         data = {
             "channel": channel
         }
-        req = requests.post(f"{self.API_URL}/get_suggested_speakers", headers=self.HEADERS, json=data)
+        req = self.transport.post(f"{self.API_URL}/get_suggested_speakers", headers=self.HEADERS, json=data)
         return req.json()
 
     @require_authentication
@@ -924,17 +1013,18 @@ class Clubhouse:
             "event_id": None,
             "topic": topic
         }
-        req = requests.post(f"{self.API_URL}/create_channel", headers=self.HEADERS, json=data)
+        req = self.transport.post(f"{self.API_URL}/create_channel", headers=self.HEADERS, json=data)
         return req.json()
 
     @require_authentication
+    @single_flight
     def get_create_channel_targets(self):
         """ (Clubhouse) -> dict
 
         Not sure what this does. Triggered upon channel creation
         """
         data = {}
-        req = requests.post(f"{self.API_URL}/get_create_channel_targets", headers=self.HEADERS, json=data)
+        req = self.transport.post(f"{self.API_URL}/get_create_channel_targets", headers=self.HEADERS, json=data)
         return req.json()
 
     @require_authentication
@@ -951,7 +1041,7 @@ class Clubhouse:
             "upload_contacts": upload_contacts,
             "contacts": contacts
         }
-        req = requests.post(f"{self.API_URL}/get_suggested_invites", headers=self.HEADERS, json=data)
+        req = self.transport.post(f"{self.API_URL}/get_suggested_invites", headers=self.HEADERS, json=data)
         return req.json()
 
     @require_authentication
@@ -967,7 +1057,7 @@ class Clubhouse:
             "upload_contacts": upload_contacts,
             "contacts": contacts
         }
-        req = requests.post(f"{self.API_URL}/get_suggested_club_invites", headers=self.HEADERS, json=data)
+        req = self.transport.post(f"{self.API_URL}/get_suggested_club_invites", headers=self.HEADERS, json=data)
         return req.json()
 
     @require_authentication
@@ -981,7 +1071,7 @@ class Clubhouse:
             "phone_number": phone_number,
             "message": message
         }
-        req = requests.post(f"{self.API_URL}/invite_to_app", headers=self.HEADERS, json=data)
+        req = self.transport.post(f"{self.API_URL}/invite_to_app", headers=self.HEADERS, json=data)
         return req.json()
 
     @require_authentication
@@ -994,10 +1084,11 @@ class Clubhouse:
         data = {
             "user_id": int(user_id),
         }
-        req = requests.post(f"{self.API_URL}/invite_from_waitlist", headers=self.HEADERS, json=data)
+        req = self.transport.post(f"{self.API_URL}/invite_from_waitlist", headers=self.HEADERS, json=data)
         return req.json()
 
     @require_authentication
+    @single_flight
     def search_users(self, query, followers_only=False, following_only=False, cofollows_only=False):
         """ (Clubhouse, str, bool, bool, bool) -> dict
 
@@ -1009,10 +1100,11 @@ class Clubhouse:
             "followers_only": followers_only,
             "query": query
         }
-        req = requests.post(f"{self.API_URL}/search_users", headers=self.HEADERS, json=data)
+        req = self.transport.post(f"{self.API_URL}/search_users", headers=self.HEADERS, json=data)
         return req.json()
 
     @require_authentication
+    @single_flight
     def search_clubs(self, query, followers_only=False, following_only=False, cofollows_only=False):
         """ (Clubhouse, str, bool, bool, bool) -> dict
 
@@ -1024,10 +1116,11 @@ class Clubhouse:
             "followers_only": followers_only,
             "query": query
         }
-        req = requests.post(f"{self.API_URL}/search_clubs", headers=self.HEADERS, json=data)
+        req = self.transport.post(f"{self.API_URL}/search_clubs", headers=self.HEADERS, json=data)
         return req.json()
 
     @require_authentication
+    @single_flight
     def get_topic(self, topic_id):
         """ (Clubhouse, int) -> dict
 
@@ -1036,10 +1129,11 @@ class Clubhouse:
         data = {
             "topic_id": int(topic_id)
         }
-        req = requests.post(f"{self.API_URL}/get_topic", headers=self.HEADERS, json=data)
+        req = self.transport.post(f"{self.API_URL}/get_topic", headers=self.HEADERS, json=data)
         return req.json()
 
     @require_authentication
+    @single_flight
     def get_clubs_for_topic(self, topic_id, page_size=25, page=1):
         """ (Clubhouse, int, int, int) -> dict
 
@@ -1050,10 +1144,11 @@ class Clubhouse:
             page_size,
             page
         )
-        req = requests.get(f"{self.API_URL}/get_clubs_for_topic?{query}", headers=self.HEADERS)
+        req = self.transport.get(f"{self.API_URL}/get_clubs_for_topic?{query}", headers=self.HEADERS)
         return req.json()
 
     @require_authentication
+    @single_flight
     def get_clubs(self, is_startable_only):
         """ (Clubhouse, bool) -> dict
 
@@ -1062,10 +1157,11 @@ class Clubhouse:
         data = {
             "is_startable_only": is_startable_only
         }
-        req = requests.post(f"{self.API_URL}/get_clubs", headers=self.HEADERS, json=data)
+        req = self.transport.post(f"{self.API_URL}/get_clubs", headers=self.HEADERS, json=data)
         return req.json()
 
     @require_authentication
+    @single_flight
     def get_users_for_topic(self, topic_id, page_size=25, page=1):
         """ (Clubhouse, int, int, int) -> dict
 
@@ -1076,7 +1172,7 @@ class Clubhouse:
             page_size,
             page
         )
-        req = requests.get(f"{self.API_URL}/get_users_for_topic?{query}", headers=self.HEADERS)
+        req = self.transport.get(f"{self.API_URL}/get_users_for_topic?{query}", headers=self.HEADERS)
         return req.json()
 
     @require_authentication
@@ -1090,7 +1186,7 @@ class Clubhouse:
             "channel": channel,
             "user_id": int(user_id)
         }
-        req = requests.post(f"{self.API_URL}/invite_to_existing_channel", headers=self.HEADERS, json=data)
+        req = self.transport.post(f"{self.API_URL}/invite_to_existing_channel", headers=self.HEADERS, json=data)
         return req.json()
 
     @require_authentication
@@ -1102,7 +1198,7 @@ class Clubhouse:
         data = {
             "username": username,
         }
-        req = requests.post(f"{self.API_URL}/update_username", headers=self.HEADERS, json=data)
+        req = self.transport.post(f"{self.API_URL}/update_username", headers=self.HEADERS, json=data)
         return req.json()
 
     @require_authentication
@@ -1116,7 +1212,7 @@ class Clubhouse:
         data = {
             "name": name,
         }
-        req = requests.post(f"{self.API_URL}/update_name", headers=self.HEADERS, json=data)
+        req = self.transport.post(f"{self.API_URL}/update_name", headers=self.HEADERS, json=data)
         return req.json()
 
     @unstable_endpoint
@@ -1134,7 +1230,7 @@ class Clubhouse:
             "twitter_token": twitter_token,
             "twitter_secret": twitter_secret
         }
-        req = requests.post(f"{self.API_URL}/update_twitter_username", headers=self.HEADERS, json=data)
+        req = self.transport.post(f"{self.API_URL}/update_twitter_username", headers=self.HEADERS, json=data)
         return req.json()
 
     @unstable_endpoint
@@ -1150,7 +1246,7 @@ class Clubhouse:
         data = {
             "code": code
         }
-        req = requests.post(f"{self.API_URL}/update_instagram_username", headers=self.HEADERS, json=data)
+        req = self.transport.post(f"{self.API_URL}/update_instagram_username", headers=self.HEADERS, json=data)
         return req.json()
 
     @require_authentication
@@ -1162,7 +1258,7 @@ class Clubhouse:
         data = {
             "name": name,
         }
-        req = requests.post(f"{self.API_URL}/update_name", headers=self.HEADERS, json=data)
+        req = self.transport.post(f"{self.API_URL}/update_name", headers=self.HEADERS, json=data)
         return req.json()
 
     @require_authentication
@@ -1174,7 +1270,7 @@ class Clubhouse:
         data = {
             "refresh": refresh_token
         }
-        req = requests.post(f"{self.API_URL}/refresh_token", headers=self.HEADERS, json=data)
+        req = self.transport.post(f"{self.API_URL}/refresh_token", headers=self.HEADERS, json=data)
         return req.json()
 
     @require_authentication
@@ -1186,7 +1282,7 @@ class Clubhouse:
         data = {
             "bio": bio
         }
-        req = requests.post(f"{self.API_URL}/update_bio", headers=self.HEADERS, json=data)
+        req = self.transport.post(f"{self.API_URL}/update_bio", headers=self.HEADERS, json=data)
         return req.json()
 
     @require_authentication
@@ -1199,7 +1295,7 @@ class Clubhouse:
         data = {
             "action_trails": action_trails
         }
-        req = requests.post(f"{self.API_URL}/update_bio", headers=self.HEADERS, json=data)
+        req = self.transport.post(f"{self.API_URL}/update_bio", headers=self.HEADERS, json=data)
         return req.json()
 
     @require_authentication
@@ -1215,7 +1311,7 @@ class Clubhouse:
             "club_id": int(club_id) if club_id else None,
             "topic_id": int(topic_id) if topic_id else None
         }
-        req = requests.post(f"{self.API_URL}/add_user_topic", headers=self.HEADERS, json=data)
+        req = self.transport.post(f"{self.API_URL}/add_user_topic", headers=self.HEADERS, json=data)
         return req.json()
 
     @require_authentication
@@ -1228,7 +1324,7 @@ class Clubhouse:
             "club_id": int(club_id) if club_id else None,
             "topic_id": int(topic_id) if topic_id else None
         }
-        req = requests.post(f"{self.API_URL}/remove_user_topic", headers=self.HEADERS, json=data)
+        req = self.transport.post(f"{self.API_URL}/remove_user_topic", headers=self.HEADERS, json=data)
         return req.json()
 
     @unstable_endpoint
@@ -1246,7 +1342,7 @@ class Clubhouse:
             "incident_description": incident_description,
             "email": email
         }
-        req = requests.post(f"{self.API_URL}/report_incident", headers=self.HEADERS, json=data)
+        req = self.transport.post(f"{self.API_URL}/report_incident", headers=self.HEADERS, json=data)
         return req.json()
 
     @unstable_endpoint
@@ -1256,7 +1352,7 @@ class Clubhouse:
 
         Unknown
         """
-        req = requests.get(f"{self.API_URL}/reject_welcome_channel", headers=self.HEADERS)
+        req = self.transport.get(f"{self.API_URL}/reject_welcome_channel", headers=self.HEADERS)
         return req.json()
 
     @unstable_endpoint
@@ -1272,7 +1368,7 @@ class Clubhouse:
             "flag_title": flag_title,
             "unflag_title": unflag_title,
         }
-        req = requests.post(f"{self.API_URL}/update_channel_flags", headers=self.HEADERS, json=data)
+        req = self.transport.post(f"{self.API_URL}/update_channel_flags", headers=self.HEADERS, json=data)
         return req.json()
 
     @unstable_endpoint
@@ -1285,7 +1381,7 @@ class Clubhouse:
         data = {
             "actionable_notification_id": actionable_notification_id
         }
-        req = requests.post(f"{self.API_URL}/ignore_actionable_notification", headers=self.HEADERS, json=data)
+        req = self.transport.post(f"{self.API_URL}/ignore_actionable_notification", headers=self.HEADERS, json=data)
         return req.json()
 
     @unstable_endpoint
@@ -1299,7 +1395,7 @@ class Clubhouse:
             "user_id": int(user_id),
             "channel": channel
         }
-        req = requests.post(f"{self.API_URL}/invite_to_new_channel", headers=self.HEADERS, json=data)
+        req = self.transport.post(f"{self.API_URL}/invite_to_new_channel", headers=self.HEADERS, json=data)
         return req.json()
 
     @unstable_endpoint
@@ -1312,7 +1408,7 @@ class Clubhouse:
         data = {
             "channel_invite_id": channel_invite_id
         }
-        req = requests.post(f"{self.API_URL}/accept_new_channel_invite", headers=self.HEADERS, json=data)
+        req = self.transport.post(f"{self.API_URL}/accept_new_channel_invite", headers=self.HEADERS, json=data)
         return req.json()
 
     @unstable_endpoint
@@ -1325,7 +1421,7 @@ class Clubhouse:
         data = {
             "channel_invite_id": channel_invite_id
         }
-        req = requests.post(f"{self.API_URL}/reject_new_channel_invite", headers=self.HEADERS, json=data)
+        req = self.transport.post(f"{self.API_URL}/reject_new_channel_invite", headers=self.HEADERS, json=data)
         return req.json()
 
     @unstable_endpoint
@@ -1338,7 +1434,7 @@ class Clubhouse:
         data = {
             "channel_invite_id": channel_invite_id
         }
-        req = requests.post(f"{self.API_URL}/cancel_new_channel_invite", headers=self.HEADERS, json=data)
+        req = self.transport.post(f"{self.API_URL}/cancel_new_channel_invite", headers=self.HEADERS, json=data)
         return req.json()
 
     @unstable_endpoint
@@ -1352,7 +1448,7 @@ class Clubhouse:
             "club_id": int(club_id),
             "user_id": int(user_id)
         }
-        req = requests.post(f"{self.API_URL}/add_club_admin", headers=self.HEADERS, json=data)
+        req = self.transport.post(f"{self.API_URL}/add_club_admin", headers=self.HEADERS, json=data)
         return req.json()
 
     @unstable_endpoint
@@ -1366,7 +1462,7 @@ class Clubhouse:
             "club_id": int(club_id) if club_id else None,
             "user_id": int(user_id)
         }
-        req = requests.post(f"{self.API_URL}/remove_club_admin", headers=self.HEADERS, json=data)
+        req = self.transport.post(f"{self.API_URL}/remove_club_admin", headers=self.HEADERS, json=data)
         return req.json()
 
     @unstable_endpoint
@@ -1380,7 +1476,7 @@ class Clubhouse:
             "club_id": int(club_id) if club_id else None,
             "user_id": int(user_id)
         }
-        req = requests.post(f"{self.API_URL}/remove_club_member", headers=self.HEADERS, json=data)
+        req = self.transport.post(f"{self.API_URL}/remove_club_member", headers=self.HEADERS, json=data)
         return req.json()
 
     @unstable_endpoint
@@ -1394,7 +1490,7 @@ class Clubhouse:
             "club_id": int(club_id) if club_id else None,
             "source_topic_id": source_topic_id
         }
-        req = requests.post(f"{self.API_URL}/accept_club_member_invite", headers=self.HEADERS, json=data)
+        req = self.transport.post(f"{self.API_URL}/accept_club_member_invite", headers=self.HEADERS, json=data)
         return req.json()
 
     @unstable_endpoint
@@ -1412,7 +1508,7 @@ class Clubhouse:
             "message": message,
             "reason": reason
         }
-        req = requests.post(f"{self.API_URL}/add_club_member", headers=self.HEADERS, json=data)
+        req = self.transport.post(f"{self.API_URL}/add_club_member", headers=self.HEADERS, json=data)
         return req.json()
 
     @unstable_endpoint
@@ -1426,7 +1522,7 @@ class Clubhouse:
             "club_id": int(club_id),
             "source_topic_id": source_topic_id
         }
-        req = requests.post(f"{self.API_URL}/get_club_nominations", headers=self.HEADERS, json=data)
+        req = self.transport.post(f"{self.API_URL}/get_club_nominations", headers=self.HEADERS, json=data)
         return req.json()
 
     @unstable_endpoint
@@ -1441,7 +1537,7 @@ class Clubhouse:
             "source_topic_id": source_topic_id,
             "invite_nomination_id": invite_nomination_id
         }
-        req = requests.post(f"{self.API_URL}/approve_club_nomination", headers=self.HEADERS, json=data)
+        req = self.transport.post(f"{self.API_URL}/approve_club_nomination", headers=self.HEADERS, json=data)
         return req.json()
 
     @unstable_endpoint
@@ -1456,7 +1552,7 @@ class Clubhouse:
             "source_topic_id": source_topic_id,
             "invite_nomination_id": invite_nomination_id
         }
-        req = requests.post(f"{self.API_URL}/approve_club_nomination", headers=self.HEADERS, json=data)
+        req = self.transport.post(f"{self.API_URL}/approve_club_nomination", headers=self.HEADERS, json=data)
         return req.json()
 
     @unstable_endpoint
@@ -1470,7 +1566,7 @@ class Clubhouse:
             "club_id": int(club_id),
             "topic_id": int(topic_id)
         }
-        req = requests.post(f"{self.API_URL}/add_club_topic", headers=self.HEADERS, json=data)
+        req = self.transport.post(f"{self.API_URL}/add_club_topic", headers=self.HEADERS, json=data)
         return req.json()
 
     @unstable_endpoint
@@ -1484,7 +1580,7 @@ class Clubhouse:
             "club_id": int(club_id),
             "topic_id": int(topic_id)
         }
-        req = requests.post(f"{self.API_URL}/remove_club_topic", headers=self.HEADERS, json=data)
+        req = self.transport.post(f"{self.API_URL}/remove_club_topic", headers=self.HEADERS, json=data)
         return req.json()
 
     @unstable_endpoint
@@ -1494,7 +1590,7 @@ class Clubhouse:
 
         Get events to start
         """
-        req = requests.get(f"{self.API_URL}/get_events_to_start", headers=self.HEADERS)
+        req = self.transport.get(f"{self.API_URL}/get_events_to_start", headers=self.HEADERS)
         return req.json()
 
     @unstable_endpoint
@@ -1508,7 +1604,7 @@ class Clubhouse:
             "club_id": int(club_id),
             "is_follow_allowed": is_follow_allowed
         }
-        req = requests.post(f"{self.API_URL}/update_is_follow_allowed", headers=self.HEADERS, json=data)
+        req = self.transport.post(f"{self.API_URL}/update_is_follow_allowed", headers=self.HEADERS, json=data)
         return req.json()
 
     @unstable_endpoint
@@ -1522,7 +1618,7 @@ class Clubhouse:
             "club_id": int(club_id),
             "is_membership_private": is_membership_private
         }
-        req = requests.post(f"{self.API_URL}/update_is_membership_private", headers=self.HEADERS, json=data)
+        req = self.transport.post(f"{self.API_URL}/update_is_membership_private", headers=self.HEADERS, json=data)
         return req.json()
 
     @unstable_endpoint
@@ -1536,7 +1632,7 @@ class Clubhouse:
             "club_id": int(club_id),
             "is_community": is_community
         }
-        req = requests.post(f"{self.API_URL}/update_is_community", headers=self.HEADERS, json=data)
+        req = self.transport.post(f"{self.API_URL}/update_is_community", headers=self.HEADERS, json=data)
         return req.json()
 
     @unstable_endpoint
@@ -1550,7 +1646,7 @@ class Clubhouse:
             "club_id": int(club_id),
             "description": description
         }
-        req = requests.post(f"{self.API_URL}/update_club_description", headers=self.HEADERS, json=data)
+        req = self.transport.post(f"{self.API_URL}/update_club_description", headers=self.HEADERS, json=data)
         return req.json()
 
     @unstable_endpoint
@@ -1573,9 +1669,15 @@ class Clubhouse:
 
     @unstable_endpoint
     @require_authentication
-    def get_events_for_user(self):
-        """ (Clubhouse) -> dict
+    def get_events_for_user(self, user_id=None, page_size=25, page=1):
+        """ (Clubhouse, str, int, int) -> dict
 
-        Not implemented method
+        Get upcoming events hosted by the given user (default: yourself).
         """
-        raise NotImplementedError("Not Implemented!")
+        query = "user_id={}&page_size={}&page={}".format(
+            user_id or self.HEADERS.get("CH-UserID"),
+            page_size,
+            page
+        )
+        req = self.transport.get(f"{self.API_URL}/get_events_for_user?{query}", headers=self.HEADERS)
+        return req.json()
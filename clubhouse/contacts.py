@@ -0,0 +1,216 @@
+"""
+contacts.py
+
+Contact upload for large address books.
+
+Phone numbers are normalised and deduplicated, split into bounded chunks and uploaded
+concurrently to one of the suggestion endpoints. Suggestions from every chunk are merged
+into a single result. A hash of every uploaded number is kept on disk so the next sync
+only uploads contacts that were not sent before. The hash is an HMAC keyed with a random
+per-install secret (kept next to the state file), so the state file cannot be turned back
+into phone numbers by hashing every possible number.
+"""
+
+import os
+import re
+import hmac
+import hashlib
+import secrets
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from .ratelimit import DEFAULT_LIMITER
+from .utils import atomic_write, atomic_write_json, read_json
+
+# Endpoints accepting a `contacts` list.
+ENDPOINTS = (
+    "get_suggested_invites",
+    "get_suggested_club_invites",
+    "get_suggested_follows_friends_only",
+)
+
+# Bumped when the stored hashes change; older state is dropped.
+STATE_VERSION = 2
+
+def normalize_phone_number(phone_number, country_code=None):
+    """ (str, str) -> str
+
+    Normalise a phone number to +<digits>.
+    Numbers without an international prefix get country_code (e.g. "+81"),
+    dropping the national trunk prefix "0". return None for unusable numbers.
+
+    >>> normalize_phone_number("090-1234-5678", "+81")
+    '+819012345678'
+    """
+    if not phone_number:
+        return None
+    number = str(phone_number).strip()
+    if number.startswith("00"):
+        number = "+" + number[2:]
+    digits = re.sub(r"\D", "", number)
+    if not number.startswith("+"):
+        if not country_code:
+            return None
+        digits = re.sub(r"\D", "", country_code) + digits.lstrip("0")
+    if not 7 <= len(digits) <= 15:
+        return None
+    return "+" + digits
+
+def load_secret(filename):
+    """ (str) -> bytes
+
+    Read the per-install key, creating it (readable by the owner only) on first use.
+    """
+    try:
+        with open(filename, "rb") as key_file:
+            secret = key_file.read()
+        if len(secret) >= 32:
+            return secret
+    except OSError:
+        pass
+    secret = secrets.token_bytes(32)
+    atomic_write(filename, secret, "wb")
+    return secret
+
+def _hash_number(phone_number, secret):
+    """ (str, bytes) -> str """
+    return hmac.new(secret, phone_number.encode("utf-8"), hashlib.sha256).hexdigest()[:32]
+
+class ContactSync:
+    """
+    ContactSync Class
+
+    >>> sync = ContactSync(clubhouse, country_code="+81")
+    >>> sync.sync([{"name": "Test Name", "phone_number": "090-4321-9876"}, ...])
+    {'suggested_invites': [...], ...}
+    """
+
+    def __init__(self, client, state_filename="contacts_sync.json", chunk_size=500,
+                 max_workers=4, country_code=None, rate_limiter=None, secret_filename=None):
+        """ (ContactSync, Clubhouse, str, int, int, str, RateLimiter, str) -> NoneType
+        Set the client, the state file and the upload parameters
+        secret_filename: the per-install hash key (default: the state file name with .key)
+        """
+        self.client = client
+        self.state_filename = state_filename
+        self.chunk_size = chunk_size
+        self.max_workers = max_workers
+        self.country_code = country_code
+        self.rate_limiter = rate_limiter or DEFAULT_LIMITER
+        self._lock = threading.Lock()
+        self._secret = load_secret(secret_filename or os.path.splitext(state_filename)[0] + ".key")
+        self._state = read_json(state_filename, {})
+        if self._state.get("version") != STATE_VERSION:
+            # Unkeyed hashes from an older version: upload everything once more
+            self._state = {"version": STATE_VERSION}
+
+    def prepare(self, contacts):
+        """ (ContactSync, list of dict) -> list of dict
+
+        Normalise and dedupe contacts, keeping the first name seen for each number.
+        """
+        seen = {}
+        for contact in contacts:
+            number = normalize_phone_number(contact.get("phone_number"), self.country_code)
+            if number and number not in seen:
+                seen[number] = {"name": contact.get("name") or "", "phone_number": number}
+        return list(seen.values())
+
+    def pending(self, contacts, endpoint="get_suggested_invites", club_id=None):
+        """ (ContactSync, list of dict, str, int) -> list of dict
+
+        Prepared contacts that have not been uploaded to this endpoint yet.
+        """
+        uploaded = self._state.get(self._state_key(endpoint, club_id), {})
+        return [c for c in self.prepare(contacts) if _hash_number(c["phone_number"], self._secret) not in uploaded]
+
+    @staticmethod
+    def _state_key(endpoint, club_id):
+        """ (str, int) -> str """
+        return f"{endpoint}:{club_id or ''}"
+
+    def _upload(self, endpoint, club_id, chunk):
+        """ (ContactSync, str, int, list of dict) -> dict
+
+        Upload one chunk.
+        """
+        self.rate_limiter.acquire()
+        method = getattr(self.client, endpoint)
+        if endpoint == "get_suggested_club_invites":
+            return method(upload_contacts=True, contacts=chunk)
+        return method(club_id=club_id, upload_contacts=True, contacts=chunk)
+
+    def _mark_uploaded(self, key, chunk):
+        """ (ContactSync, str, list of dict) -> NoneType
+
+        Remember the numbers of a successful chunk and save the state.
+        """
+        with self._lock:
+            uploaded = self._state.setdefault(key, {})
+            for contact in chunk:
+                uploaded[_hash_number(contact["phone_number"], self._secret)] = 1
+            atomic_write_json(self.state_filename, self._state)
+
+    @staticmethod
+    def _merge(merged, result):
+        """ (dict, dict) -> NoneType
+
+        Merge every list in result into merged, deduplicating by user_id / phone_number.
+        """
+        for name, items in result.items():
+            if not isinstance(items, list):
+                continue
+            bucket = merged.setdefault(name, {})
+            for item in items:
+                if isinstance(item, dict):
+                    key = item.get("user_id") or item.get("phone_number") or repr(sorted(item.items()))
+                else:
+                    key = item
+                bucket.setdefault(key, item)
+
+    def sync(self, contacts, endpoint="get_suggested_invites", club_id=None):
+        """ (ContactSync, list of dict, str, int) -> dict
+
+        Upload every contact not uploaded before and return the merged suggestions.
+        The result also has `uploaded` and `failed` counters; failed chunks are retried
+        on the next sync.
+        """
+        if endpoint not in ENDPOINTS:
+            raise Exception(f"Endpoint does not take contacts: {endpoint}")
+        key = self._state_key(endpoint, club_id)
+        pending = self.pending(contacts, endpoint, club_id)
+        chunks = [pending[i:i + self.chunk_size] for i in range(0, len(pending), self.chunk_size)]
+
+        merged = {}
+        uploaded = failed = 0
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {executor.submit(self._upload, endpoint, club_id, chunk): chunk for chunk in chunks}
+            for future in as_completed(futures):
+                chunk = futures[future]
+                try:
+                    result = future.result()
+                except Exception:
+                    failed += len(chunk)
+                    continue
+                if not result.get("success"):
+                    failed += len(chunk)
+                    continue
+                self._mark_uploaded(key, chunk)
+                self._merge(merged, result)
+                uploaded += len(chunk)
+
+        output = {name: list(items.values()) for name, items in merged.items()}
+        output.update({"success": failed == 0, "uploaded": uploaded, "failed": failed})
+        return output
+
+    def reset(self, endpoint=None, club_id=None):
+        """ (ContactSync, str, int) -> NoneType
+
+        Forget what was uploaded (for one endpoint, or everything) so the next sync sends all.
+        """
+        with self._lock:
+            if endpoint:
+                self._state.pop(self._state_key(endpoint, club_id), None)
+            else:
+                self._state = {"version": STATE_VERSION}
+            atomic_write_json(self.state_filename, self._state)
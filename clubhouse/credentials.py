@@ -0,0 +1,136 @@
+"""
+credentials.py
+
+Keep a session's token fresh.
+
+CredentialManager stands in for the Clubhouse client. Before every call it checks the
+token's age and refreshes it shortly before it expires; when several threads notice at
+the same time, only one of them calls refresh_token and the others wait for it. Calls
+that fail authentication because they raced with a refresh (or because the token
+expired early) are retried once with the new token. New tokens are handed to
+`on_refresh` so they can be saved.
+
+    >>> client = CredentialManager(clubhouse, refresh_token, on_refresh=save_tokens)
+    >>> client.get_channels()    # refreshes first if the token is about to expire
+"""
+
+import json
+import time
+import base64
+import functools
+import threading
+
+def token_expiry(token):
+    """ (str) -> float
+
+    Expiry time of a JWT (its "exp" claim). return None if the token is not a JWT
+    """
+    try:
+        payload = token.split(".")[1]
+        payload += "=" * (-len(payload) % 4)
+        return float(json.loads(base64.urlsafe_b64decode(payload))["exp"])
+    except (AttributeError, IndexError, KeyError, TypeError, ValueError):
+        return None
+
+def is_auth_error(result):
+    """ (dict) -> bool
+
+    True if the response says the credentials were refused.
+    """
+    if not isinstance(result, dict) or result.get("success"):
+        return False
+    message = str(result.get("detail") or result.get("error_message") or "").lower()
+    return "token" in message or "authenticat" in message or "credentials" in message
+
+class CredentialManager:
+    """
+    CredentialManager Class
+
+    Exposes every Clubhouse method; the calls go through the token checks.
+    """
+
+    def __init__(self, client, refresh_token, access_token=None, max_age=None, margin=300, on_refresh=None):
+        """ (CredentialManager, Clubhouse, str, str, float, float, callable) -> NoneType
+        access_token: the token in use (default: the one in the client's Authorization header)
+        max_age: token lifetime in seconds when it is not a JWT (None: only refresh on failure)
+        margin: refresh this many seconds before the expiry
+        on_refresh: called with (access_token, refresh_token) after every refresh
+        """
+        self.client = client
+        self._refresh_token = refresh_token
+        self.access_token = access_token or client.HEADERS.get("Authorization", "").replace("Token ", "", 1)
+        self.max_age = max_age
+        self.margin = margin
+        self.on_refresh = on_refresh
+        self.generation = 0
+        self.expires_at = self._expiry(self.access_token)
+        self._lock = threading.Lock()
+        self.stats = {"refreshed": 0, "failed": 0, "retried": 0}
+
+    def _expiry(self, token):
+        expiry = token_expiry(token)
+        if expiry is None and self.max_age:
+            expiry = time.time() + self.max_age
+        return expiry
+
+    def __getattr__(self, name):
+        """ Wrap the client's methods; other attributes are passed through. """
+        attr = getattr(self.client, name)
+        if not callable(attr) or name.startswith("_"):
+            return attr
+
+        @functools.wraps(attr)
+        def call(*args, **kwargs):
+            self.ensure_fresh()
+            generation = self.generation
+            result = attr(*args, **kwargs)
+            if is_auth_error(result) and self.refresh(generation):
+                with self._lock:
+                    self.stats["retried"] += 1
+                result = attr(*args, **kwargs)
+            return result
+        return call
+
+    def needs_refresh(self, now=None):
+        """ (CredentialManager, float) -> bool """
+        now = time.time() if now is None else now
+        return self.expires_at is not None and now >= self.expires_at - self.margin
+
+    def ensure_fresh(self):
+        """ (CredentialManager) -> NoneType
+
+        Refresh proactively if the token is close to its expiry.
+        """
+        if self.needs_refresh():
+            self.refresh(self.generation)
+
+    def refresh(self, generation=None):
+        """ (CredentialManager, int) -> bool
+
+        Refresh the token once. `generation` is the token generation the caller saw:
+        if it was already replaced meanwhile, nothing is sent.
+        return True if a newer token than `generation` is in use
+        """
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return True
+            try:
+                result = self.client.refresh_token(self._refresh_token)
+            except Exception:
+                result = {}
+            access = result.get("access") or result.get("access_token") or result.get("auth_token")
+            if not access:
+                self.stats["failed"] += 1
+                # Do not hammer the server before the next expiry check.
+                if self.expires_at is not None:
+                    self.expires_at = time.time() + self.margin + 60
+                return False
+            self.access_token = access
+            self._refresh_token = result.get("refresh") or result.get("refresh_token") or self._refresh_token
+            self.client.HEADERS["Authorization"] = f"Token {access}"
+            self.expires_at = self._expiry(access)
+            self.generation += 1
+            self.stats["refreshed"] += 1
+            if self.on_refresh:
+                self.on_refresh(self.access_token, self._refresh_token)
+            return True
@@ -0,0 +1,308 @@
+"""
+events.py
+
+Room activity as a stream of JSON lines, for tools that want to follow a room
+without scraping the terminal.
+
+Every event is one line:
+    {"seq": 12, "t": 1616271523.1, "event": "join", "channel": "MR35Dy96", "user_id": 1234, ...}
+
+    join            user_id, username, name, is_speaker, is_moderator
+    leave           user_id
+    role_change     user_id, fields (the role fields that changed, see roster.ROLE_FIELDS)
+    hand_raise      user_id, raised (True / False)
+    room_end
+    ping            success
+    error           where, message
+
+Events go to a sink: stdout ("-"), a file, or a local socket ("tcp:host:port",
+"unix:path"). They are queued in a bounded buffer and written by one background
+thread, so a slow reader never holds up the room. When the buffer is full, the
+"drop" policy throws the new event away (a gap in `seq` shows it) and the "block"
+policy waits for room.
+
+    >>> stream = EventStream(open_sink("tcp:127.0.0.1:9000"), maxsize=1000, policy="drop")
+    >>> RoomEvents(stream).watch(room_watcher)      # watcher.RoomWatcher
+"""
+
+import sys
+import json
+import time
+import queue
+import socket
+import threading
+
+from .roster import roster_of, diff_rosters
+
+POLICIES = ("drop", "block")
+
+class Sink:
+    """
+    Sink Class
+
+    Where the lines go. write() raises OSError when they could not be written.
+    """
+
+    def write(self, data):
+        """ (Sink, str) -> NoneType """
+        raise NotImplementedError
+
+    def close(self):
+        """ (Sink) -> NoneType """
+
+class StreamSink(Sink):
+    """ An open text stream (stdout by default), flushed after every batch. """
+
+    def __init__(self, stream=None):
+        """ (StreamSink, file) -> NoneType """
+        self.stream = stream or sys.stdout
+
+    def write(self, data):
+        self.stream.write(data)
+        self.stream.flush()
+
+class FileSink(Sink):
+    """ Appends to a file. """
+
+    def __init__(self, filename):
+        """ (FileSink, str) -> NoneType """
+        self.filename = filename
+        self._file = open(filename, "a", encoding="utf-8")
+
+    def write(self, data):
+        self._file.write(data)
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+class SocketSink(Sink):
+    """
+    A TCP or Unix socket the reader listens on.
+
+    The connection is opened on the first write and opened again after it broke,
+    at most once every `retry` seconds. Lines written while it is down are lost.
+    """
+
+    def __init__(self, address, family=socket.AF_INET, retry=1.0):
+        """ (SocketSink, tuple or str, int, float) -> NoneType """
+        self.address = address
+        self.family = family
+        self.retry = retry
+        self._socket = None
+        self._retry_at = 0.0
+
+    def _connect(self):
+        if time.monotonic() < self._retry_at:
+            raise ConnectionError(f"not connected to {self.address}")
+        sock = socket.socket(self.family, socket.SOCK_STREAM)
+        try:
+            sock.connect(self.address)
+        except OSError:
+            sock.close()
+            self._retry_at = time.monotonic() + self.retry
+            raise
+        self._socket = sock
+
+    def write(self, data):
+        if self._socket is None:
+            self._connect()
+        try:
+            self._socket.sendall(data.encode("utf-8"))
+        except OSError:
+            self.close()
+            self._retry_at = time.monotonic() + self.retry
+            raise
+
+    def close(self):
+        if self._socket:
+            self._socket.close()
+            self._socket = None
+
+def open_sink(spec="-"):
+    """ (str) -> Sink
+
+    Build a sink from "-" (stdout), "tcp:host:port", "unix:path", or a file name
+    (optionally "file:path").
+    """
+    if spec in ("-", "stdout"):
+        return StreamSink()
+    kind, _, target = spec.partition(":")
+    if kind == "tcp":
+        host, _, port = target.rpartition(":")
+        if not host or not port.isdigit():
+            raise ValueError(f"Bad TCP address: {target} (expected host:port)")
+        return SocketSink((host, int(port)))
+    if kind == "unix":
+        return SocketSink(target, socket.AF_UNIX)
+    if kind == "file":
+        return FileSink(target)
+    return FileSink(spec)
+
+class EventStream:
+    """
+    EventStream Class
+
+    Bounded queue of events in front of a sink. emit() is safe to call from any thread.
+    """
+
+    def __init__(self, sink, maxsize=1000, policy="drop", block_timeout=None, batch=256):
+        """ (EventStream, Sink, int, str, float, int) -> NoneType
+        maxsize: events buffered before the policy applies
+        policy: "drop" (discard new events while full) or "block" (wait for room)
+        block_timeout: with "block", longest wait before the event is dropped (None: forever)
+        batch: most events written at once
+        """
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown backpressure policy: {policy} (choose from {', '.join(POLICIES)})")
+        self.sink = sink
+        self.policy = policy
+        self.block_timeout = block_timeout
+        self.batch = batch
+        self.stats = {"emitted": 0, "written": 0, "dropped": 0, "lost": 0, "errors": 0}
+        self._queue = queue.Queue(maxsize)
+        self._seq = 0
+        self._lock = threading.Lock()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="event-stream")
+        self._thread.daemon = True
+        self._thread.start()
+
+    def emit(self, event, **fields):
+        """ (EventStream, str, ...) -> bool
+
+        Queue an event. return False if it was dropped
+        """
+        with self._lock:
+            if self._closed:
+                return False
+            self._seq += 1
+            self.stats["emitted"] += 1
+            record = {"seq": self._seq, "t": time.time(), "event": event}
+            record.update(fields)
+        line = json.dumps(record, separators=(",", ":"), ensure_ascii=False, default=str)
+        try:
+            if self.policy == "block":
+                self._queue.put(line, timeout=self.block_timeout)
+            else:
+                self._queue.put_nowait(line)
+        except queue.Full:
+            with self._lock:
+                self.stats["dropped"] += 1
+            return False
+        return True
+
+    def error(self, where, error):
+        """ (EventStream, str, object) -> bool
+
+        Emit an "error" event.
+        """
+        return self.emit("error", where=where, message=str(error))
+
+    def _run(self):
+        while True:
+            lines = [self._queue.get()]
+            while len(lines) < self.batch:
+                try:
+                    lines.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            done = None in lines
+            lines = [line for line in lines if line is not None]
+            if lines:
+                try:
+                    self.sink.write("\n".join(lines) + "\n")
+                    self.stats["written"] += len(lines)
+                except (OSError, ValueError):
+                    self.stats["errors"] += 1
+                    self.stats["lost"] += len(lines)
+            if done:
+                break
+
+    def close(self, timeout=5):
+        """ (EventStream, float) -> NoneType
+
+        Write what is still buffered (waiting up to `timeout` seconds) and close the sink.
+        """
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        try:
+            self._queue.put(None, timeout=timeout)
+        except queue.Full:
+            pass
+        self._thread.join(timeout)
+        self.sink.close()
+
+class RoomEvents:
+    """
+    RoomEvents Class
+
+    Turns room snapshots into events: only what changed since the previous snapshot
+    is emitted, and the first snapshot emits a join for everyone already there.
+    """
+
+    def __init__(self, stream):
+        """ (RoomEvents, EventStream) -> NoneType """
+        self.stream = stream
+        self._rosters = {}
+        self._lock = threading.Lock()
+        self._watchers = []
+
+    def update(self, channel, channel_info):
+        """ (RoomEvents, str, dict) -> bool
+
+        Emit the events between the previous snapshot and this one.
+        return False once the room has ended
+        """
+        emit = self.stream.emit
+        with self._lock:
+            previous = self._rosters.get(channel)
+            if not channel_info.get("success"):
+                if previous is not None:
+                    emit("room_end", channel=channel)
+                    self._rosters[channel] = None
+                return False
+            roster = roster_of(channel_info.get("users"))
+            diff = diff_rosters(previous or {}, roster)
+            self._rosters[channel] = roster
+
+        for user_id, entry in diff["joined"].items():
+            emit("join", channel=channel, user_id=user_id, username=entry.get("username"),
+                 name=entry.get("name"), is_speaker=bool(entry.get("is_speaker")),
+                 is_moderator=bool(entry.get("is_moderator")))
+            if entry.get("raise_hands"):
+                emit("hand_raise", channel=channel, user_id=user_id, raised=True)
+        for user_id in diff["left"]:
+            emit("leave", channel=channel, user_id=user_id)
+        for user_id, fields in diff["changed"].items():
+            fields = dict(fields)
+            if "raise_hands" in fields:
+                emit("hand_raise", channel=channel, user_id=user_id, raised=bool(fields.pop("raise_hands")))
+            if fields:
+                emit("role_change", channel=channel, user_id=user_id, fields=fields)
+        return True
+
+    def _on_snapshot(self, channel, channel_info, diff, now):
+        self.update(channel, channel_info)
+
+    def _on_error(self, channel, error):
+        self.stream.error("get_channel", error)
+
+    def watch(self, watcher):
+        """ (RoomEvents, RoomWatcher) -> NoneType
+
+        Emit the events of every snapshot the watcher takes, and its errors.
+        The watcher's last snapshot, if any, is used right away.
+        """
+        watcher.subscribe(self._on_snapshot, self._on_error)
+        self._watchers.append(watcher)
+        if watcher.channel_info is not None:
+            self.update(watcher.channel, watcher.channel_info)
+
+    def stop(self):
+        """ (RoomEvents) -> NoneType """
+        for watcher in self._watchers:
+            watcher.unsubscribe(self._on_snapshot, self._on_error)
+        self._watchers = []
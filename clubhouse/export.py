@@ -0,0 +1,133 @@
+"""
+export.py
+
+Streaming export of club members / followers.
+
+Pages are appended to `<filename>.part` as soon as they arrive and a cursor is kept in
+`<filename>.cursor`. An interrupted export continues from the last complete page,
+and the final file only appears (atomically renamed) once the club has been fully read.
+"""
+
+import os
+import csv
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+from .ratelimit import DEFAULT_LIMITER
+from .utils import atomic_write_json, read_json
+
+CSV_FIELDS = [
+    "user_id",
+    "username",
+    "name",
+    "bio",
+    "photo_url",
+    "is_admin",
+    "is_member",
+    "is_follower",
+]
+
+def _write_rows(part_file, users, file_format):
+    """ (file, list of dict, str) -> NoneType
+
+    Append one page of users to the part file.
+    """
+    if file_format == "csv":
+        writer = csv.DictWriter(part_file, fieldnames=CSV_FIELDS, extrasaction="ignore")
+        writer.writerows(users)
+    else:
+        for user in users:
+            part_file.write(json.dumps(user, ensure_ascii=False) + "\n")
+
+def export_club_members(client, club_id, filename, file_format="jsonl", return_followers=False,
+                        return_members=True, page_size=50, rate_limiter=None):
+    """ (Clubhouse, int, str, str, bool, bool, int, RateLimiter) -> int
+
+    Export members of the given club_id into filename, page by page.
+    file_format is either "jsonl" or "csv". return number of exported users.
+
+    >>> export_club_members(clubhouse, 1234, "club_1234.jsonl")
+    4821
+    """
+    if file_format not in ("jsonl", "csv"):
+        raise Exception(f"Unknown export format: {file_format}")
+    limiter = rate_limiter or DEFAULT_LIMITER
+    part_name = f"{filename}.part"
+    cursor_name = f"{filename}.cursor"
+    params = {
+        "club_id": int(club_id),
+        "format": file_format,
+        "return_followers": bool(return_followers),
+        "return_members": bool(return_members),
+    }
+
+    # Resume from the cursor only if it was written for the same export.
+    cursor = read_json(cursor_name)
+    if not (cursor and cursor.get("params") == params and os.path.exists(part_name)):
+        cursor = {"params": params, "page": 1, "offset": 0, "count": 0}
+        with open(part_name, "w", newline="", encoding="utf-8") as part_file:
+            if file_format == "csv":
+                csv.DictWriter(part_file, fieldnames=CSV_FIELDS).writeheader()
+            cursor["offset"] = part_file.tell()
+        atomic_write_json(cursor_name, cursor)
+
+    with open(part_name, "r+", newline="", encoding="utf-8") as part_file:
+        # Drop anything written after the last saved cursor (half-written page).
+        part_file.truncate(cursor["offset"])
+        part_file.seek(cursor["offset"])
+        page = cursor["page"]
+        while page:
+            limiter.acquire()
+            result = client.get_club_members(
+                club_id,
+                return_followers=return_followers,
+                return_members=return_members,
+                page_size=page_size,
+                page=page
+            )
+            if not result.get("success"):
+                raise Exception(f"Failed to fetch members of club {club_id} (page {page}): {result}")
+            users = result.get("users") or []
+            _write_rows(part_file, users, file_format)
+            part_file.flush()
+            os.fsync(part_file.fileno())
+
+            page = result.get("next") if users else None
+            cursor["page"] = page
+            cursor["offset"] = part_file.tell()
+            cursor["count"] += len(users)
+            atomic_write_json(cursor_name, cursor)
+
+    os.replace(part_name, filename)
+    os.remove(cursor_name)
+    return cursor["count"]
+
+def export_clubs(client, club_ids, directory=".", file_format="jsonl", max_workers=4,
+                 rate_limiter=None, **kwargs):
+    """ (Clubhouse, list of int, str, str, int, RateLimiter) -> dict
+
+    Export several clubs concurrently. All workers share one rate limiter.
+    return {club_id: number of users or the exception raised}
+    """
+    limiter = rate_limiter or DEFAULT_LIMITER
+    os.makedirs(directory, exist_ok=True)
+    results = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            club_id: executor.submit(
+                export_club_members,
+                client,
+                club_id,
+                os.path.join(directory, f"club_{club_id}.{file_format}"),
+                file_format=file_format,
+                rate_limiter=limiter,
+                **kwargs
+            )
+            for club_id in club_ids
+        }
+        for club_id, future in futures.items():
+            try:
+                results[club_id] = future.result()
+            except Exception as error:
+                results[club_id] = error
+    return results
@@ -0,0 +1,209 @@
+"""
+inbox.py
+
+Local notification inbox.
+
+`get_notifications` is paged newest first. The inbox keeps the highest notification_id
+it has delivered (the watermark) and stops paging as soon as a page reaches it, so a
+sync usually costs a single request. Actionable notifications are merged into the same
+ordered store.
+
+Every page is stored and the watermark moved only once that page has been delivered.
+When paging stops early (max_pages, an error, or a stream consumer that stopped), the
+pages below are kept as a backfill cursor and read by the next syncs, so older unread
+notifications are never skipped. The backfill ends at the old watermark, or, on the
+very first sync, at the first page without unread notifications.
+"""
+
+import threading
+
+from .utils import atomic_write_json, read_json
+from .transport import TRANSPORT_ERRORS
+
+class NotificationInbox:
+    """
+    NotificationInbox Class
+
+    Every stored item gets a `kind` ("notification" or "actionable") and an `id`.
+
+    >>> inbox = NotificationInbox(clubhouse)
+    >>> for item in inbox.stream(60):
+    ...     print(item['kind'], item['message'])
+    """
+
+    def __init__(self, client, filename="notifications.json", max_items=1000, page_size=20):
+        """ (NotificationInbox, Clubhouse, str, int, int) -> NoneType
+        Set the client and load the saved inbox
+        """
+        self.client = client
+        self.filename = filename
+        self.max_items = max_items
+        self.page_size = page_size
+        self._lock = threading.Lock()
+        saved = read_json(filename, {})
+        self.watermark = saved.get("watermark", 0)
+        # {"page": next page to read, "below": lowest id read, "until": where to stop}
+        self.backfill = saved.get("backfill")
+        self.items = saved.get("items", [])
+        self._actionable_ids = set(saved.get("actionable_ids", []))
+
+    @staticmethod
+    def _sort_key(item):
+        """ (dict) -> tuple """
+        return (item.get("time_created") or "", item["id"])
+
+    def _get_page(self, page):
+        """ (NotificationInbox, int) -> dict """
+        result = self.client.get_notifications(page_size=self.page_size, page=page)
+        if not result.get("success", True):
+            raise Exception(f"Failed to fetch notifications (page {page}): {result}")
+        return result
+
+    def _pages(self, max_pages=None):
+        """ (NotificationInbox, int) -> generator of (list of dict, dict)
+
+        Pages of notifications not delivered yet, each with the state to save once it
+        has been delivered: {"watermark": int, "backfill": dict}.
+        On the very first sync only max_pages (default: 1) pages are read.
+        """
+        pages = 0
+        stored = {item["id"] for item in self.items if item["kind"] == "notification"}
+        # The state saved by the caller after each page must not move our stop points.
+        old_watermark = watermark = self.watermark
+        old_backfill = backfill = self.backfill
+        first_sync = not old_watermark and not old_backfill
+        if first_sync and max_pages is None:
+            max_pages = 1
+        unread_only = first_sync or bool(old_backfill and old_backfill["unread_only"])
+
+        # New notifications, from the top down to the watermark.
+        page = 1
+        while page and (max_pages is None or pages < max_pages):
+            result = self._get_page(page)
+            pages += 1
+            notifications = result.get("notifications") or []
+            new_items = [
+                dict(notification, kind="notification", id=int(notification["notification_id"]))
+                for notification in notifications
+                if int(notification["notification_id"]) > old_watermark
+            ]
+            page = result.get("next") if new_items and len(new_items) == len(notifications) else None
+            if new_items:
+                watermark = max([watermark] + [item["id"] for item in new_items])
+            if page:
+                # Everything between this page and the old watermark is still to read.
+                # A pending backfill lies below that and is covered on the way down.
+                backfill = {
+                    "page": page,
+                    "below": min(item["id"] for item in new_items),
+                    "until": old_backfill["until"] if old_backfill else old_watermark,
+                    "unread_only": unread_only,
+                }
+            else:
+                backfill = old_backfill
+            yield new_items, {"watermark": watermark, "backfill": backfill}
+
+        # Older pages left by an earlier sync.
+        while backfill and (max_pages is None or pages < max_pages):
+            result = self._get_page(backfill["page"])
+            pages += 1
+            notifications = result.get("notifications") or []
+            new_items = []
+            done = not notifications or not result.get("next")
+            for notification in notifications:
+                _id = int(notification["notification_id"])
+                if _id <= backfill["until"]:
+                    done = True
+                elif _id < backfill["below"] and _id not in stored:
+                    new_items.append(dict(notification, kind="notification", id=_id))
+            if backfill["unread_only"] and not any(n.get("is_unread") for n in notifications):
+                # First sync: older notifications have all been read already.
+                done = True
+            if done:
+                backfill = None
+            else:
+                backfill = dict(backfill, page=result["next"], below=min(
+                    [backfill["below"]] + [int(n["notification_id"]) for n in notifications]
+                ))
+            yield new_items, {"watermark": watermark, "backfill": backfill}
+
+    def _fetch_actionable(self):
+        """ (NotificationInbox) -> list of dict
+
+        Fetch actionable notifications not stored yet.
+        """
+        result = self.client.get_actionable_notifications()
+        if not result.get("success", True):
+            raise Exception(f"Failed to fetch actionable notifications: {result}")
+        new_items = []
+        for notification in result.get("notifications") or []:
+            _id = int(notification["actionable_notification_id"])
+            if _id not in self._actionable_ids:
+                new_items.append(dict(notification, kind="actionable", id=_id))
+        return new_items
+
+    def _deliver(self, new_items, state=None):
+        """ (NotificationInbox, list of dict, dict) -> NoneType
+
+        Store delivered items and the paging state that goes with them.
+        """
+        with self._lock:
+            if state:
+                self.watermark = state["watermark"]
+                self.backfill = state["backfill"]
+            for item in new_items:
+                if item["kind"] == "actionable":
+                    self._actionable_ids.add(item["id"])
+            self.items = sorted(self.items + new_items, key=self._sort_key)[-self.max_items:]
+            atomic_write_json(self.filename, {
+                "watermark": self.watermark,
+                "backfill": self.backfill,
+                "actionable_ids": sorted(self._actionable_ids),
+                "items": self.items,
+            })
+
+    def sync(self, actionable=True, max_pages=None):
+        """ (NotificationInbox, bool, int) -> list of dict
+
+        Fetch new notifications, store them and return them oldest first.
+        Pages are stored one by one, so an error keeps the pages read before it.
+        """
+        new_items = []
+        for items, state in self._pages(max_pages):
+            self._deliver(items, state)
+            new_items += items
+        if actionable:
+            items = self._fetch_actionable()
+            self._deliver(items)
+            new_items += items
+        return sorted(new_items, key=self._sort_key)
+
+    def unread(self):
+        """ (NotificationInbox) -> list of dict
+
+        Stored items still flagged as unread, oldest first.
+        """
+        with self._lock:
+            return [i for i in self.items if i.get("is_unread", i["kind"] == "actionable")]
+
+    def stream(self, interval=60, stop_event=None, actionable=True):
+        """ (NotificationInbox, int, threading.Event, bool) -> generator of dict
+
+        Yield new items as they arrive, polling every interval seconds until
+        stop_event is set. A page is stored only after all of its items were yielded.
+        Network errors are reported and retried at the next poll; errors from the
+        server (e.g. an expired token) are raised.
+        """
+        stop_event = stop_event or threading.Event()
+        while not stop_event.is_set():
+            try:
+                for items, state in self._pages():
+                    yield from sorted(items, key=self._sort_key)
+                    self._deliver(items, state)
+                if actionable:
+                    items = self._fetch_actionable()
+                    yield from sorted(items, key=self._sort_key)
+                    self._deliver(items)
+            except TRANSPORT_ERRORS as error:
+                print(f"[-] Cannot fetch notifications, retrying in {interval} s ({error})")
+            stop_event.wait(interval)
@@ -0,0 +1,88 @@
+"""
+lobby.py
+
+Stale-while-revalidate lobby.
+
+The last get_channels answer is kept on disk, so the lobby can be shown right away on
+startup. Fresh channels are fetched in a background thread and handed to a callback
+when they land. The shown channels are stale once they are older than `max_age`.
+
+    >>> lobby = Lobby(clubhouse)
+    >>> lobby.refresh(on_update=redraw)
+    >>> redraw(lobby.channels)          # last known channels, possibly from disk
+"""
+
+import time
+import threading
+
+from .utils import atomic_write_json, read_json
+
+class Lobby:
+    """
+    Lobby Class
+    """
+
+    def __init__(self, client, filename="lobby.json", max_age=10):
+        """ (Lobby, Clubhouse, str, float) -> NoneType
+        filename: where the last get_channels answer is kept
+        max_age: seconds after which the shown channels count as stale
+        """
+        self.client = client
+        self.filename = filename
+        self.max_age = max_age
+        snapshot = read_json(filename, default={}) or {}
+        self.channels = snapshot.get("channels") or {"success": True, "channels": []}
+        self.updated_at = snapshot.get("updated_at")
+        self._lock = threading.Lock()
+        self._refreshing = False
+
+    @property
+    def is_stale(self):
+        """ (Lobby) -> bool
+
+        True when the channels are older than max_age (or were never fetched).
+        """
+        age = self.age()
+        return age is None or age > self.max_age
+
+    def refresh(self, on_update=None):
+        """ (Lobby, callable) -> bool
+
+        Fetch get_channels in the background.
+        on_update(channels) is called from that thread when the channels changed.
+        return False if a refresh was already running
+        """
+        with self._lock:
+            if self._refreshing:
+                return False
+            self._refreshing = True
+
+        def fetch():
+            try:
+                channels = self.client.get_channels()
+            except Exception:
+                channels = None
+            changed = False
+            with self._lock:
+                self._refreshing = False
+                if channels and channels.get("success"):
+                    changed = channels.get("channels") != self.channels.get("channels")
+                    self.channels = channels
+                    self.updated_at = time.time()
+            if channels and channels.get("success"):
+                try:
+                    atomic_write_json(self.filename, {"updated_at": self.updated_at, "channels": channels})
+                except OSError:
+                    pass
+            if changed and on_update:
+                on_update(channels)
+
+        threading.Thread(target=fetch, daemon=True).start()
+        return True
+
+    def age(self):
+        """ (Lobby) -> float
+
+        Seconds since the shown channels were fetched. return None if never
+        """
+        return time.time() - self.updated_at if self.updated_at else None
@@ -0,0 +1,102 @@
+"""
+moderation.py
+
+Moderation actions for many users at once.
+
+The per-user endpoints (invite_speaker, mute_speaker, ...) are sent concurrently through
+the batch API, one worker per user, and every user gets their own outcome. The rate
+limiter sets the pace: with the shared DEFAULT_LIMITER (5 calls/s, burst 5) a stage of
+20 speakers takes about 3 seconds. A limiter whose burst covers the batch, e.g.
+RateLimiter(5, burst=20), clears it in about one round-trip, at the risk of throttling.
+
+    >>> users = clubhouse.get_channel(channel)["users"]
+    >>> outcomes = mute_speakers(clubhouse, channel, select_users(users, is_speaker=True, is_moderator=False))
+    >>> succeeded, failed = split_outcomes(outcomes)
+"""
+
+from .batch import run_batch
+
+# Most calls in flight at once
+MAX_WORKERS = 32
+
+# Moderation endpoints taking (channel, user_id)
+BULK_ACTIONS = (
+    "invite_speaker",
+    "uninvite_speaker",
+    "make_moderator",
+    "mute_speaker",
+    "block_from_channel",
+)
+
+def bulk_action(client, action, channel, user_ids, max_workers=None, rate_limiter=None):
+    """ (Clubhouse, str, str, list of int, int, RateLimiter) -> dict
+
+    Run `action` for every user in the channel.
+    max_workers: calls in flight at once (default: one per user, up to MAX_WORKERS)
+    return {user_id: {"success": bool, "error": str or None, "result": dict or None}}
+    """
+    if action not in BULK_ACTIONS:
+        raise ValueError(f"Unknown moderation action: {action}")
+    user_ids = list(dict.fromkeys(int(user_id) for user_id in user_ids))
+    if max_workers is None:
+        max_workers = min(MAX_WORKERS, len(user_ids))
+    # One queue per user: actions on different users of the same room may overlap.
+    results = run_batch(client, [
+        {
+            "endpoint": action,
+            "kwargs": {"channel": channel, "user_id": user_id},
+            "group": f"{channel}:{user_id}",
+        }
+        for user_id in user_ids
+    ], max_workers=max_workers, rate_limiter=rate_limiter)
+    return {
+        user_id: {"success": result["success"], "error": result["error"], "result": result["result"]}
+        for user_id, result in zip(user_ids, results)
+    }
+
+def invite_speakers(client, channel, user_ids, **kwargs):
+    """ (Clubhouse, str, list of int) -> dict """
+    return bulk_action(client, "invite_speaker", channel, user_ids, **kwargs)
+
+def uninvite_speakers(client, channel, user_ids, **kwargs):
+    """ (Clubhouse, str, list of int) -> dict """
+    return bulk_action(client, "uninvite_speaker", channel, user_ids, **kwargs)
+
+def make_moderators(client, channel, user_ids, **kwargs):
+    """ (Clubhouse, str, list of int) -> dict """
+    return bulk_action(client, "make_moderator", channel, user_ids, **kwargs)
+
+def mute_speakers(client, channel, user_ids, **kwargs):
+    """ (Clubhouse, str, list of int) -> dict """
+    return bulk_action(client, "mute_speaker", channel, user_ids, **kwargs)
+
+def block_from_channel(client, channel, user_ids, **kwargs):
+    """ (Clubhouse, str, list of int) -> dict """
+    return bulk_action(client, "block_from_channel", channel, user_ids, **kwargs)
+
+def select_users(users, exclude=(), **fields):
+    """ (list of dict or dict, list of int, **bool) -> list of int
+
+    user_ids of the users matching every given roster field, e.g.
+    select_users(users, raise_hands=True) or select_users(users, is_speaker=True, is_moderator=False).
+    Accepts the `users` list of get_channel or a roster from roster.roster_of.
+    """
+    if isinstance(users, dict):
+        entries = users.items()
+    else:
+        entries = ((int(user["user_id"]), user) for user in users or ())
+    exclude = {int(user_id) for user_id in exclude}
+    return [
+        user_id for user_id, entry in entries
+        if user_id not in exclude
+        and all(bool(entry.get(field)) == bool(value) for field, value in fields.items())
+    ]
+
+def split_outcomes(outcomes):
+    """ (dict) -> (list of int, dict)
+
+    return (user_ids that succeeded, {user_id: error} for the others)
+    """
+    succeeded = [user_id for user_id, outcome in outcomes.items() if outcome["success"]]
+    failed = {user_id: outcome["error"] for user_id, outcome in outcomes.items() if not outcome["success"]}
+    return succeeded, failed
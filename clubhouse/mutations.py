@@ -0,0 +1,160 @@
+"""
+mutations.py
+
+Coalescing write queue for profile updates.
+
+Writes to the same field within `window` seconds collapse into the last one, writes of
+the value the server already has are dropped, and writes that failed for a passing
+reason (an exception, or a throttling answer) are retried with backoff. Other
+{"success": false} answers (a taken username, a bio that is too long) are final.
+The queue exposes the same update_* methods as Clubhouse so it can be used in its place.
+"""
+
+import time
+import threading
+
+# Words of an error_message that mean "try again later" rather than "never"
+THROTTLE_MESSAGES = ("too many", "rate limit", "slow down", "try again", "throttl")
+
+def is_throttled(result):
+    """ (dict) -> bool
+
+    True if a failed answer is worth retrying: its error_message is about rate limits.
+    (An HTTP 429 page that is not JSON makes the call raise, which is retried too.)
+    """
+    message = str(result.get("error_message") or "").lower()
+    return any(word in message for word in THROTTLE_MESSAGES)
+
+class MutationQueue:
+    """
+    MutationQueue Class
+
+    >>> queue = MutationQueue(clubhouse, window=5)
+    >>> queue.update_bio("a")
+    >>> queue.update_bio("b")   # only "b" is sent, 5 seconds later
+    >>> queue.saved
+    1
+    """
+
+    METHODS = (
+        "update_bio",
+        "update_name",
+        "update_displayname",
+        "update_username",
+        "update_skintone",
+    )
+
+    def __init__(self, client, window=5.0, retries=3, backoff=1.0):
+        """ (MutationQueue, Clubhouse, float, int, float) -> NoneType
+        window: seconds to wait for more writes before sending
+        retries: extra attempts when a call raises or is throttled
+        """
+        self.client = client
+        self.window = window
+        self.retries = retries
+        self.backoff = backoff
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._timers = {}
+        self._written = {}
+        self.stats = {
+            "submitted": 0,
+            "sent": 0,
+            "collapsed": 0,
+            "deduped": 0,
+            "retried": 0,
+            "failed": 0,
+        }
+
+    def __getattr__(self, name):
+        """ Expose update_bio(...), update_name(...), ... as queued calls. """
+        if name in MutationQueue.METHODS:
+            return lambda value: self.submit(name, value)
+        raise AttributeError(name)
+
+    @property
+    def saved(self):
+        """ (MutationQueue) -> int
+
+        Number of API calls avoided so far.
+        """
+        return self.stats["collapsed"] + self.stats["deduped"]
+
+    def submit(self, method, value):
+        """ (MutationQueue, str, object) -> NoneType
+
+        Queue a write. It is sent after the window unless a newer one replaces it.
+        """
+        if method not in self.METHODS:
+            raise Exception(f"Not a queueable mutation: {method}")
+        with self._lock:
+            self.stats["submitted"] += 1
+            if method in self._pending:
+                self.stats["collapsed"] += 1
+                self._pending[method] = value
+                return
+            if self._written.get(method, object()) == value:
+                self.stats["deduped"] += 1
+                return
+            self._pending[method] = value
+            timer = threading.Timer(self.window, self._flush_method, args=(method,))
+            timer.daemon = True
+            self._timers[method] = timer
+            timer.start()
+
+    def _flush_method(self, method):
+        """ (MutationQueue, str) -> dict
+
+        Send the pending value of method, if any. return the API result
+        """
+        with self._lock:
+            if method not in self._pending:
+                return None
+            value = self._pending.pop(method)
+            timer = self._timers.pop(method, None)
+            if self._written.get(method, object()) == value:
+                self.stats["deduped"] += 1
+                return None
+        if timer:
+            timer.cancel()
+        return self._send(method, value)
+
+    def _send(self, method, value):
+        """ (MutationQueue, str, object) -> dict
+
+        Call the client, retrying with exponential backoff when it raises or is
+        throttled (see is_throttled). Any other failed answer is returned at once.
+        return the last API result (None if every attempt raised)
+        """
+        result = None
+        for attempt in range(self.retries + 1):
+            if attempt:
+                with self._lock:
+                    self.stats["retried"] += 1
+                time.sleep(self.backoff * (2 ** (attempt - 1)))
+            try:
+                result = getattr(self.client, method)(value)
+            except Exception:
+                result = None
+                continue
+            with self._lock:
+                self.stats["sent"] += 1
+                if result.get("success"):
+                    self._written[method] = value
+                    return result
+                if not is_throttled(result):
+                    self.stats["failed"] += 1
+                    return result
+        with self._lock:
+            self.stats["failed"] += 1
+        return result
+
+    def flush(self):
+        """ (MutationQueue) -> NoneType
+
+        Send every pending write now.
+        """
+        with self._lock:
+            methods = list(self._pending)
+        for method in methods:
+            self._flush_method(method)
@@ -0,0 +1,315 @@
+"""
+nowplaying.py
+
+What is playing right now, from pluggable sources, reported only when it changes.
+
+Sources return the current (title, artist), or None when nothing plays:
+
+- SpotifySource: the Spotify desktop app (SwSpotify)
+- YTMusicSource: the last entry of the YouTube Music history (ytmusicapi)
+- MPRISSource: any MPRIS player on Linux (playerctl); pushes changes with --follow
+- FileSource: a text file "artist - title" written by a player plugin
+- FakeSource: set by hand, for tests
+
+NowPlayingWatcher uses the source's change notifications when it has them. Otherwise
+it polls, quickly while something plays and slower and slower while nothing does,
+and calls on_change only when the track is different. Sources behind a web API set a
+longer `min_interval` of their own.
+
+    >>> watcher = NowPlayingWatcher(SpotifySource(), lambda track: print(track)).start()
+    ('Song', 'Artist')
+"""
+
+import os
+import time
+import shutil
+import threading
+import subprocess
+
+class Source:
+    """
+    Source Class
+
+    Base class of the now-playing sources.
+    """
+
+    name = "source"
+    # Shortest sensible seconds between two polls (e.g. for a web API)
+    min_interval = 0
+
+    def current(self):
+        """ (Source) -> (str, str)
+
+        (title, artist) of what plays now. return None if nothing plays
+        """
+        raise NotImplementedError
+
+    def watch(self, callback, stopped):
+        """ (Source, callable, threading.Event) -> bool
+
+        Call callback(track) on every change until `stopped` is set.
+        return False if the source cannot notify (the watcher then polls)
+        """
+        return False
+
+class SpotifySource(Source):
+    """ The Spotify desktop app, through SwSpotify. """
+
+    name = "spotify"
+
+    def __init__(self):
+        from SwSpotify import spotify
+        self._spotify = spotify
+
+    def current(self):
+        try:
+            song, artist = self._spotify.current()
+        except Exception:
+            # Spotify not running / The song is paused
+            return None
+        return (song, artist)
+
+class YTMusicSource(Source):
+    """
+    YouTube Music, through ytmusicapi.
+
+    There is no "now playing" endpoint: the most recent history entry is used. An
+    entry still on top after `stale_after` seconds (longer than a song) counts as
+    nothing playing, so the watcher backs off instead of calling the API every few
+    seconds for a paused track. Polled at most every `min_interval` seconds.
+    """
+
+    name = "ytmusic"
+    min_interval = 15
+
+    def __init__(self, auth="headers_auth.json", stale_after=600, ytmusic=None):
+        """ (YTMusicSource, str, float, YTMusic) -> NoneType
+        auth: the file written by YTMusic.setup()
+        ytmusic: an existing YTMusic client (default: one built from auth)
+        """
+        if ytmusic is None:
+            from ytmusicapi import YTMusic
+            ytmusic = YTMusic(auth)
+        self._ytmusic = ytmusic
+        self.stale_after = stale_after
+        self._top = None
+        self._top_since = None
+
+    def current(self):
+        try:
+            history = self._ytmusic.get_history()
+        except Exception:
+            return None
+        if not history:
+            return None
+        track = history[0]
+        artists = ", ".join(artist["name"] for artist in track.get("artists") or ())
+        entry = (track.get("videoId"), track.get("title", ""), artists)
+        now = time.monotonic()
+        if entry != self._top:
+            self._top, self._top_since = entry, now
+        elif now - self._top_since >= self.stale_after:
+            return None
+        return (track.get("title", ""), artists)
+
+class MPRISSource(Source):
+    """ Any MPRIS player (Linux), through playerctl. """
+
+    name = "mpris"
+    FORMAT = "{{status}}\t{{title}}\t{{artist}}"
+
+    def __init__(self, player=None):
+        """ (MPRISSource, str) -> NoneType
+        player: restrict to this player (playerctl --player)
+        """
+        self.command = shutil.which("playerctl")
+        if not self.command:
+            raise ImportError("MPRISSource needs playerctl")
+        self.player = player
+
+    def _args(self, *args):
+        player = ["--player", self.player] if self.player else []
+        return [self.command, *player, *args, "metadata", "--format", self.FORMAT]
+
+    @staticmethod
+    def _parse(line):
+        parts = line.rstrip("\n").split("\t")
+        if len(parts) != 3 or parts[0] != "Playing" or not parts[1]:
+            return None
+        return (parts[1], parts[2])
+
+    def current(self):
+        try:
+            output = subprocess.run(self._args(), capture_output=True, text=True, timeout=5).stdout
+        except (OSError, subprocess.SubprocessError):
+            return None
+        return self._parse(output)
+
+    def watch(self, callback, stopped):
+        try:
+            process = subprocess.Popen(self._args("--follow"), stdout=subprocess.PIPE, text=True)
+        except OSError:
+            return False
+
+        def kill():
+            stopped.wait()
+            process.terminate()
+
+        threading.Thread(target=kill, daemon=True).start()
+        for line in process.stdout:
+            callback(self._parse(line))
+        process.wait()
+        return True
+
+class FileSource(Source):
+    """ A text file holding "artist - title", rewritten by the player on every track. """
+
+    name = "file"
+
+    def __init__(self, filename):
+        """ (FileSource, str) -> NoneType """
+        self.filename = filename
+        self._stamp = None
+        self._track = None
+
+    def current(self):
+        try:
+            stat = os.stat(self.filename)
+        except OSError:
+            return None
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        if stamp != self._stamp:
+            # Only read the file when it changed.
+            self._stamp = stamp
+            try:
+                with open(self.filename, encoding="utf-8") as now_playing:
+                    text = now_playing.read().strip()
+            except OSError:
+                return None
+            if not text:
+                self._track = None
+            else:
+                artist, _, title = text.rpartition(" - ")
+                self._track = (title, artist)
+        return self._track
+
+class FakeSource(Source):
+    """ Plays whatever is set with play() / pause(). """
+
+    name = "fake"
+
+    def __init__(self, track=None):
+        self.track = track
+        self.calls = 0
+
+    def play(self, title, artist=""):
+        self.track = (title, artist)
+
+    def pause(self):
+        self.track = None
+
+    def current(self):
+        self.calls += 1
+        return self.track
+
+SOURCES = {
+    "spotify": SpotifySource,
+    "ytmusic": YTMusicSource,
+    "mpris": MPRISSource,
+    "file": FileSource,
+    "fake": FakeSource,
+}
+
+def make_source(spec="spotify"):
+    """ (str) -> Source
+
+    Build a source from "spotify", "ytmusic", "mpris", "fake", or "file:<path>".
+    Raises ImportError if what it needs is not installed.
+    """
+    name, _, argument = spec.partition(":")
+    if name not in SOURCES:
+        raise ValueError(f"Unknown now-playing source: {name} (choose from {', '.join(SOURCES)})")
+    return SOURCES[name](argument) if argument else SOURCES[name]()
+
+class NowPlayingWatcher:
+    """
+    NowPlayingWatcher Class
+    """
+
+    def __init__(self, source, on_change, min_interval=2, max_interval=30, backoff=2):
+        """ (NowPlayingWatcher, Source, callable, float, float, float) -> NoneType
+        on_change: called with the new (title, artist), or None when playback stops
+        min_interval: seconds between polls while something plays
+        max_interval: longest wait between polls while nothing plays
+        """
+        self.source = source
+        self.on_change = on_change
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.track = None
+        self.interval = self._min_interval()
+        self.stats = {"polls": 0, "changes": 0}
+        self._started = False
+        self._stopped = threading.Event()
+
+    def _min_interval(self):
+        """ (NowPlayingWatcher) -> float """
+        return max(self.min_interval, getattr(self.source, "min_interval", 0) or 0)
+
+    def _seen(self, track):
+        """ (NowPlayingWatcher, tuple) -> NoneType
+
+        Report the track if it changed.
+        """
+        if track == self.track and self._started:
+            return
+        self._started = True
+        self.track = track
+        self.stats["changes"] += 1
+        try:
+            self.on_change(track)
+        except Exception:
+            pass
+
+    def poll(self):
+        """ (NowPlayingWatcher) -> float
+
+        Ask the source once. return seconds to wait before the next poll
+        """
+        self.stats["polls"] += 1
+        track = self.source.current()
+        self._seen(track)
+        if track is None:
+            self.interval = max(self._min_interval(), min(self.max_interval, self.interval * self.backoff))
+        else:
+            self.interval = self._min_interval()
+        return self.interval
+
+    def _run(self):
+        # Notifications first; poll if the source has none or they stop coming.
+        self.source.watch(self._seen, self._stopped)
+        while not self._stopped.is_set():
+            if self._stopped.wait(self.poll()):
+                break
+
+    def start(self):
+        """ (NowPlayingWatcher) -> NowPlayingWatcher """
+        thread = threading.Thread(target=self._run, name=f"now-playing-{self.source.name}")
+        thread.daemon = True
+        thread.start()
+        return self
+
+    def stop(self):
+        """ (NowPlayingWatcher) -> NoneType """
+        self._stopped.set()
+
+def song_bio(track, bio=""):
+    """ ((str, str), str) -> str
+
+    The bio showing the track above `bio`, or just `bio` when nothing plays.
+    """
+    if not track:
+        return bio
+    song, artist = track
+    return "♫𝗡𝗼𝘄 𝗣𝗹𝗮𝘆𝗶𝗻𝗴: " + song + "\n♫𝗔𝗿𝘁𝗶𝘀𝘁: " + artist + "\n如果個Now playing無update可以refresh多幾次\n\n" + bio
@@ -0,0 +1,234 @@
+"""
+profiling.py
+
+Opt-in profiling for long-running sessions.
+
+- CPU: a background thread samples the stacks of every other thread and weights each
+  stack by the CPU time its thread used since the previous sample, so threads
+  blocked in input(), Event.wait or a socket read do not show up (folded stack
+  format, readable by flamegraph.pl / speedscope). Where per-thread CPU clocks are
+  not available (Windows), every sample counts once and the report says it is
+  wall-clock time.
+- Memory: tracemalloc snapshots, compared with the previous dump.
+- Threads: a stack dump of every live thread.
+
+Nothing is started unless asked for, e.g. with CLUBHOUSE_PROFILE=cpu,heap, and a
+profiler can be started and stopped at any time.
+"""
+
+import os
+import sys
+import time
+import threading
+import traceback
+import tracemalloc
+from collections import Counter
+
+def thread_cpu_time(ident):
+    """ (int) -> float
+
+    CPU seconds used so far by the thread with this threading ident.
+    return None where per-thread CPU clocks are not available
+    """
+    try:
+        return time.clock_gettime(time.pthread_getcpuclockid(ident))
+    except (AttributeError, OSError, OverflowError, ValueError):
+        return None
+
+class Profiler:
+    """
+    Profiler Class
+
+    >>> profiler = Profiler(cpu=True, heap=True)
+    >>> profiler.start()
+    ...
+    >>> profiler.dump("profiles")
+    ['profiles/threads-20210320-120000.txt', 'profiles/cpu-20210320-120000.folded', ...]
+    """
+
+    def __init__(self, cpu=False, heap=False, interval=0.01, heap_frames=10):
+        """ (Profiler, bool, bool, float, int) -> NoneType
+        interval: seconds between two CPU samples
+        heap_frames: frames kept per allocation by tracemalloc
+
+        samples counts microseconds of CPU time per stack, or samples when `clock`
+        is "wall" (no per-thread CPU clock).
+        """
+        self.cpu = cpu
+        self.heap = heap
+        self.interval = interval
+        self.heap_frames = heap_frames
+        self.samples = Counter()
+        self.sample_count = 0
+        self.clock = "cpu"
+        self._cpu_times = {}
+        self._lock = threading.Lock()
+        self._stopped = None
+        self._last_snapshot = None
+
+    @classmethod
+    def from_env(cls, value=None):
+        """ (str) -> Profiler
+
+        Build a profiler from a spec like "cpu", "heap", "cpu,heap" or "all"
+        (default: the CLUBHOUSE_PROFILE environment variable). return None if empty
+        """
+        value = (value if value is not None else os.environ.get("CLUBHOUSE_PROFILE", "")).lower()
+        parts = {part.strip() for part in value.split(",") if part.strip()}
+        if not parts:
+            return None
+        everything = bool(parts & {"1", "all", "true", "yes"})
+        return cls(cpu=everything or "cpu" in parts, heap=everything or "heap" in parts)
+
+    def start(self):
+        """ (Profiler) -> Profiler
+
+        Start the enabled profilers.
+        """
+        if self.heap and not tracemalloc.is_tracing():
+            tracemalloc.start(self.heap_frames)
+        if self.cpu and self._stopped is None:
+            self._stopped = threading.Event()
+            thread = threading.Thread(target=self._sample_loop, name="profiler-sampler")
+            thread.daemon = True
+            thread.start()
+        return self
+
+    def stop(self):
+        """ (Profiler) -> NoneType """
+        if self._stopped:
+            self._stopped.set()
+            self._stopped = None
+        if self.heap and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    def _weight(self, ident):
+        """ (Profiler, int) -> int
+
+        Weight of a thread's current stack: microseconds of CPU it used since the last
+        sample (0 if it was waiting), or 1 with the wall clock.
+        """
+        now = thread_cpu_time(ident)
+        if now is None:
+            self.clock = "wall"
+            return 1
+        before = self._cpu_times.get(ident, now)
+        self._cpu_times[ident] = now
+        return int((now - before) * 1e6)
+
+    def sample(self):
+        """ (Profiler) -> NoneType
+
+        Take one sample of every thread but the calling one.
+        """
+        me = threading.get_ident()
+        frames = sys._current_frames()
+        with self._lock:
+            for ident in list(self._cpu_times):
+                if ident not in frames:
+                    del self._cpu_times[ident]
+            for ident, frame in frames.items():
+                if ident == me:
+                    continue
+                weight = self._weight(ident)
+                if weight <= 0:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                    frame = frame.f_back
+                self.samples[";".join(reversed(stack))] += weight
+            self.sample_count += 1
+
+    def _sample_loop(self):
+        """ (Profiler) -> NoneType
+
+        Sample every thread but this one until stopped.
+        """
+        stopped = self._stopped
+        while not stopped.wait(self.interval):
+            self.sample()
+
+    def top_functions(self, limit=30):
+        """ (Profiler, int) -> list of (str, int, int)
+
+        (function, weight as leaf, weight anywhere on the stack), busiest first.
+        Weights are CPU microseconds, or samples with the wall clock (see `clock`).
+        """
+        own = Counter()
+        total = Counter()
+        with self._lock:
+            for stack, count in self.samples.items():
+                frames = stack.split(";")
+                own[frames[-1]] += count
+                for name in set(frames):
+                    total[name] += count
+        return [(name, own[name], total[name]) for name, _ in total.most_common(limit)]
+
+    @staticmethod
+    def thread_dump():
+        """ () -> str
+
+        Stack of every live thread.
+        """
+        names = {thread.ident: thread for thread in threading.enumerate()}
+        lines = []
+        for ident, frame in sys._current_frames().items():
+            thread = names.get(ident)
+            name = thread.name if thread else "?"
+            daemon = " daemon" if thread and thread.daemon else ""
+            lines.append(f'Thread "{name}" ({ident}){daemon}:')
+            lines.extend(line.rstrip("\n") for line in traceback.format_stack(frame))
+            lines.append("")
+        return "\n".join(lines)
+
+    def heap_report(self, limit=30):
+        """ (Profiler, int) -> str
+
+        Biggest allocation sites, and the growth since the previous report.
+        """
+        if not tracemalloc.is_tracing():
+            return "tracemalloc is not running (enable heap profiling)\n"
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        lines = [f"traced: {current / 2 ** 20:.1f} MB (peak {peak / 2 ** 20:.1f} MB)", "", "top allocations:"]
+        lines.extend(str(stat) for stat in snapshot.statistics("lineno")[:limit])
+        if self._last_snapshot is not None:
+            lines.extend(["", "growth since last report:"])
+            lines.extend(str(stat) for stat in snapshot.compare_to(self._last_snapshot, "lineno")[:limit])
+        self._last_snapshot = snapshot
+        return "\n".join(lines) + "\n"
+
+    def dump(self, directory="profiles"):
+        """ (Profiler, str) -> list of str
+
+        Write the thread dump and whatever profiles are enabled. return the written files
+        """
+        os.makedirs(directory, exist_ok=True)
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        written = []
+
+        def _write(name, extension, text):
+            path = os.path.join(directory, f"{name}-{stamp}.{extension}")
+            with open(path, "w", encoding="utf-8") as output:
+                output.write(text)
+            written.append(path)
+
+        _write("threads", "txt", self.thread_dump())
+        if self.cpu:
+            with self._lock:
+                folded = "".join(f"{stack} {count}\n" for stack, count in self.samples.items())
+                count = self.sample_count
+            _write("cpu", "folded", folded)
+            if self.clock == "cpu":
+                header = f"CPU time in microseconds, {count} samples every {self.interval * 1000:.0f} ms"
+            else:
+                header = (f"wall-clock: {count} samples every {self.interval * 1000:.0f} ms, "
+                          "waiting threads included (no per-thread CPU clock here)")
+            report = [header, "", f"{'own':>10} {'total':>10}  function"]
+            report.extend(f"{own:>10} {total:>10}  {name}" for name, own, total in self.top_functions())
+            _write("cpu", "txt", "\n".join(report) + "\n")
+        if self.heap:
+            _write("heap", "txt", self.heap_report())
+        return written
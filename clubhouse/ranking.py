@@ -0,0 +1,192 @@
+"""
+ranking.py
+
+Offline follow suggestions ranked from locally cached graph data.
+
+Each signal (common follows, shared clubs, shared topics, room co-attendance) is kept as
+a counter of candidate -> count, filled once when the data is loaded. Ranking is then a
+weighted sum over those counters plus a top-k selection, with no network call.
+"""
+
+import heapq
+from collections import Counter
+
+from .utils import atomic_write_json, read_json, iter_pages
+from .ratelimit import DEFAULT_LIMITER
+
+class FollowRanker:
+    """
+    FollowRanker Class
+
+    >>> ranker = FollowRanker(my_user_id)
+    >>> ranker.load_following(clubhouse)
+    >>> ranker.add_room(channel_info['users'])
+    >>> ranker.top(10)
+    [(1234, 7.5), (2345, 6.0), ...]
+    """
+
+    WEIGHTS = {
+        "common_follows": 1.0,
+        "shared_clubs": 2.0,
+        "shared_topics": 0.5,
+        "co_attendance": 1.5,
+    }
+
+    def __init__(self, user_id, weights=None):
+        """ (FollowRanker, int, dict) -> NoneType
+        Set the current user and optionally override the signal weights
+        """
+        self.user_id = int(user_id)
+        self.weights = dict(self.WEIGHTS, **(weights or {}))
+        self.signals = {name: Counter() for name in self.WEIGHTS}
+        self.following = set()
+        self.excluded = set()
+
+    @staticmethod
+    def _ids(users):
+        """ (list of dict or int) -> list of int """
+        return [int(u["user_id"]) if isinstance(u, dict) else int(u) for u in users]
+
+    def set_following(self, users):
+        """ (FollowRanker, list) -> NoneType
+
+        Users already followed; they are never suggested.
+        """
+        self.following = set(self._ids(users))
+
+    def exclude(self, users):
+        """ (FollowRanker, list) -> NoneType
+
+        Never suggest these users (e.g. ignored or blocked ones).
+        """
+        self.excluded.update(self._ids(users))
+
+    def add_following_of(self, users):
+        """ (FollowRanker, list) -> NoneType
+
+        Users followed by one of the people you follow.
+        """
+        self.signals["common_follows"].update(self._ids(users))
+
+    def add_club_members(self, users):
+        """ (FollowRanker, list) -> NoneType
+
+        Members of a club you are in.
+        """
+        self.signals["shared_clubs"].update(self._ids(users))
+
+    def add_topic_users(self, users):
+        """ (FollowRanker, list) -> NoneType
+
+        Users interested in one of your topics.
+        """
+        self.signals["shared_topics"].update(self._ids(users))
+
+    def add_room(self, users):
+        """ (FollowRanker, list) -> NoneType
+
+        Users who were in the same room as you.
+        """
+        self.signals["co_attendance"].update(set(self._ids(users)))
+
+    def scores(self):
+        """ (FollowRanker) -> Counter
+
+        Weighted score of every candidate.
+        """
+        total = Counter()
+        for name, counter in self.signals.items():
+            weight = self.weights.get(name, 0)
+            if not weight:
+                continue
+            for user_id, count in counter.items():
+                total[user_id] += weight * count
+        return total
+
+    def top(self, k=20):
+        """ (FollowRanker, int) -> list of (int, float)
+
+        The k best candidates with their score, best first.
+        """
+        skip = self.following | self.excluded | {self.user_id}
+        return heapq.nlargest(
+            k,
+            ((user_id, score) for user_id, score in self.scores().items() if user_id not in skip),
+            key=lambda item: item[1]
+        )
+
+    def follow_top(self, client, k=20):
+        """ (FollowRanker, Clubhouse, int) -> dict
+
+        Follow the k best candidates with one follow_multiple call.
+        """
+        user_ids = [user_id for user_id, _ in self.top(k)]
+        if not user_ids:
+            return {"success": True, "user_ids": []}
+        result = client.follow_multiple(user_ids)
+        if result.get("success"):
+            self.following.update(user_ids)
+        return result
+
+    def load_following(self, client, max_friends=50, max_pages=4, rate_limiter=None):
+        """ (FollowRanker, Clubhouse, int, int, RateLimiter) -> NoneType
+
+        Fetch who you follow, then who the first max_friends of them follow.
+        Replaces the common_follows signal, so loading again does not count twice.
+        """
+        rate_limiter = rate_limiter or DEFAULT_LIMITER
+        self.signals["common_follows"] = Counter()
+        following = list(iter_pages(client.get_following, "users", self.user_id,
+                                    max_pages=max_pages, rate_limiter=rate_limiter))
+        self.set_following(following)
+        for friend in following[:max_friends]:
+            self.add_following_of(iter_pages(client.get_following, "users", friend["user_id"],
+                                             max_pages=max_pages, rate_limiter=rate_limiter))
+
+    def load_clubs(self, client, club_ids, max_pages=4, rate_limiter=None):
+        """ (FollowRanker, Clubhouse, list of int, int, RateLimiter) -> NoneType
+
+        Fetch members of your clubs. Replaces the shared_clubs signal.
+        """
+        rate_limiter = rate_limiter or DEFAULT_LIMITER
+        self.signals["shared_clubs"] = Counter()
+        for club_id in club_ids:
+            self.add_club_members(iter_pages(client.get_club_members, "users", club_id,
+                                             max_pages=max_pages, rate_limiter=rate_limiter))
+
+    def load_topics(self, client, topic_ids, max_pages=2, rate_limiter=None):
+        """ (FollowRanker, Clubhouse, list of int, int, RateLimiter) -> NoneType
+
+        Fetch users of your topics. Replaces the shared_topics signal.
+        """
+        rate_limiter = rate_limiter or DEFAULT_LIMITER
+        self.signals["shared_topics"] = Counter()
+        for topic_id in topic_ids:
+            self.add_topic_users(iter_pages(client.get_users_for_topic, "users", topic_id,
+                                            page_size=25, max_pages=max_pages, rate_limiter=rate_limiter))
+
+    def save(self, filename="ranking.json"):
+        """ (FollowRanker, str) -> NoneType
+
+        Save the cached graph data.
+        """
+        atomic_write_json(filename, {
+            "user_id": self.user_id,
+            "following": sorted(self.following),
+            "excluded": sorted(self.excluded),
+            "signals": {name: dict(counter) for name, counter in self.signals.items()},
+        })
+
+    def load(self, filename="ranking.json"):
+        """ (FollowRanker, str) -> bool
+
+        Load cached graph data saved for the same user. return True on success
+        """
+        saved = read_json(filename)
+        if not saved or saved.get("user_id") != self.user_id:
+            return False
+        self.following = set(saved.get("following", ()))
+        self.excluded = set(saved.get("excluded", ()))
+        for name, counter in saved.get("signals", {}).items():
+            self.signals[name] = Counter({int(k): v for k, v in counter.items()})
+        return True
@@ -0,0 +1,75 @@
+"""
+ratelimit.py
+
+Token bucket shared between concurrent helpers.
+Sending too many requests at once is the fastest way to get your account banned,
+so every helper that fans out calls should take from the same bucket.
+"""
+
+import time
+import threading
+
+class RateLimiter:
+    """
+    RateLimiter Class
+
+    Simple thread-safe token bucket.
+    `rate` tokens are added every second, up to `burst` tokens.
+    """
+
+    def __init__(self, rate=5.0, burst=5):
+        """ (RateLimiter, float, int) -> NoneType
+        Set the refill rate and the bucket size
+        """
+        self.rate = float(rate)
+        self.burst = max(1, int(burst))
+        self._tokens = float(self.burst)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        """ (RateLimiter) -> NoneType
+
+        Refill tokens based on the elapsed time. Must be called with the lock held.
+        """
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+        self._last = now
+
+    def try_acquire(self, tokens=1):
+        """ (RateLimiter, int) -> bool
+
+        Take tokens without waiting. return True on success
+        """
+        with self._lock:
+            self._refill()
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return True
+            return False
+
+    def acquire(self, tokens=1):
+        """ (RateLimiter, int) -> float
+
+        Block until tokens are available. return the time spent waiting
+        """
+        waited = 0.0
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return waited
+                delay = (tokens - self._tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+# Bucket used when the caller does not bring its own.
+DEFAULT_LIMITER = RateLimiter()
@@ -0,0 +1,281 @@
+"""
+recorder.py
+
+Append-only, compressed history of room membership.
+
+A recorder samples rooms with `get_channel` and only writes what changed since the
+previous sample (joins, leaves, role changes), with a full keyframe every
+`keyframe_every` records and at the start of every segment. Records are buffered and
+appended to gzip segments in batches, so every record is written exactly once.
+
+Segment files are named <channel>-<start in ms>.jsonl.gz and contain lines like:
+    {"t": 1616271523.1, "k": {roster}}      keyframe
+    {"t": 1616271553.1, "d": {diff}}        delta
+    {"t": 1616271583.1, "end": true}        the room is gone
+
+A failed get_channel only ends the room when it says the room is gone, or after
+`end_after` failures in a row (stamped with the time of the first one): a throttled
+or broken answer in between two good ones is not recorded at all.
+"""
+
+import os
+import re
+import gzip
+import json
+import time
+import bisect
+import threading
+
+from .roster import roster_of, diff_rosters, apply_diff, is_empty_diff
+from .watcher import RoomWatcher
+
+# Words of a get_channel error_message meaning the room is over
+ROOM_GONE_MESSAGES = ("no longer available", "has ended", "not found")
+
+def _room_gone(channel_info):
+    """ (dict) -> bool """
+    message = str(channel_info.get("error_message") or "").lower()
+    return any(words in message for words in ROOM_GONE_MESSAGES)
+
+def _safe_name(channel):
+    """ (str) -> str """
+    return re.sub(r"[^A-Za-z0-9_]", "_", channel)
+
+class _Track:
+    """ Recording state of one channel """
+
+    def __init__(self):
+        self.roster = None
+        self.ended = False
+        self.path = None
+        self.records = 0
+        self.since_keyframe = 0
+        self.buffer = []
+        self.failures = 0
+        self.failed_at = None
+
+class RoomRecorder:
+    """
+    RoomRecorder Class
+
+    >>> recorder = RoomRecorder(clubhouse, "recordings")
+    >>> recorder.start("MR35Dy96")
+    ...
+    >>> recorder.stop()
+    """
+
+    def __init__(self, client, directory="recordings", interval=30, keyframe_every=20,
+                 flush_every=10, segment_records=1000, end_after=3):
+        """ (RoomRecorder, Clubhouse, str, int, int, int, int, int) -> NoneType
+        interval: seconds between samples
+        keyframe_every: records between two full rosters
+        flush_every: records buffered before they are appended to disk
+        segment_records: records per segment file
+        end_after: failed samples in a row that end the room
+        """
+        self.client = client
+        self.directory = directory
+        self.interval = interval
+        self.keyframe_every = keyframe_every
+        self.flush_every = flush_every
+        self.segment_records = segment_records
+        self.end_after = end_after
+        self._tracks = {}
+        self._lock = threading.Lock()
+        self._watchers = []
+        self._owned = []
+        os.makedirs(directory, exist_ok=True)
+
+    def _append(self, channel, track, record):
+        """ (RoomRecorder, str, _Track, dict) -> NoneType
+
+        Buffer a record, starting a new segment when needed.
+        """
+        if track.path is None:
+            track.path = os.path.join(
+                self.directory, f"{_safe_name(channel)}-{int(record['t'] * 1000)}.jsonl.gz"
+            )
+        track.buffer.append(json.dumps(record, separators=(",", ":")))
+        track.records += 1
+        if len(track.buffer) >= self.flush_every:
+            self._flush_track(track)
+        if track.records >= self.segment_records:
+            self._flush_track(track)
+            track.path = None
+            track.records = 0
+
+    @staticmethod
+    def _flush_track(track):
+        """ (_Track) -> NoneType
+
+        Append buffered records as one gzip member.
+        """
+        if not track.buffer:
+            return
+        with gzip.open(track.path, "ab") as segment:
+            segment.write(("\n".join(track.buffer) + "\n").encode("utf-8"))
+        track.buffer = []
+
+    def record(self, channel, channel_info=None, now=None):
+        """ (RoomRecorder, str, dict, float) -> bool
+
+        Take one sample of the channel (fetched unless channel_info is given).
+        return False once the room has ended
+        """
+        if channel_info is None:
+            channel_info = self.client.get_channel(channel)
+        now = now or time.time()
+        with self._lock:
+            track = self._tracks.setdefault(channel, _Track())
+            if not channel_info.get("success"):
+                if track.ended:
+                    return False
+                track.failures += 1
+                if track.failures == 1:
+                    track.failed_at = now
+                if not _room_gone(channel_info) and track.failures < self.end_after:
+                    # Maybe throttled or a hiccup: wait for the next sample.
+                    return True
+                if track.roster is not None:
+                    self._append(channel, track, {"t": track.failed_at, "end": True})
+                    self._flush_track(track)
+                track.ended = True
+                track.roster = None
+                return False
+            track.ended = False
+            track.failures = 0
+            roster = roster_of(channel_info.get("users"))
+            if track.path is None or track.roster is None or track.since_keyframe >= self.keyframe_every:
+                self._append(channel, track, {"t": now, "k": roster})
+                track.since_keyframe = 0
+            else:
+                diff = diff_rosters(track.roster, roster)
+                if not is_empty_diff(diff):
+                    self._append(channel, track, {"t": now, "d": diff})
+                    track.since_keyframe += 1
+            track.roster = roster
+            return True
+
+    def flush(self):
+        """ (RoomRecorder) -> NoneType
+
+        Write every buffered record to disk.
+        """
+        with self._lock:
+            for track in self._tracks.values():
+                self._flush_track(track)
+
+    def _on_snapshot(self, channel, channel_info, diff, now):
+        self.record(channel, channel_info, now)
+
+    def watch(self, watcher):
+        """ (RoomRecorder, RoomWatcher) -> NoneType
+
+        Record every snapshot the watcher takes. The watcher polls at least every
+        `interval` seconds for the recorder, more often if another subscriber asks.
+        """
+        watcher.subscribe(self._on_snapshot, interval=self.interval)
+        self._watchers.append(watcher)
+
+    def start(self, *channels):
+        """ (RoomRecorder, str, ...) -> NoneType
+
+        Sample the given channels every interval seconds, each with its own RoomWatcher.
+        Call stop to stop recording.
+        """
+        for channel in channels:
+            watcher = RoomWatcher(self.client, channel, self.interval)
+            self.watch(watcher)
+            self._owned.append(watcher)
+            watcher.start(immediate=True)
+
+    def stop(self):
+        """ (RoomRecorder) -> NoneType
+
+        Stop sampling and flush.
+        """
+        for watcher in self._watchers:
+            watcher.unsubscribe(self._on_snapshot)
+        for watcher in self._owned:
+            watcher.stop()
+        self._watchers = []
+        self._owned = []
+        self.flush()
+
+class RoomHistory:
+    """
+    RoomHistory Class
+
+    Read recordings written by RoomRecorder.
+
+    >>> history = RoomHistory("recordings")
+    >>> history.state_at("MR35Dy96", 1616271600)
+    {1234: {'username': ..., 'is_speaker': True, ...}, ...}
+    """
+
+    def __init__(self, directory="recordings"):
+        """ (RoomHistory, str) -> NoneType """
+        self.directory = directory
+
+    def segments(self, channel):
+        """ (RoomHistory, str) -> list of (float, str)
+
+        Segments of a channel as (start time, path), oldest first.
+        """
+        prefix = f"{_safe_name(channel)}-"
+        result = []
+        for name in os.listdir(self.directory):
+            if name.startswith(prefix) and name.endswith(".jsonl.gz"):
+                start = name[len(prefix):-len(".jsonl.gz")]
+                if start.isdigit():
+                    result.append((int(start) / 1000, os.path.join(self.directory, name)))
+        return sorted(result)
+
+    @staticmethod
+    def read_segment(path):
+        """ (str) -> generator of dict
+
+        Yield the records of a segment, stopping at a truncated tail.
+        """
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as segment:
+                for line in segment:
+                    if line.strip():
+                        yield json.loads(line)
+        except (EOFError, OSError, ValueError):
+            return
+
+    def state_at(self, channel, timestamp):
+        """ (RoomHistory, str, float) -> dict
+
+        Roster of the channel at the given time.
+        return None if nothing was recorded yet or the room had ended
+        """
+        segments = self.segments(channel)
+        index = bisect.bisect_right([start for start, _ in segments], timestamp) - 1
+        if index < 0:
+            return None
+        roster = None
+        for record in self.read_segment(segments[index][1]):
+            if record["t"] > timestamp:
+                break
+            if "k" in record:
+                roster = {int(k): v for k, v in record["k"].items()}
+            elif "d" in record and roster is not None:
+                roster = apply_diff(roster, record["d"])
+            elif record.get("end"):
+                roster = None
+        return roster
+
+    def events(self, channel, start=0, end=None):
+        """ (RoomHistory, str, float, float) -> generator of dict
+
+        Yield raw records of a channel between start and end.
+        """
+        for _, path in self.segments(channel):
+            for record in self.read_segment(path):
+                if record["t"] < start:
+                    continue
+                if end is not None and record["t"] > end:
+                    return
+                yield record
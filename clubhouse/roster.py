@@ -0,0 +1,78 @@
+"""
+roster.py
+
+Compact room rosters and the differences between two of them.
+
+A roster is {user_id: {"username": ..., "name": ..., "is_speaker": ..., ...}} built
+from the `users` list of `get_channel` / `join_channel`.
+"""
+
+# Fields kept for every user in the room
+ROSTER_FIELDS = (
+    "username",
+    "name",
+    "is_speaker",
+    "is_moderator",
+    "is_invited_as_speaker",
+    "is_followed_by_speaker",
+    "raise_hands",
+)
+
+# Fields whose change means the user's role in the room changed
+ROLE_FIELDS = (
+    "is_speaker",
+    "is_moderator",
+    "is_invited_as_speaker",
+    "raise_hands",
+)
+
+def roster_of(users):
+    """ (list of dict) -> dict
+
+    Build a roster from a list of users.
+    """
+    return {
+        int(user["user_id"]): {field: user[field] for field in ROSTER_FIELDS if field in user}
+        for user in users or ()
+    }
+
+def diff_rosters(old, new):
+    """ (dict, dict) -> dict
+
+    Differences between two rosters.
+    return {"joined": {user_id: entry}, "left": [user_id], "changed": {user_id: {field: value}}}
+    Only role fields are compared for users present in both.
+    """
+    joined = {user_id: entry for user_id, entry in new.items() if user_id not in old}
+    left = [user_id for user_id in old if user_id not in new]
+    changed = {}
+    for user_id, entry in new.items():
+        before = old.get(user_id)
+        if before is None:
+            continue
+        fields = {
+            field: entry.get(field) for field in ROLE_FIELDS
+            if entry.get(field) != before.get(field)
+        }
+        if fields:
+            changed[user_id] = fields
+    return {"joined": joined, "left": left, "changed": changed}
+
+def is_empty_diff(diff):
+    """ (dict) -> bool """
+    return not (diff["joined"] or diff["left"] or diff["changed"])
+
+def apply_diff(roster, diff):
+    """ (dict, dict) -> dict
+
+    Apply a diff produced by diff_rosters to a roster. return the new roster
+    """
+    roster = dict(roster)
+    for user_id in diff.get("left", ()):
+        roster.pop(int(user_id), None)
+    for user_id, entry in diff.get("joined", {}).items():
+        roster[int(user_id)] = dict(entry)
+    for user_id, fields in diff.get("changed", {}).items():
+        user_id = int(user_id)
+        roster[user_id] = dict(roster.get(user_id, {}), **fields)
+    return roster
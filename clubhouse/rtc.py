@@ -0,0 +1,315 @@
+"""
+rtc.py
+
+Voice engines for room sessions.
+
+Every engine has the same small interface: join / leave a channel, pick an audio
+profile, mute the microphone, and report events through callbacks:
+
+    on_join(channel, user_id, elapsed)      joined, `elapsed` seconds after join()
+    on_volume([(user_id, volume), ...])     who is talking, volume 0-255
+    on_quality(user_id, tx, rx)             network quality, 0 (unknown) to 6 (down)
+
+- AgoraEngine: the native Agora SDK (agorartc)
+- FakeEngine: no audio at all; simulates join latency and speaker volumes so that
+  many room sessions can run in one process (CI, load tests). All fake engines share
+  a single scheduler thread.
+
+    >>> engine = make_engine("fake")
+    >>> engine.on_volume(lambda speakers: print(speakers))
+    >>> engine.join(channel_info["token"], channel_name, user_id, speakers=[1, 2])
+"""
+
+import time
+import heapq
+import random
+import itertools
+import threading
+
+class RtcEngine:
+    """
+    RtcEngine Class
+
+    Base class of the voice engines. Callbacks may run on another thread.
+    """
+
+    name = "rtc"
+
+    def __init__(self):
+        self.channel = None
+        self.user_id = None
+        self._callbacks = {"join": [], "volume": [], "quality": []}
+
+    def on_join(self, callback):
+        """ (RtcEngine, callable) -> NoneType """
+        self._callbacks["join"].append(callback)
+
+    def on_volume(self, callback):
+        """ (RtcEngine, callable) -> NoneType """
+        self._callbacks["volume"].append(callback)
+
+    def on_quality(self, callback):
+        """ (RtcEngine, callable) -> NoneType """
+        self._callbacks["quality"].append(callback)
+
+    def off(self, callback):
+        """ (RtcEngine, callable) -> NoneType
+
+        Remove a callback registered with on_join / on_volume / on_quality.
+        """
+        for callbacks in self._callbacks.values():
+            if callback in callbacks:
+                callbacks.remove(callback)
+
+    def _emit(self, event, *args):
+        for callback in self._callbacks[event]:
+            try:
+                callback(*args)
+            except Exception:
+                pass
+
+    def join(self, token, channel, user_id, **kwargs):
+        """ (RtcEngine, str, str, int) -> bool
+
+        Start joining the channel. on_join fires once connected.
+        """
+        raise NotImplementedError
+
+    def leave(self):
+        """ (RtcEngine) -> NoneType """
+        raise NotImplementedError
+
+    def set_audio_profile(self, profile="music_high_quality_stereo", scenario="game_streaming"):
+        """ (RtcEngine, str, str) -> bool """
+        return True
+
+    def mute(self, muted=True):
+        """ (RtcEngine, bool) -> NoneType
+
+        Mute or unmute the local microphone.
+        """
+
+    def release(self):
+        """ (RtcEngine) -> NoneType
+
+        Leave and free the engine.
+        """
+        if self.channel:
+            self.leave()
+
+class AgoraEngine(RtcEngine):
+    """ The Agora SDK. Raises ImportError if agorartc is not installed. """
+
+    name = "agora"
+
+    def __init__(self, app_id=None, volume_interval=500):
+        """ (AgoraEngine, str, int) -> NoneType
+        volume_interval: milliseconds between two on_volume reports (0: off)
+        """
+        super().__init__()
+        import agorartc
+        from .clubhouse import Clubhouse
+        self._agorartc = agorartc
+        self._join_started = None
+        engine = self
+
+        class _Handler(agorartc.RtcEngineEventHandlerBase):
+            def onJoinChannelSuccess(self, channel, uid, elapsed):
+                started = engine._join_started
+                engine._emit("join", channel, uid, time.monotonic() - started if started else elapsed / 1000)
+
+            def onAudioVolumeIndication(self, speakers, speakerNumber, totalVolume):
+                engine._emit("volume", [
+                    (speaker.uid or engine.user_id, speaker.volume) for speaker in speakers[:speakerNumber]
+                ])
+
+            def onNetworkQuality(self, uid, txQuality, rxQuality):
+                engine._emit("quality", uid or engine.user_id, txQuality, rxQuality)
+
+        self._handler = _Handler()
+        self.engine = agorartc.createRtcEngineBridge()
+        self.engine.initEventHandler(self._handler)
+        # 0xFFFFFFFE will exclude Chinese servers from Agora's servers.
+        self.engine.initialize(app_id or Clubhouse.AGORA_KEY, None, agorartc.AREA_CODE_GLOB & 0xFFFFFFFE)
+        if volume_interval:
+            self.engine.enableAudioVolumeIndication(volume_interval, 3, False)
+
+    def set_audio_profile(self, profile="music_high_quality_stereo", scenario="game_streaming"):
+        return self.engine.setAudioProfile(
+            getattr(self._agorartc, f"AUDIO_PROFILE_{profile.upper()}"),
+            getattr(self._agorartc, f"AUDIO_SCENARIO_{scenario.upper()}")
+        ) >= 0
+
+    def join(self, token, channel, user_id, **kwargs):
+        self.channel = channel
+        self.user_id = int(user_id)
+        self._join_started = time.monotonic()
+        return self.engine.joinChannel(token, channel, "", int(user_id)) >= 0
+
+    def leave(self):
+        self.engine.leaveChannel()
+        self.channel = None
+
+    def mute(self, muted=True):
+        self.engine.muteLocalAudioStream(muted)
+
+    def release(self):
+        super().release()
+        self.engine.release()
+
+class Scheduler:
+    """
+    One thread running timed callbacks for any number of fake engines.
+    """
+
+    def __init__(self):
+        self._queue = []
+        self._counter = itertools.count()
+        self._condition = threading.Condition()
+        self._thread = None
+
+    def call_at(self, when, func):
+        """ (Scheduler, float, callable) -> NoneType
+
+        Run func() at time.monotonic() == when.
+        """
+        with self._condition:
+            heapq.heappush(self._queue, (when, next(self._counter), func))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="rtc-scheduler")
+                self._thread.daemon = True
+                self._thread.start()
+            self._condition.notify()
+
+    def call_later(self, delay, func):
+        """ (Scheduler, float, callable) -> NoneType """
+        self.call_at(time.monotonic() + delay, func)
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._queue or self._queue[0][0] > time.monotonic():
+                    timeout = self._queue[0][0] - time.monotonic() if self._queue else None
+                    self._condition.wait(timeout)
+                _, _, func = heapq.heappop(self._queue)
+            try:
+                func()
+            except Exception:
+                pass
+
+SCHEDULER = Scheduler()
+
+class FakeEngine(RtcEngine):
+    """
+    Headless engine for tests and load generation.
+
+    join() connects after a random delay in `join_latency`, then every
+    `volume_interval` seconds reports a volume for each speaker: a speaker talks with
+    probability `talk_rate` per report. Quality is reported every 2 seconds.
+    The speakers are given to join() and kept up to date with apply_diff().
+    """
+
+    name = "fake"
+
+    def __init__(self, join_latency=(0.05, 0.3), volume_interval=0.5, talk_rate=0.3,
+                 seed=None, scheduler=None):
+        """ (FakeEngine, (float, float), float, float, int, Scheduler) -> NoneType """
+        super().__init__()
+        self.join_latency = join_latency
+        self.volume_interval = volume_interval
+        self.talk_rate = talk_rate
+        self.rng = random.Random(seed)
+        self.scheduler = scheduler or SCHEDULER
+        self.speakers = []
+        self.muted = False
+        self.profile = None
+        self.joined = False
+        self._session = 0
+        self.stats = {"joins": 0, "volume_events": 0, "quality_events": 0}
+
+    def set_audio_profile(self, profile="music_high_quality_stereo", scenario="game_streaming"):
+        self.profile = (profile, scenario)
+        return True
+
+    def set_speakers(self, user_ids):
+        """ (FakeEngine, list of int) -> NoneType
+
+        Users whose voice is simulated.
+        """
+        self.speakers = [int(user_id) for user_id in user_ids]
+
+    def apply_diff(self, diff):
+        """ (FakeEngine, dict) -> NoneType
+
+        Follow the room: users who get on stage start talking, those who leave it stop.
+        diff: roster.diff_rosters(previous, current), e.g. from a RoomWatcher
+        """
+        speakers = set(self.speakers)
+        for user_id, entry in diff["joined"].items():
+            if entry.get("is_speaker"):
+                speakers.add(int(user_id))
+        for user_id in diff["left"]:
+            speakers.discard(int(user_id))
+        for user_id, fields in diff["changed"].items():
+            if fields.get("is_speaker"):
+                speakers.add(int(user_id))
+            elif "is_speaker" in fields:
+                speakers.discard(int(user_id))
+        self.speakers = sorted(speakers)
+
+    def join(self, token, channel, user_id, speakers=None, **kwargs):
+        self.channel = channel
+        self.user_id = int(user_id)
+        if speakers is not None:
+            self.set_speakers(speakers)
+        self._session += 1
+        session = self._session
+        started = time.monotonic()
+        delay = self.rng.uniform(*self.join_latency)
+
+        def joined():
+            if session != self._session:
+                return
+            self.joined = True
+            self.stats["joins"] += 1
+            self._emit("join", channel, self.user_id, time.monotonic() - started)
+            self.scheduler.call_later(self.volume_interval, lambda: self._tick(session, 0))
+
+        self.scheduler.call_later(delay, joined)
+        return True
+
+    def _tick(self, session, count):
+        if session != self._session:
+            return
+        speakers = [
+            (user_id, self.rng.randint(30, 255)) for user_id in self.speakers
+            if not (self.muted and user_id == self.user_id) and self.rng.random() < self.talk_rate
+        ]
+        self.stats["volume_events"] += 1
+        self._emit("volume", speakers)
+        if count % max(1, int(2 / self.volume_interval)) == 0:
+            self.stats["quality_events"] += 1
+            self._emit("quality", self.user_id, self.rng.randint(1, 3), self.rng.randint(1, 3))
+        self.scheduler.call_later(self.volume_interval, lambda: self._tick(session, count + 1))
+
+    def leave(self):
+        self._session += 1
+        self.joined = False
+        self.channel = None
+
+    def mute(self, muted=True):
+        self.muted = muted
+
+ENGINES = {
+    "agora": AgoraEngine,
+    "fake": FakeEngine,
+}
+
+def make_engine(kind="agora", **kwargs):
+    """ (str) -> RtcEngine
+
+    Build an engine by name. Raises ImportError if its SDK is not installed.
+    """
+    if kind not in ENGINES:
+        raise ValueError(f"Unknown RTC engine: {kind} (choose from {', '.join(ENGINES)})")
+    return ENGINES[kind](**kwargs)
@@ -0,0 +1,284 @@
+"""
+schedule.py
+
+Local calendar of upcoming events kept in SQLite.
+
+Events from `get_events` / `get_events_to_start` / `get_events_for_user` are upserted by event_id and indexed
+by start time, club and host. Incremental syncs only walk the pages covering the next
+`horizon` seconds, which is where new, edited and cancelled events matter; a full walk
+of every page is done when the last one is older than `full_sync_interval`.
+
+Every event remembers which of these sources returned it. A sync only removes the
+events that a source it just read no longer returns, so a sync without the to_start or
+for_user sources keeps the events only those sources know about.
+"""
+
+import json
+import time
+import sqlite3
+import threading
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    event_id INTEGER PRIMARY KEY,
+    event_hashid TEXT,
+    name TEXT,
+    description TEXT,
+    time_start_epoch INTEGER NOT NULL,
+    club_id INTEGER,
+    is_member_only INTEGER,
+    payload TEXT NOT NULL,
+    synced_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS events_time ON events (time_start_epoch);
+CREATE INDEX IF NOT EXISTS events_club ON events (club_id, time_start_epoch);
+CREATE INDEX IF NOT EXISTS events_hashid ON events (event_hashid);
+CREATE TABLE IF NOT EXISTS event_hosts (
+    event_id INTEGER NOT NULL,
+    user_id INTEGER NOT NULL,
+    PRIMARY KEY (event_id, user_id)
+);
+CREATE INDEX IF NOT EXISTS event_hosts_user ON event_hosts (user_id);
+CREATE TABLE IF NOT EXISTS event_sources (
+    event_id INTEGER NOT NULL,
+    source TEXT NOT NULL,
+    synced_at REAL NOT NULL,
+    PRIMARY KEY (event_id, source)
+);
+CREATE TABLE IF NOT EXISTS sync_state (
+    name TEXT PRIMARY KEY,
+    value REAL
+);
+INSERT OR IGNORE INTO event_sources
+    SELECT event_id, 'events', synced_at FROM events
+    WHERE event_id NOT IN (SELECT event_id FROM event_sources);
+"""
+
+# Where synced events come from
+SOURCES = ("events", "to_start", "for_user")
+
+def _event_hashid(event):
+    """ (dict) -> str
+
+    event_hashid is either given or the last part of the event url.
+    """
+    if event.get("event_hashid"):
+        return event["event_hashid"]
+    url = event.get("url") or ""
+    return url.rstrip("/").rsplit("/", 1)[-1] or None
+
+class EventCalendar:
+    """
+    EventCalendar Class
+
+    >>> calendar = EventCalendar("events.db")
+    >>> calendar.sync(clubhouse)
+    >>> calendar.upcoming(3600, club_ids=[1234, 2345])
+    [{'event_id': ..., 'name': ..., 'time_start_epoch': ...}, ...]
+    """
+
+    def __init__(self, filename="events.db", horizon=86400, full_sync_interval=21600):
+        """ (EventCalendar, str, int, int) -> NoneType
+        Open (or create) the database
+        """
+        self.horizon = horizon
+        self.full_sync_interval = full_sync_interval
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(filename, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        with self._db:
+            self._db.executescript(SCHEMA)
+
+    def close(self):
+        """ (EventCalendar) -> NoneType """
+        self._db.close()
+
+    def _get_state(self, name, default=0):
+        """ (EventCalendar, str, float) -> float """
+        row = self._db.execute("SELECT value FROM sync_state WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else default
+
+    def _set_state(self, name, value):
+        """ (EventCalendar, str, float) -> NoneType """
+        self._db.execute("INSERT OR REPLACE INTO sync_state (name, value) VALUES (?, ?)", (name, value))
+
+    def upsert(self, events, synced_at=None, source="events"):
+        """ (EventCalendar, list of dict, float, str) -> int
+
+        Insert or update events returned by source (one of SOURCES).
+        return number of rows written
+        """
+        synced_at = synced_at or time.time()
+        rows = 0
+        with self._lock, self._db:
+            for event in events:
+                if event.get("event_id") is None or event.get("time_start_epoch") is None:
+                    continue
+                event_id = int(event["event_id"])
+                club = event.get("club") or {}
+                self._db.execute(
+                    "INSERT OR REPLACE INTO events VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        event_id,
+                        _event_hashid(event),
+                        event.get("name"),
+                        event.get("description"),
+                        int(event["time_start_epoch"]),
+                        club.get("club_id", event.get("club_id")),
+                        int(bool(event.get("is_member_only"))),
+                        json.dumps(event, ensure_ascii=False),
+                        synced_at,
+                    )
+                )
+                self._db.execute("DELETE FROM event_hosts WHERE event_id = ?", (event_id,))
+                self._db.executemany(
+                    "INSERT OR IGNORE INTO event_hosts VALUES (?, ?)",
+                    [(event_id, int(host["user_id"])) for host in event.get("hosts") or () if host.get("user_id")]
+                )
+                self._db.execute(
+                    "INSERT OR REPLACE INTO event_sources VALUES (?, ?, ?)", (event_id, source, synced_at)
+                )
+                rows += 1
+        return rows
+
+    @staticmethod
+    def _checked(result, source):
+        """ (dict, str) -> dict
+
+        Raise if the server reported a failure.
+        """
+        if not result.get("success", True):
+            raise Exception(f"Failed to fetch events ({source}): {result}")
+        return result
+
+    def sync(self, client, full=None, page_size=25, include_to_start=False, include_for_user=False, now=None):
+        """ (EventCalendar, Clubhouse, bool, int, bool, bool, int) -> dict
+
+        Sync upcoming events. Unless full is True (or the last full sync is too old)
+        paging stops once the events start after now + horizon.
+        Events inside the synced window that a source read by this sync no longer returns
+        are removed, unless another source still returns them.
+        include_to_start: also sync get_events_to_start
+        include_for_user: also sync your own events (get_events_for_user), same paging
+        return {"pages": n, "events": n, "removed": n, "full": bool}
+        """
+        now = now or int(time.time())
+        if full is None:
+            full = now - self._get_state("last_full_sync") >= self.full_sync_interval
+        limit = None if full else now + self.horizon
+        synced_at = time.time()
+
+        page = 1
+        pages = events = 0
+        last_start = now
+        complete = False
+        while True:
+            result = self._checked(
+                client.get_events(is_filtered=False, page_size=page_size, page=page), f"page {page}"
+            )
+            items = result.get("events") or []
+            pages += 1
+            events += self.upsert(items, synced_at)
+            if items:
+                last_start = max(last_start, max(int(e.get("time_start_epoch") or 0) for e in items))
+            page = result.get("next") if items else None
+            if not page:
+                complete = True
+                break
+            if limit and last_start >= limit:
+                break
+        # Events we did not see are only gone if they fall inside the part of the list
+        # that was read. Ties with the last start time may still be on the next page.
+        windows = {"events": 2 ** 62 if complete else last_start - 1}
+
+        if include_to_start:
+            result = self._checked(client.get_events_to_start(), "to start")
+            events += self.upsert(result.get("events") or [], synced_at, "to_start")
+            windows["to_start"] = 2 ** 62
+
+        if include_for_user:
+            page = 1
+            last_start = now
+            while True:
+                result = self._checked(
+                    client.get_events_for_user(page_size=page_size, page=page), f"user page {page}"
+                )
+                items = result.get("events") or []
+                pages += 1
+                events += self.upsert(items, synced_at, "for_user")
+                if items:
+                    last_start = max(last_start, max(int(e.get("time_start_epoch") or 0) for e in items))
+                page = result.get("next") if items else None
+                if not page:
+                    windows["for_user"] = 2 ** 62
+                    break
+                if limit and last_start >= limit:
+                    windows["for_user"] = last_start - 1
+                    break
+
+        with self._lock, self._db:
+            for source, window_end in windows.items():
+                self._db.execute(
+                    "DELETE FROM event_sources WHERE source = ? AND synced_at < ? AND event_id IN "
+                    "(SELECT event_id FROM events WHERE time_start_epoch >= ? AND time_start_epoch <= ?)",
+                    (source, synced_at, now, window_end)
+                )
+            removed = self._db.execute(
+                "DELETE FROM events WHERE event_id NOT IN (SELECT event_id FROM event_sources)"
+            ).rowcount
+            self._db.execute(
+                "DELETE FROM event_hosts WHERE event_id NOT IN (SELECT event_id FROM events)"
+            )
+            self._set_state("last_sync", synced_at)
+            if full:
+                self._set_state("last_full_sync", now)
+        return {"pages": pages, "events": events, "removed": removed, "full": full}
+
+    def prune(self, before=None):
+        """ (EventCalendar, int) -> int
+
+        Delete events that started before the given epoch (default: one hour ago).
+        """
+        before = before or int(time.time()) - 3600
+        with self._lock, self._db:
+            removed = self._db.execute("DELETE FROM events WHERE time_start_epoch < ?", (before,)).rowcount
+            self._db.execute("DELETE FROM event_hosts WHERE event_id NOT IN (SELECT event_id FROM events)")
+            self._db.execute("DELETE FROM event_sources WHERE event_id NOT IN (SELECT event_id FROM events)")
+        return removed
+
+    def _query(self, sql, args):
+        """ (EventCalendar, str, tuple) -> list of dict """
+        with self._lock:
+            rows = self._db.execute(sql, args).fetchall()
+        return [json.loads(row["payload"]) for row in rows]
+
+    def upcoming(self, within=3600, club_ids=None, host_ids=None, now=None):
+        """ (EventCalendar, int, list of int, list of int, int) -> list of dict
+
+        Events starting in the next `within` seconds, optionally limited to some clubs
+        and/or hosts. Answered from the local database only.
+        """
+        now = now or int(time.time())
+        sql = "SELECT DISTINCT e.payload FROM events e"
+        where = ["e.time_start_epoch >= ?", "e.time_start_epoch <= ?"]
+        args = [now, now + within]
+        if host_ids is not None:
+            sql += " JOIN event_hosts h ON h.event_id = e.event_id"
+            where.append("h.user_id IN ({})".format(",".join("?" * len(host_ids)) or "NULL"))
+            args.extend(int(i) for i in host_ids)
+        if club_ids is not None:
+            where.append("e.club_id IN ({})".format(",".join("?" * len(club_ids)) or "NULL"))
+            args.extend(int(i) for i in club_ids)
+        sql += " WHERE " + " AND ".join(where) + " ORDER BY e.time_start_epoch"
+        return self._query(sql, tuple(args))
+
+    def get(self, event_id=None, event_hashid=None):
+        """ (EventCalendar, int, str) -> dict
+
+        Get one event by event_id or event_hashid. return None if unknown
+        """
+        if event_id is not None:
+            events = self._query("SELECT payload FROM events WHERE event_id = ?", (int(event_id),))
+        else:
+            events = self._query("SELECT payload FROM events WHERE event_hashid = ?", (event_hashid,))
+        return events[0] if events else None
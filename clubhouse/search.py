@@ -0,0 +1,160 @@
+"""
+search.py
+
+As-you-type search on top of `search_users` / `search_clubs`.
+
+Keystrokes are debounced, results of superseded queries are dropped, and results are
+kept in a small LRU cache. When a cached result for a prefix of the query is complete
+(the server returned everything it had), refinements are filtered locally.
+"""
+
+import threading
+from collections import OrderedDict
+
+class SearchHelper:
+    """
+    SearchHelper Class
+
+    >>> search = SearchHelper(clubhouse, kind="users")
+    >>> search.type("elo", print)   # called on every keystroke
+    >>> search.type("elon", print)  # only "elon" hits the API
+    """
+
+    # Fields matched when refining a cached result locally
+    MATCH_FIELDS = {
+        "users": ("name", "username", "displayname"),
+        "clubs": ("name",),
+    }
+
+    def __init__(self, client, kind="users", delay=0.3, cache_size=128):
+        """ (SearchHelper, Clubhouse, str, float, int) -> NoneType
+        kind is either "users" or "clubs"; delay is the debounce time in seconds
+        """
+        if kind not in self.MATCH_FIELDS:
+            raise Exception(f"Unknown search kind: {kind}")
+        self.client = client
+        self.kind = kind
+        self.delay = delay
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self._timer = None
+        self._generation = 0
+        self.stats = {"requests": 0, "hits": 0, "refined": 0, "superseded": 0}
+
+    @staticmethod
+    def _normalize(query):
+        """ (str) -> str """
+        return " ".join(query.lower().split())
+
+    def _is_complete(self, result):
+        """ (SearchHelper, dict) -> bool
+
+        True if the server returned every match for the query. Without a count the
+        page may be truncated, so it is not.
+        """
+        items = result.get(self.kind) or []
+        if result.get("next"):
+            return False
+        count = result.get("count")
+        return count is not None and count <= len(items)
+
+    def _cache_get(self, key):
+        """ (SearchHelper, tuple) -> dict """
+        with self._lock:
+            result = self._cache.get(key)
+            if result is not None:
+                self._cache.move_to_end(key)
+            return result
+
+    def _cache_put(self, key, result):
+        """ (SearchHelper, tuple, dict) -> NoneType """
+        with self._lock:
+            self._cache[key] = result
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def _refine(self, query, flags):
+        """ (SearchHelper, str, tuple) -> dict
+
+        Filter a complete cached result of a prefix of query. return None if there is none
+        """
+        for end in range(len(query) - 1, 0, -1):
+            cached = self._cache_get((query[:end], flags))
+            if cached is None or not self._is_complete(cached):
+                continue
+            terms = query.split()
+            fields = self.MATCH_FIELDS[self.kind]
+            items = [
+                item for item in cached.get(self.kind) or []
+                if all(
+                    any(term in str(item.get(field) or "").lower() for field in fields)
+                    for term in terms
+                )
+            ]
+            return {"success": True, self.kind: items, "count": len(items), "next": None}
+        return None
+
+    def search(self, query, followers_only=False, following_only=False, cofollows_only=False):
+        """ (SearchHelper, str, bool, bool, bool) -> dict
+
+        Search right away, served from the cache whenever possible.
+        """
+        query = self._normalize(query)
+        flags = (followers_only, following_only, cofollows_only)
+        key = (query, flags)
+        result = self._cache_get(key)
+        if result is not None:
+            self.stats["hits"] += 1
+            return result
+        result = self._refine(query, flags)
+        if result is not None:
+            self.stats["refined"] += 1
+        else:
+            self.stats["requests"] += 1
+            method = self.client.search_users if self.kind == "users" else self.client.search_clubs
+            result = method(query, *flags)
+            if not result.get("success", True):
+                return result
+        self._cache_put(key, result)
+        return result
+
+    def type(self, query, callback, followers_only=False, following_only=False, cofollows_only=False):
+        """ (SearchHelper, str, callable, bool, bool, bool) -> NoneType
+
+        Schedule a search for query after the debounce delay.
+        Any pending or running search is superseded; callback(query, result) is only
+        called for the latest query.
+        """
+        with self._lock:
+            if self._timer:
+                self._timer.cancel()
+            self._generation += 1
+            generation = self._generation
+
+        def _run():
+            try:
+                result = self.search(query, followers_only, following_only, cofollows_only)
+            except Exception as error:
+                result = {"success": False, "error_message": str(error)}
+            if generation != self._generation:
+                self.stats["superseded"] += 1
+                return
+            callback(query, result)
+
+        timer = threading.Timer(self.delay, _run)
+        timer.daemon = True
+        with self._lock:
+            self._timer = timer
+        timer.start()
+
+    def cancel(self):
+        """ (SearchHelper) -> NoneType
+
+        Cancel the pending search and ignore the one in flight.
+        """
+        with self._lock:
+            if self._timer:
+                self._timer.cancel()
+            self._generation += 1
@@ -0,0 +1,213 @@
+"""
+topics.py
+
+Local catalog of the topic tree returned by `get_all_topics`.
+
+The tree is fetched once, flattened into id -> topic and title -> id indexes and saved
+to disk. Later runs load the flattened file directly and only hit the API again once
+the file is older than `max_age` or was written for another app version.
+
+This is a local cache with a TTL only: get_all_topics sends no validator (ETag /
+Last-Modified), so a refresh always downloads the whole tree.
+
+start() loads it in a background thread, so it is in memory by the time it is needed;
+after that only refresh_if_stale() is needed, which does not touch the disk.
+"""
+
+import time
+import threading
+
+from .utils import atomic_write_json, read_json
+
+class TopicCatalog:
+    """
+    TopicCatalog Class
+
+    >>> catalog = TopicCatalog(clubhouse)
+    >>> catalog.load()
+    >>> catalog.find("Startups")
+    42
+    """
+
+    # Bump this when the saved layout changes.
+    FORMAT_VERSION = 2
+
+    def __init__(self, client=None, filename="topics.json", max_age=86400):
+        """ (TopicCatalog, Clubhouse, str, int) -> NoneType
+        Set the client used for refreshing, the cache file and its lifetime in seconds
+        """
+        self.client = client
+        self.filename = filename
+        self.max_age = max_age
+        self.fetched_at = 0
+        self.by_id = {}
+        self.by_title = {}
+        self.loaded = threading.Event()
+        self.load_error = None
+
+    def _version(self):
+        """ (TopicCatalog) -> str
+
+        Version string of the saved catalog. A different app build invalidates the file.
+        """
+        build = getattr(self.client, "API_BUILD_VERSION", "") if self.client else ""
+        return f"{self.FORMAT_VERSION}:{build}"
+
+    @staticmethod
+    def flatten(topics, parent_id=None, result=None):
+        """ (list of dict, int, dict) -> dict
+
+        Walk the nested topic tree and return {topic_id: topic}.
+        Each topic keeps its fields (except the nested list) and gains `parent_id`.
+        """
+        if result is None:
+            result = {}
+        for topic in topics or ():
+            topic_id = topic.get("id", topic.get("topic_id"))
+            if topic_id is None:
+                continue
+            entry = {k: v for k, v in topic.items() if k != "topics"}
+            entry["parent_id"] = parent_id
+            result[int(topic_id)] = entry
+            TopicCatalog.flatten(topic.get("topics"), int(topic_id), result)
+        return result
+
+    def _index(self, by_id):
+        """ (TopicCatalog, dict) -> NoneType
+
+        Build the lookup tables from a flattened catalog.
+        """
+        self.by_id = by_id
+        self.by_title = {}
+        for topic_id, topic in by_id.items():
+            for key in ("title", "abbreviated_title"):
+                if topic.get(key):
+                    self.by_title.setdefault(topic[key].strip().lower(), topic_id)
+
+    def load(self, force=False):
+        """ (TopicCatalog, bool) -> bool
+
+        Load the catalog from disk, refreshing it from the API when it is stale.
+        return True if the API was called
+        """
+        if not force:
+            saved = read_json(self.filename)
+            if saved and saved.get("version") == self._version():
+                self.fetched_at = saved.get("fetched_at", 0)
+                self._index({int(k): v for k, v in saved.get("topics", {}).items()})
+                if time.time() - self.fetched_at < self.max_age or not self.client:
+                    return False
+        if not self.client:
+            return False
+        self.refresh()
+        return True
+
+    @property
+    def is_stale(self):
+        """ (TopicCatalog) -> bool
+
+        True when the catalog in memory is older than max_age.
+        """
+        return time.time() - self.fetched_at >= self.max_age
+
+    def start(self):
+        """ (TopicCatalog) -> TopicCatalog
+
+        load() in a background thread. `loaded` is set when it is done, and
+        `load_error` keeps what it raised.
+        """
+        def _load():
+            try:
+                self.load()
+            except Exception as error:
+                self.load_error = error
+            finally:
+                self.loaded.set()
+
+        threading.Thread(target=_load, name="topic-catalog", daemon=True).start()
+        return self
+
+    def refresh_if_stale(self):
+        """ (TopicCatalog) -> bool
+
+        Refresh from the API if the catalog in memory is older than max_age.
+        return True if the API was called
+        """
+        if not self.client or not self.is_stale:
+            return False
+        self.refresh()
+        return True
+
+    def refresh(self):
+        """ (TopicCatalog) -> bool
+
+        Fetch the topic tree and save it. return True if the topics have changed
+        """
+        result = self.client.get_all_topics()
+        if not result.get("success", True) or "topics" not in result:
+            raise Exception(f"Failed to fetch topics: {result}")
+        by_id = self.flatten(result["topics"])
+        changed = by_id != self.by_id
+        if changed:
+            self._index(by_id)
+        self.fetched_at = time.time()
+        atomic_write_json(self.filename, {
+            "version": self._version(),
+            "fetched_at": self.fetched_at,
+            "topics": self.by_id,
+        })
+        return changed
+
+    def get(self, topic_id):
+        """ (TopicCatalog, int) -> dict
+
+        Get the topic for topic_id. return None if it does not exist
+        """
+        return self.by_id.get(int(topic_id))
+
+    def find(self, title):
+        """ (TopicCatalog, str) -> int
+
+        Get the topic_id for a title (case insensitive). return None if not found
+        """
+        return self.by_title.get(title.strip().lower())
+
+    def resolve(self, topic):
+        """ (TopicCatalog, int or str) -> int
+
+        Accept either a topic_id or a title and return the topic_id.
+        """
+        if isinstance(topic, int) or str(topic).isdigit():
+            return int(topic)
+        topic_id = self.find(topic)
+        if topic_id is None:
+            raise Exception(f"Unknown topic: {topic}")
+        return topic_id
+
+    def children(self, topic_id):
+        """ (TopicCatalog, int) -> list of dict
+
+        Get the direct sub-topics of the given topic.
+        """
+        return [t for t in self.by_id.values() if t["parent_id"] == int(topic_id)]
+
+    def get_topic(self, topic):
+        """ (TopicCatalog, int or str) -> dict
+
+        Shortcut for Clubhouse.get_topic with a title or an id.
+        """
+        return self.client.get_topic(self.resolve(topic))
+
+    def get_clubs_for_topic(self, topic, page_size=25, page=1):
+        """ (TopicCatalog, int or str, int, int) -> dict
+
+        Shortcut for Clubhouse.get_clubs_for_topic with a title or an id.
+        """
+        return self.client.get_clubs_for_topic(self.resolve(topic), page_size, page)
+
+    def add_user_topic(self, topic):
+        """ (TopicCatalog, int or str) -> dict
+
+        Shortcut for Clubhouse.add_user_topic with a title or an id.
+        """
+        return self.client.add_user_topic(topic_id=self.resolve(topic))
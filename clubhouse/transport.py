@@ -0,0 +1,250 @@
+"""
+transport.py
+
+HTTP backends for the Clubhouse client.
+
+Every backend has get(url, headers, params) and post(url, headers, json, files) and
+returns an object with .status_code and .json(), like a requests response. When no
+usable answer came back (network error, timeout, a body that is not JSON), one of
+TRANSPORT_ERRORS is raised.
+
+- RequestsTransport: a requests.Session, with pooled keep-alive connections (default)
+- HTTP2Transport: an httpx client with HTTP/2, so concurrent calls share one connection
+  (needs `pip install httpx[http2]`)
+- FakeTransport: answers from memory, for tests and offline runs
+
+    >>> clubhouse = Clubhouse(user_id, user_token, user_device, transport=HTTP2Transport())
+    >>> clubhouse = Clubhouse(transport="fake")
+"""
+
+import time
+import json as jsonlib
+import threading
+from urllib.parse import urlsplit, parse_qsl
+
+# requests' exceptions are OSErrors, HTTP2Transport turns httpx's into ConnectionError,
+# and .json() on a body that is not JSON raises a ValueError.
+TRANSPORT_ERRORS = (OSError, ValueError)
+
+class Transport:
+    """
+    Transport Class
+
+    Base class of the backends.
+    """
+
+    name = "transport"
+    # time.monotonic() of the last request (None: never used), see warmup.Warmer
+    last_used = None
+
+    def get(self, url, headers=None, params=None):
+        """ (Transport, str, dict, dict) -> response """
+        raise NotImplementedError
+
+    def post(self, url, headers=None, json=None, files=None):
+        """ (Transport, str, dict, object, dict) -> response """
+        raise NotImplementedError
+
+    def preconnect(self, url, connections=1):
+        """ (Transport, str, int) -> int
+
+        Open pooled connections (TCP, and TLS for https) to url's host without
+        sending a request. Connections already open are kept, dropped ones replaced.
+        return the number of open connections (0: not supported)
+        """
+        return 0
+
+    def close(self):
+        """ (Transport) -> NoneType """
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+class RequestsTransport(Transport):
+    """ requests.Session with a connection pool sized for concurrent callers. """
+
+    name = "requests"
+
+    def __init__(self, pool_size=32, timeout=30):
+        """ (RequestsTransport, int, float) -> NoneType """
+        import requests
+        from requests.adapters import HTTPAdapter
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def get(self, url, headers=None, params=None):
+        self.last_used = time.monotonic()
+        return self.session.get(url, headers=headers, params=params, timeout=self.timeout)
+
+    def post(self, url, headers=None, json=None, files=None):
+        self.last_used = time.monotonic()
+        return self.session.post(url, headers=headers, json=json, files=files, timeout=self.timeout)
+
+    def preconnect(self, url, connections=1):
+        from urllib3.util.connection import is_connection_dropped
+        # Check connections out of the session's own urllib3 pool, connect them and
+        # put them back, so the next requests to this host find them open.
+        pool = self.session.get_adapter(url).poolmanager.connection_from_url(url)
+        opened = []
+        try:
+            for _ in range(connections):
+                conn = pool._get_conn()
+                try:
+                    if getattr(conn, "sock", None) is not None:
+                        if not is_connection_dropped(conn):
+                            opened.append(conn)
+                            continue
+                        # Closed by the server while idle
+                        conn.close()
+                    conn.timeout = self.timeout
+                    conn.connect()
+                except Exception:
+                    conn.close()
+                    pool._put_conn(None)
+                    raise
+                opened.append(conn)
+        finally:
+            for conn in opened:
+                pool._put_conn(conn)
+        return len(opened)
+
+    def close(self):
+        self.session.close()
+
+class HTTP2Transport(Transport):
+    """
+    httpx client with HTTP/2 enabled.
+
+    Over HTTPS the server picks HTTP/2 through ALPN and all concurrent calls are
+    multiplexed on one connection. Plain http:// URLs stay on HTTP/1.1 unless
+    prior_knowledge is set (the server must then speak h2c).
+    """
+
+    name = "http2"
+
+    def __init__(self, timeout=30, max_connections=100, prior_knowledge=False):
+        """ (HTTP2Transport, float, int, bool) -> NoneType """
+        try:
+            import httpx
+        except ImportError as error:
+            raise ImportError("HTTP2Transport needs httpx: pip install 'httpx[http2]'") from error
+        self._errors = httpx.TransportError
+        self.client = httpx.Client(
+            http1=not prior_knowledge,
+            http2=True,
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+        )
+
+    @staticmethod
+    def _headers(headers):
+        # Connection-specific headers are not allowed in HTTP/2 requests.
+        return {k: v for k, v in (headers or {}).items() if k.lower() != "connection"}
+
+    def get(self, url, headers=None, params=None):
+        self.last_used = time.monotonic()
+        try:
+            return self.client.get(url, headers=self._headers(headers), params=params)
+        except self._errors as error:
+            raise ConnectionError(str(error)) from error
+
+    def post(self, url, headers=None, json=None, files=None):
+        self.last_used = time.monotonic()
+        try:
+            return self.client.post(url, headers=self._headers(headers), json=json, files=files)
+        except self._errors as error:
+            raise ConnectionError(str(error)) from error
+
+    def preconnect(self, url, connections=1):
+        # httpx only connects to send a request. Over HTTP/2 the first call opens the
+        # one connection every later call shares, so warming up would save one handshake.
+        return 0
+
+    def close(self):
+        self.client.close()
+
+class FakeResponse:
+    """ Minimal response object returned by FakeTransport. """
+
+    def __init__(self, payload, status_code=200):
+        self.status_code = status_code
+        self.text = jsonlib.dumps(payload)
+
+    def json(self):
+        """ (FakeResponse) -> object
+
+        A fresh copy every time, like decoding a real body.
+        """
+        return jsonlib.loads(self.text)
+
+class FakeTransport(Transport):
+    """
+    In-memory backend.
+
+    Answers are looked up by endpoint name (the last part of the URL path). An answer
+    is either a payload or a function(params) -> payload; params are the JSON body or
+    the query string. Unknown endpoints answer {"success": True}. Every call is kept
+    in `calls` as (method, endpoint, params, headers).
+
+    >>> fake = FakeTransport({"get_channels": {"success": True, "channels": []}})
+    >>> Clubhouse(transport=fake).get_channels()
+    {'success': True, 'channels': []}
+    """
+
+    name = "fake"
+
+    def __init__(self, routes=None, default=None):
+        """ (FakeTransport, dict, object) -> NoneType """
+        self.routes = dict(routes or {})
+        self.default = {"success": True} if default is None else default
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def route(self, endpoint, answer):
+        """ (FakeTransport, str, object) -> NoneType """
+        self.routes[endpoint] = answer
+
+    def _answer(self, method, url, headers, params):
+        parts = urlsplit(url)
+        endpoint = parts.path.rstrip("/").rsplit("/", 1)[-1]
+        if method == "GET":
+            params = dict(parse_qsl(parts.query), **(params or {}))
+        with self._lock:
+            self.calls.append((method, endpoint, params, dict(headers or {})))
+        answer = self.routes.get(endpoint, self.default)
+        if callable(answer):
+            answer = answer(params)
+        if isinstance(answer, FakeResponse):
+            return answer
+        return FakeResponse(answer)
+
+    def get(self, url, headers=None, params=None):
+        return self._answer("GET", url, headers, params)
+
+    def post(self, url, headers=None, json=None, files=None):
+        return self._answer("POST", url, headers, json if files is None else {"files": sorted(files)})
+
+TRANSPORTS = {
+    "requests": RequestsTransport,
+    "http2": HTTP2Transport,
+    "fake": FakeTransport,
+}
+
+def make_transport(transport=None):
+    """ (str or Transport) -> Transport
+
+    Build a backend from its name ("requests", "http2", "fake"), or return the given one.
+    """
+    if transport is None:
+        transport = "requests"
+    if isinstance(transport, str):
+        if transport not in TRANSPORTS:
+            raise ValueError(f"Unknown transport: {transport} (choose from {', '.join(TRANSPORTS)})")
+        return TRANSPORTS[transport]()
+    return transport
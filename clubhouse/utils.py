@@ -0,0 +1,68 @@
+"""
+utils.py
+
+Small helpers shared by the clubhouse modules.
+"""
+
+import os
+import json
+import tempfile
+
+def atomic_write(filename, data, mode="w"):
+    """ (str, str or bytes, str) -> NoneType
+
+    Write data to a temporary file next to `filename` and rename it over the target,
+    so readers never see a half-written file. Text is written as UTF-8.
+    """
+    directory = os.path.dirname(os.path.abspath(filename))
+    fd, tmp_name = tempfile.mkstemp(prefix=".tmp-", dir=directory)
+    try:
+        with os.fdopen(fd, mode, encoding=None if "b" in mode else "utf-8") as tmp_file:
+            tmp_file.write(data)
+            tmp_file.flush()
+            os.fsync(tmp_file.fileno())
+        os.replace(tmp_name, filename)
+    except BaseException:
+        if os.path.exists(tmp_name):
+            os.remove(tmp_name)
+        raise
+
+def atomic_write_json(filename, obj):
+    """ (str, object) -> NoneType
+
+    Dump obj as JSON with atomic_write
+    """
+    atomic_write(filename, json.dumps(obj, ensure_ascii=False))
+
+def read_json(filename, default=None):
+    """ (str, object) -> object
+
+    Read a JSON file. return default when the file is missing or broken
+    """
+    try:
+        with open(filename, encoding="utf-8") as json_file:
+            return json.load(json_file)
+    except (OSError, ValueError):
+        return default
+
+def iter_pages(method, key, *args, page_size=50, max_pages=None, rate_limiter=None, **kwargs):
+    """ (callable, str, ..., int, int, RateLimiter) -> generator of object
+
+    Yield every item of a paged endpoint (one that takes page_size/page and answers
+    with `next`). key is the name of the list in the response, e.g. "users".
+
+    >>> for user in iter_pages(clubhouse.get_following, "users", 1234):
+    ...     print(user['username'])
+    """
+    page = 1
+    pages = 0
+    while page and (max_pages is None or pages < max_pages):
+        if rate_limiter:
+            rate_limiter.acquire()
+        result = method(*args, page_size=page_size, page=page, **kwargs)
+        if not result.get("success", True):
+            raise Exception(f"Failed to fetch page {page}: {result}")
+        items = result.get(key) or []
+        yield from items
+        pages += 1
+        page = result.get("next") if items else None
@@ -0,0 +1,183 @@
+"""
+warmup.py
+
+Get the connection to the API ready before the first real call needs it.
+
+- DNSCache keeps getaddrinfo answers for `ttl` seconds. install() puts it in front of
+  socket.getaddrinfo for the whole process, so it is opt-in.
+- Warmer resolves API_URL's host and opens pooled connections (TCP + TLS) in a
+  background thread while the client is starting. No HTTP request is sent: the
+  transport's preconnect() only connects. Servers close connections that stay idle
+  longer than their keep-alive, so once the transport has not been used for
+  `keepalive` seconds the connections are opened again, and again every `keepalive`
+  seconds while it stays idle (up to `max_idle` seconds, then the next call connects
+  by itself). The time each step took is kept in `timings`.
+  HTTP2Transport cannot connect without a request (httpx has no way to), so it is
+  not warmed; its single multiplexed connection is opened by the first call.
+
+    >>> warmer = Warmer(clubhouse).start()
+    >>> ...                                   # prompts, config, ...
+    >>> warmer.timings
+    {'dns_ms': 21.3, 'connect_ms': 143.9, 'connections': 2, 'warmed_at': 1616223600.0, 'rewarms': 0}
+"""
+
+import time
+import socket
+import threading
+from urllib.parse import urlsplit
+
+class DNSCache:
+    """
+    DNSCache Class
+
+    >>> cache = DNSCache(ttl=300).install()
+    """
+
+    def __init__(self, ttl=300, resolver=None):
+        """ (DNSCache, float, callable) -> NoneType
+        resolver: the real getaddrinfo (default: socket.getaddrinfo at creation)
+        """
+        self.ttl = ttl
+        self.resolver = resolver or socket.getaddrinfo
+        self._entries = {}
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0}
+
+    def getaddrinfo(self, host, port, family=0, type=0, proto=0, flags=0):
+        """ Same signature and result as socket.getaddrinfo, cached. """
+        key = (host, port, family, type, proto, flags)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > now:
+                self.stats["hits"] += 1
+                return entry[1]
+            self.stats["misses"] += 1
+        result = self.resolver(host, port, family, type, proto, flags)
+        with self._lock:
+            self._entries[key] = (now + self.ttl, result)
+        return result
+
+    def resolve(self, host, port=443):
+        """ (DNSCache, str, int) -> list
+
+        Resolve host now (for TCP) and keep the answer.
+        """
+        return self.getaddrinfo(host, port, 0, socket.SOCK_STREAM)
+
+    def clear(self):
+        """ (DNSCache) -> NoneType """
+        with self._lock:
+            self._entries.clear()
+
+    def install(self):
+        """ (DNSCache) -> DNSCache
+
+        Answer every socket.getaddrinfo call of the process from this cache.
+        """
+        socket.getaddrinfo = self.getaddrinfo
+        return self
+
+    def uninstall(self):
+        """ (DNSCache) -> NoneType """
+        if socket.getaddrinfo == self.getaddrinfo:
+            socket.getaddrinfo = self.resolver
+
+class Warmer:
+    """
+    Warmer Class
+    """
+
+    def __init__(self, client, dns_cache=None, connections=2, keepalive=45, max_idle=600):
+        """ (Warmer, Clubhouse, DNSCache, int, float, float) -> NoneType
+        dns_cache: resolve through this cache (only useful if it is installed)
+        connections: pooled connections to open
+        keepalive: seconds the server keeps an idle connection open
+        max_idle: stop warming again after the transport was idle this long
+        """
+        self.client = client
+        self.dns_cache = dns_cache
+        self.connections = connections
+        self.keepalive = keepalive
+        self.max_idle = max_idle
+        self.timings = {"dns_ms": None, "connect_ms": None, "connections": 0, "warmed_at": None, "rewarms": 0}
+        self._lock = threading.Lock()
+        self._warmed = None
+        self._stopped = None
+
+    def warm(self):
+        """ (Warmer) -> dict
+
+        Resolve the API host and open the connections now. No request is sent.
+        return the timings
+        """
+        with self._lock:
+            parts = urlsplit(self.client.API_URL)
+            port = parts.port or (443 if parts.scheme == "https" else 80)
+            start = time.perf_counter()
+            try:
+                if self.dns_cache:
+                    self.dns_cache.resolve(parts.hostname, port)
+                else:
+                    socket.getaddrinfo(parts.hostname, port, 0, socket.SOCK_STREAM)
+            except OSError:
+                return dict(self.timings)
+            dns = time.perf_counter() - start
+
+            start = time.perf_counter()
+            try:
+                opened = self.client.transport.preconnect(self.client.API_URL, self.connections)
+            except Exception:
+                # Best effort: the first real call connects by itself.
+                opened = 0
+            self.timings.update({
+                "dns_ms": dns * 1000,
+                "connect_ms": (time.perf_counter() - start) * 1000 if opened else None,
+                "connections": opened,
+                "warmed_at": time.time(),
+            })
+            self._warmed = time.monotonic()
+            return dict(self.timings)
+
+    def due(self, now=None):
+        """ (Warmer, float) -> bool
+
+        True when the connections have probably been closed for being idle: nothing
+        used or warmed them for `keepalive` seconds, and the transport was used less
+        than `max_idle` seconds ago.
+        """
+        now = time.monotonic() if now is None else now
+        last_used = self.client.transport.last_used
+        if last_used is None or self._warmed is None:
+            return False
+        if now - last_used >= self.max_idle:
+            return False
+        return now - max(last_used, self._warmed) >= self.keepalive
+
+    def start(self):
+        """ (Warmer) -> Warmer
+
+        Warm up now in a background thread, then again whenever due(). Call stop to stop.
+        """
+        if self._stopped:
+            return self
+        stopped = threading.Event()
+
+        def loop():
+            self.warm()
+            while not stopped.wait(self.keepalive / 3):
+                if self.due():
+                    self.warm()
+                    self.timings["rewarms"] += 1
+
+        thread = threading.Thread(target=loop, name="connection-warmer")
+        thread.daemon = True
+        thread.start()
+        self._stopped = stopped
+        return self
+
+    def stop(self):
+        """ (Warmer) -> NoneType """
+        if self._stopped:
+            self._stopped.set()
+            self._stopped = None
@@ -0,0 +1,167 @@
+"""
+watcher.py
+
+One poller per room, shared by everything that follows the room.
+
+RoomWatcher calls `get_channel` every `interval` seconds in one background thread and
+hands each snapshot to its subscribers: the recorder, auto-moderation, the event
+stream, ... What is shared is the request: one get_channel call per interval for all
+of them.
+
+Each snapshot also comes with the roster diff (roster.py) since the watcher's previous
+one, for subscribers that only follow changes (rtc.FakeEngine.apply_diff). The
+recorder, auto-moderation and the event stream diff against rosters of their own,
+since they also run without a watcher and each starts from the first snapshot it saw.
+
+    >>> watcher = RoomWatcher(clubhouse, "MR35Dy96", interval=10)
+    >>> watcher.subscribe(lambda channel, channel_info, diff, now: print(diff))
+    >>> watcher.subscribe(recorder_callback, interval=30)   # content with fewer snapshots
+    >>> watcher.update(channel_info)        # e.g. the join_channel answer, no extra call
+    >>> watcher.start()
+"""
+
+import time
+import threading
+
+from .roster import roster_of, diff_rosters
+
+class RoomWatcher:
+    """
+    RoomWatcher Class
+
+    Subscribers are called from the polling thread with
+    (channel, channel_info, diff, now). When the room is gone, channel_info is the
+    failed answer and diff is empty. Errors raised by get_channel go to the
+    on_error callbacks as (channel, error).
+
+    A subscriber may ask for a longer interval: the watcher polls as often as the most
+    demanding subscriber asks, so a lone recorder does not pay for a faster one.
+    """
+
+    def __init__(self, client, channel, interval=10):
+        """ (RoomWatcher, Clubhouse, str, float) -> NoneType
+        interval: seconds between two get_channel calls, for subscribers that do not say
+        """
+        self.client = client
+        self.channel = channel
+        self.interval = interval
+        self.channel_info = None
+        self.roster = {}
+        self._subscribers = []
+        self._intervals = []
+        self._error_handlers = []
+        self._lock = threading.Lock()
+        self._stopped = None
+        self._changed = threading.Event()
+
+    def subscribe(self, callback, on_error=None, interval=None):
+        """ (RoomWatcher, callable, callable, float) -> NoneType
+        interval: seconds between snapshots this subscriber needs (default: the watcher's)
+        """
+        with self._lock:
+            self._subscribers.append(callback)
+            self._intervals.append(interval or self.interval)
+            if on_error:
+                self._error_handlers.append(on_error)
+        self._changed.set()
+
+    def unsubscribe(self, callback, on_error=None):
+        """ (RoomWatcher, callable, callable) -> NoneType """
+        with self._lock:
+            if callback in self._subscribers:
+                del self._intervals[self._subscribers.index(callback)]
+                self._subscribers.remove(callback)
+            if on_error in self._error_handlers:
+                self._error_handlers.remove(on_error)
+
+    def update(self, channel_info, now=None):
+        """ (RoomWatcher, dict, float) -> dict
+
+        Hand a snapshot to the subscribers (one fetched elsewhere, or by poll).
+        return the diff since the previous snapshot
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            if channel_info.get("success"):
+                roster = roster_of(channel_info.get("users"))
+                diff = diff_rosters(self.roster, roster)
+                self.roster = roster
+            else:
+                diff = {"joined": {}, "left": [], "changed": {}}
+            self.channel_info = channel_info
+            subscribers = list(self._subscribers)
+        for callback in subscribers:
+            try:
+                callback(self.channel, channel_info, diff, now)
+            except Exception:
+                pass
+        return diff
+
+    @property
+    def poll_interval(self):
+        """ (RoomWatcher) -> float
+
+        Seconds between two polls: the shortest interval a subscriber asked for.
+        """
+        with self._lock:
+            return min(self._intervals, default=self.interval)
+
+    def poll(self, now=None):
+        """ (RoomWatcher, float) -> dict
+
+        Fetch the room once and update. return the diff (None on error)
+        """
+        try:
+            channel_info = self.client.get_channel(self.channel)
+        except Exception as error:
+            with self._lock:
+                handlers = list(self._error_handlers)
+            for on_error in handlers:
+                try:
+                    on_error(self.channel, error)
+                except Exception:
+                    pass
+            return None
+        return self.update(channel_info, now)
+
+    def start(self, immediate=False):
+        """ (RoomWatcher, bool) -> RoomWatcher
+
+        Poll every poll_interval seconds in a background thread. The first poll is
+        after one interval (the caller usually has a snapshot to update() with), or
+        right away if immediate. Polls are skipped while nobody is subscribed.
+        """
+        if self._stopped:
+            return self
+        stopped = threading.Event()
+
+        def loop():
+            if immediate and self._subscribers:
+                self.poll()
+            last = time.monotonic()
+            while True:
+                self._changed.clear()
+                delay = last + self.poll_interval - time.monotonic()
+                if delay > 0:
+                    # Woken early by subscribe() (the interval may be shorter) and stop()
+                    self._changed.wait(delay)
+                if stopped.is_set():
+                    break
+                if time.monotonic() - last < self.poll_interval:
+                    continue
+                last = time.monotonic()
+                if self._subscribers:
+                    self.poll()
+
+        thread = threading.Thread(target=loop, name=f"room-{self.channel}")
+        thread.daemon = True
+        thread.start()
+        self._stopped = stopped
+        return self
+
+    def stop(self):
+        """ (RoomWatcher) -> NoneType """
+        if self._stopped:
+            self._stopped.set()
+            self._stopped = None
+            self._changed.set()
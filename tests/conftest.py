@@ -0,0 +1,19 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from clubhouse.clubhouse import Clubhouse
+from clubhouse.transport import FakeTransport
+
+@pytest.fixture
+def fake():
+    """ FakeTransport with no routes: every endpoint answers {"success": True} """
+    return FakeTransport()
+
+@pytest.fixture
+def client(fake):
+    """ Authenticated Clubhouse client talking to `fake` """
+    return Clubhouse(user_id="1", user_token="token", user_device="device", transport=fake)
@@ -0,0 +1,105 @@
+import time
+import threading
+
+import pytest
+
+from clubhouse.automod import AutoModerator, InviteRaisedHands, MuteIdleSpeakers
+from clubhouse.rtc import FakeEngine
+from clubhouse.watcher import RoomWatcher
+
+def user(user_id, is_speaker=True, is_moderator=False):
+    return {"user_id": user_id, "username": f"user{user_id}", "is_speaker": is_speaker,
+            "is_moderator": is_moderator}
+
+def muted(report):
+    return sorted(entry["user_id"] for entry in report if entry["action"] == "mute_speaker")
+
+def make(client, idle=60):
+    rule = MuteIdleSpeakers(idle=idle)
+    return AutoModerator(client, "room", [rule], dry_run=True), rule
+
+def test_idle_speaker_is_muted_at_the_deadline(client, fake):
+    automod, rule = make(client)
+    users = [user(1), user(2, is_speaker=False)]
+    assert automod.update(users, now=0) == []
+    assert rule.next_deadline() == 60
+    assert automod.update(users, now=59) == []
+    assert muted(automod.update(users, now=60)) == [1]
+    assert automod.update(users, now=500) == []
+    assert fake.calls == []
+
+def test_touch_postpones_the_deadline(client):
+    automod, rule = make(client)
+    users = [user(1), user(2)]
+    automod.update(users, now=0)
+    automod.activity([1], now=50)
+    assert muted(automod.update(users, now=60)) == [2]
+    assert rule.next_deadline() == 110
+    assert automod.update(users, now=109) == []
+    assert muted(automod.update(users, now=110)) == [1]
+
+def test_moderators_and_users_off_stage_are_not_muted(client):
+    automod, _ = make(client)
+    automod.update([user(1, is_moderator=True), user(2), user(3)], now=0)
+    automod.update([user(1, is_moderator=True), user(2, is_speaker=False)], now=10)
+    assert automod.update([user(1, is_moderator=True), user(2, is_speaker=False)], now=60) == []
+
+def test_speaker_back_on_stage_gets_a_new_deadline(client):
+    automod, _ = make(client)
+    automod.update([user(1)], now=0)
+    automod.update([user(1, is_speaker=False)], now=10)
+    automod.update([user(1)], now=40)
+    assert automod.update([user(1)], now=60) == []
+    assert muted(automod.update([user(1)], now=100)) == [1]
+
+def test_actions_are_sent_unless_dry_run(client, fake):
+    automod = AutoModerator(client, "room", [MuteIdleSpeakers(idle=60)])
+    automod.update([user(1)], now=0)
+    report = automod.update([user(1)], now=60)
+    assert report == [{"rule": "mute_idle_speakers", "action": "mute_speaker", "user_id": 1,
+                       "success": True, "error": None}]
+    assert [call[1] for call in fake.calls] == ["mute_speaker"]
+    assert list(automod.log) == report
+
+def test_idle_rule_is_refused_without_the_voice_engine(client):
+    automod, _ = make(client)
+    watcher = RoomWatcher(client, "room")
+    with pytest.raises(ValueError, match="mute_idle_speakers"):
+        automod.watch(watcher)
+    with pytest.raises(ValueError):
+        automod.start()
+    assert watcher._subscribers == []
+
+    automod = AutoModerator(client, "room", [InviteRaisedHands([1])], dry_run=True)
+    automod.watch(watcher)
+    automod.stop()
+
+def test_idle_rule_runs_with_the_voice_engine(client):
+    automod, rule = make(client)
+    automod.listen(FakeEngine())
+    watcher = RoomWatcher(client, "room")
+    automod.watch(watcher)
+    watcher.update({"success": True, "users": [user(1)]}, now=0)
+    assert rule.next_deadline() == 60
+    automod.stop()
+
+def test_actions_do_not_hold_up_the_watcher(client, fake):
+    release = threading.Event()
+    fake.route("invite_speaker", lambda params: release.wait(5) and {"success": True})
+    automod = AutoModerator(client, "room", [InviteRaisedHands([1])])
+    watcher = RoomWatcher(client, "room")
+    automod.watch(watcher)
+    watcher.update({"success": True, "users": [user(1, is_speaker=False)]}, now=0)
+
+    start = time.monotonic()
+    raised = {"user_id": 1, "is_speaker": False, "raise_hands": True}
+    watcher.update({"success": True, "users": [raised]}, now=10)
+    assert time.monotonic() - start < 1
+    assert list(automod.log) == []
+
+    release.set()
+    automod.stop()
+    deadline = time.monotonic() + 5
+    while not automod.log and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert [entry["action"] for entry in automod.log] == ["invite_speaker"]
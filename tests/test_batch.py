@@ -0,0 +1,73 @@
+import threading
+
+from clubhouse.batch import queue_key, run_batch, _normalize
+from clubhouse.ratelimit import RateLimiter
+
+def test_queue_key(client):
+    assert queue_key(client, _normalize(("get_channel", ["abc"]))) is None
+    assert queue_key(client, _normalize(("join_channel", ["abc"]))) == "channel:abc"
+    assert queue_key(client, _normalize(("leave_channel", {"channel": "abc"}))) == "channel:abc"
+    assert queue_key(client, _normalize(("follow", [12]))) == "user_id:12"
+    assert queue_key(client, _normalize(("update_bio", ["hi"]))) == "group:profile"
+    assert queue_key(client, _normalize({"endpoint": "get_channel", "args": ["abc"], "group": "mine"})) == "group:mine"
+
+def test_run_batch_keeps_order_and_reports_errors(client, fake):
+    fake.route("get_profile", lambda params: {"success": True, "user_profile": {"user_id": params["user_id"]}})
+    fake.route("get_channel", {"success": False, "error_message": "That room is no longer available"})
+    results = run_batch(client, [
+        ("get_profile", [1]),
+        ("no_such_endpoint", []),
+        ("get_channel", ["gone"]),
+        ("get_profile", [2]),
+        ("follow", {"bad_argument": 1}),
+    ], rate_limiter=RateLimiter(1000, 1000))
+
+    assert [result["endpoint"] for result in results] == [
+        "get_profile", "no_such_endpoint", "get_channel", "get_profile", "follow"
+    ]
+    assert results[0]["success"] and results[0]["result"]["user_profile"]["user_id"] == 1
+    assert results[3]["result"]["user_profile"]["user_id"] == 2
+    assert results[1] == {"endpoint": "no_such_endpoint", "success": False, "result": None,
+                          "error": "Unknown endpoint: no_such_endpoint"}
+    assert not results[2]["success"] and results[2]["error"] == "That room is no longer available"
+    assert not results[4]["success"]
+
+def test_run_batch_runs_one_scope_in_order(client, fake):
+    order = []
+    lock = threading.Lock()
+
+    def record(name):
+        def answer(params):
+            with lock:
+                order.append((name, params.get("channel")))
+            return {"success": True}
+        return answer
+
+    fake.route("join_channel", record("join"))
+    fake.route("leave_channel", record("leave"))
+    run_batch(client, [
+        ("join_channel", ["a"]),
+        ("join_channel", ["b"]),
+        ("leave_channel", ["a"]),
+        ("leave_channel", ["b"]),
+    ], rate_limiter=RateLimiter(1000, 1000))
+
+    assert [name for name, channel in order if channel == "a"] == ["join", "leave"]
+    assert [name for name, channel in order if channel == "b"] == ["join", "leave"]
+
+def test_run_batch_stop_on_error_skips_the_rest_of_the_queue(client, fake):
+    fake.route("update_bio", {"success": False})
+    results = run_batch(client, [
+        ("update_bio", ["a"]),
+        ("update_name", ["b"]),
+        ("get_channels", []),
+    ], rate_limiter=RateLimiter(1000, 1000), stop_on_error=True)
+
+    assert not results[0]["success"]
+    assert results[1]["error"] == "Skipped after an earlier error"
+    assert results[2]["success"]
+    assert [call[1] for call in fake.calls].count("update_name") == 0
+
+def test_every_event_source_is_registered(client):
+    for name in ("get_events", "get_events_to_start", "get_events_for_user"):
+        assert queue_key(client, _normalize((name, []))) is None
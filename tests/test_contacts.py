@@ -0,0 +1,88 @@
+import os
+import json
+import stat
+
+from clubhouse.contacts import ContactSync, normalize_phone_number
+from clubhouse.ratelimit import RateLimiter
+
+def contacts(count, start=0):
+    return [{"name": f"Name {i}", "phone_number": f"090-0000-{i:04d}"} for i in range(start, start + count)]
+
+def suggest(params):
+    return {"success": True, "suggested_invites": [
+        {"phone_number": contact["phone_number"]} for contact in params["contacts"][:2]
+    ]}
+
+def make_sync(client, tmp_path, **kwargs):
+    return ContactSync(client, str(tmp_path / "contacts_sync.json"), country_code="+81",
+                       rate_limiter=RateLimiter(1000, 1000), **kwargs)
+
+def test_normalize():
+    assert normalize_phone_number("090-1234-5678", "+81") == "+819012345678"
+    assert normalize_phone_number("+1 (415) 555-0100") == "+14155550100"
+    assert normalize_phone_number("0044 20 7946 0000") == "+442079460000"
+    assert normalize_phone_number("090-1234-5678") is None
+    assert normalize_phone_number("123", "+81") is None
+    assert normalize_phone_number("") is None
+
+def test_prepare_dedupes_keeping_the_first_name(client, tmp_path):
+    sync = make_sync(client, tmp_path)
+    prepared = sync.prepare([
+        {"name": "A", "phone_number": "090-1234-5678"},
+        {"name": "B", "phone_number": "+81 90 1234 5678"},
+        {"name": "C", "phone_number": "nope"},
+    ])
+    assert prepared == [{"name": "A", "phone_number": "+819012345678"}]
+
+def test_chunks_and_merged_suggestions(client, fake, tmp_path):
+    fake.route("get_suggested_invites", suggest)
+    sync = make_sync(client, tmp_path, chunk_size=4)
+    result = sync.sync(contacts(10) + contacts(3))
+
+    assert result["success"] and result["uploaded"] == 10 and result["failed"] == 0
+    sizes = sorted(len(call[2]["contacts"]) for call in fake.calls)
+    assert sizes == [2, 4, 4]
+    assert len(result["suggested_invites"]) == 6
+
+def test_only_new_contacts_are_uploaded_next_time(client, fake, tmp_path):
+    fake.route("get_suggested_invites", suggest)
+    make_sync(client, tmp_path).sync(contacts(5))
+    fake.calls.clear()
+
+    sync = make_sync(client, tmp_path)
+    assert [c["name"] for c in sync.pending(contacts(7))] == ["Name 5", "Name 6"]
+    assert sync.sync(contacts(7))["uploaded"] == 2
+    assert [len(call[2]["contacts"]) for call in fake.calls] == [2]
+    assert sync.pending(contacts(5), "get_suggested_follows_friends_only") != []
+
+    sync.reset()
+    assert len(sync.pending(contacts(7))) == 7
+
+def test_failed_chunks_are_retried(client, fake, tmp_path):
+    fake.route("get_suggested_invites", {"success": False})
+    sync = make_sync(client, tmp_path, chunk_size=2)
+    result = sync.sync(contacts(3))
+    assert not result["success"] and result["failed"] == 3
+    assert len(sync.pending(contacts(3))) == 3
+
+def test_numbers_are_stored_as_keyed_hashes(client, fake, tmp_path):
+    fake.route("get_suggested_invites", suggest)
+    make_sync(client, tmp_path).sync(contacts(2))
+
+    state = (tmp_path / "contacts_sync.json").read_text(encoding="utf-8")
+    assert "+81" not in state
+    key = tmp_path / "contacts_sync.key"
+    assert stat.S_IMODE(os.stat(key).st_mode) == 0o600
+
+    # Another install (another key) does not recognise the hashes
+    other = tmp_path / "other"
+    other.mkdir()
+    with open(other / "contacts_sync.json", "w", encoding="utf-8") as state_file:
+        state_file.write(state)
+    assert len(make_sync(client, other).pending(contacts(2))) == 2
+
+def test_old_unkeyed_state_is_dropped(client, tmp_path):
+    with open(tmp_path / "contacts_sync.json", "w", encoding="utf-8") as state_file:
+        json.dump({"get_suggested_invites:": {"0123456789abcdef0123": 1}}, state_file)
+    sync = make_sync(client, tmp_path)
+    assert len(sync.pending(contacts(2))) == 2
@@ -0,0 +1,104 @@
+import json
+import time
+import base64
+import threading
+
+from clubhouse.credentials import CredentialManager, token_expiry, is_auth_error
+
+AUTH_ERROR = {"success": False, "detail": "Invalid token."}
+
+def jwt(exp, name="a"):
+    """ Unsigned JWT with the given expiry """
+    payload = base64.urlsafe_b64encode(json.dumps({"exp": exp, "name": name}).encode()).decode().rstrip("=")
+    return f"header.{payload}.signature"
+
+def tokens(fake):
+    """ Authorization headers sent, per endpoint """
+    return [(call[1], call[3].get("Authorization")) for call in fake.calls]
+
+def test_token_helpers():
+    assert token_expiry(jwt(1234)) == 1234
+    assert token_expiry("not a jwt") is None
+    assert is_auth_error(AUTH_ERROR)
+    assert not is_auth_error({"success": False, "error_message": "Room is full"})
+    assert not is_auth_error({"success": True})
+
+def test_concurrent_callers_share_one_refresh(client, fake):
+    old, new = jwt(time.time() + 10, "old"), jwt(time.time() + 3600, "new")
+    entered = threading.Event()
+    release = threading.Event()
+
+    def refresh(params):
+        entered.set()
+        release.wait(5)
+        return {"access": new, "refresh": "refresh-2"}
+
+    fake.route("refresh_token", refresh)
+    manager = CredentialManager(client, "refresh-1", access_token=old, margin=60)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(manager.get_channels())) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    assert entered.wait(5)
+    time.sleep(0.05)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert len(results) == 8
+    assert [endpoint for endpoint, _ in tokens(fake)].count("refresh_token") == 1
+    assert all(token == f"Token {new}" for endpoint, token in tokens(fake) if endpoint == "get_channels")
+    assert manager.generation == 1
+    assert manager.stats == {"refreshed": 1, "failed": 0, "retried": 0}
+
+def test_auth_error_is_retried_once_with_the_new_token(client, fake):
+    fake.route("refresh_token", {"access": "token-2", "refresh": "refresh-2"})
+    fake.route("get_channels", lambda params: (
+        {"success": True} if client.HEADERS["Authorization"] == "Token token-2" else AUTH_ERROR
+    ))
+    manager = CredentialManager(client, "refresh-1", access_token="token-1")
+
+    assert manager.get_channels() == {"success": True}
+    assert tokens(fake) == [
+        ("get_channels", "Token token"),
+        ("refresh_token", "Token token"),
+        ("get_channels", "Token token-2"),
+    ]
+    assert manager.stats == {"refreshed": 1, "failed": 0, "retried": 1}
+
+def test_a_second_auth_error_is_returned(client, fake):
+    fake.route("refresh_token", {"access": "token-2"})
+    fake.route("get_channels", AUTH_ERROR)
+    manager = CredentialManager(client, "refresh-1", access_token="token-1")
+
+    assert manager.get_channels() == AUTH_ERROR
+    assert [endpoint for endpoint, _ in tokens(fake)] == ["get_channels", "refresh_token", "get_channels"]
+
+def test_a_call_that_raced_a_refresh_does_not_refresh_again(client, fake):
+    fake.route("refresh_token", {"access": "token-2"})
+    manager = CredentialManager(client, "refresh-1", access_token="token-1")
+    seen = manager.generation
+    assert manager.refresh(seen)
+    assert manager.refresh(seen)
+    assert [endpoint for endpoint, _ in tokens(fake)] == ["refresh_token"]
+
+def test_new_tokens_are_handed_to_on_refresh(client, fake):
+    saved = []
+    answers = iter([{"access": "token-2", "refresh": "refresh-2"}, {"access": "token-3"}])
+    fake.route("refresh_token", lambda params: dict(next(answers), sent=params["refresh"]))
+    manager = CredentialManager(client, "refresh-1", access_token="token-1",
+                                on_refresh=lambda access, refresh: saved.append((access, refresh)))
+    manager.refresh()
+    manager.refresh()
+
+    assert saved == [("token-2", "refresh-2"), ("token-3", "refresh-2")]
+    assert [call[2]["refresh"] for call in fake.calls] == ["refresh-1", "refresh-2"]
+    assert client.HEADERS["Authorization"] == "Token token-3"
+
+def test_failed_refresh_backs_off(client, fake):
+    fake.route("refresh_token", {"success": False})
+    manager = CredentialManager(client, "refresh-1", access_token=jwt(time.time()), margin=60)
+    assert manager.needs_refresh()
+    assert not manager.refresh()
+    assert not manager.needs_refresh()
+    assert manager.stats["failed"] == 1
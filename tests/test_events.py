@@ -0,0 +1,142 @@
+import json
+import time
+import socket
+import threading
+
+import pytest
+
+from clubhouse.events import EventStream, RoomEvents, Sink, SocketSink, open_sink
+
+class SlowSink(Sink):
+    """ Holds every write until `release` is set """
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.writing = threading.Event()
+        self.lines = []
+        self.closed = False
+
+    def write(self, data):
+        self.writing.set()
+        self.release.wait(5)
+        self.lines.extend(json.loads(line) for line in data.splitlines())
+
+    def close(self):
+        self.closed = True
+
+def test_drop_policy_discards_new_events_and_leaves_a_gap():
+    sink = SlowSink()
+    stream = EventStream(sink, maxsize=2, policy="drop")
+    assert stream.emit("ping", n=1)
+    assert sink.writing.wait(5)
+    results = [stream.emit("ping", n=n) for n in range(2, 7)]
+    assert results == [True, True, False, False, False]
+    sink.release.set()
+    deadline = time.monotonic() + 5
+    while stream.stats["written"] < 3 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert stream.emit("ping", n=7)
+    stream.close()
+
+    assert [line["seq"] for line in sink.lines] == [1, 2, 3, 7]
+    assert stream.stats["dropped"] == 3
+    assert stream.stats["written"] == 4
+    assert sink.closed
+
+def test_block_policy_waits_for_room_up_to_the_timeout():
+    sink = SlowSink()
+    stream = EventStream(sink, maxsize=1, policy="block", block_timeout=0.05)
+    stream.emit("ping")
+    assert sink.writing.wait(5)
+    assert stream.emit("ping")
+    assert not stream.emit("ping")
+
+    threading.Timer(0.05, sink.release.set).start()
+    stream.block_timeout = 5
+    assert stream.emit("ping")
+    stream.close()
+    assert [line["seq"] for line in sink.lines] == [1, 2, 4]
+
+def test_close_writes_what_is_buffered(tmp_path):
+    path = tmp_path / "events.jsonl"
+    stream = EventStream(open_sink(str(path)), batch=2)
+    for n in range(5):
+        stream.emit("ping", n=n)
+    stream.close()
+    assert not stream.emit("ping")
+
+    lines = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+    assert [line["n"] for line in lines] == [0, 1, 2, 3, 4]
+    assert [line["seq"] for line in lines] == [1, 2, 3, 4, 5]
+
+def test_sink_errors_are_counted_not_raised():
+    class BrokenSink(Sink):
+        def write(self, data):
+            raise OSError("broken pipe")
+
+    stream = EventStream(BrokenSink())
+    stream.emit("ping")
+    stream.error("get_channel", ValueError("boom"))
+    stream.close()
+    assert stream.stats["lost"] == 2
+    assert stream.stats["written"] == 0
+
+def test_socket_sink_reconnects():
+    server = socket.socket()
+    server.bind(("127.0.0.1", 0))
+    server.listen(2)
+    sink = SocketSink(server.getsockname(), retry=0)
+    try:
+        sink.write("first\n")
+        first, _ = server.accept()
+        assert first.recv(100) == b"first\n"
+        first.close()
+
+        # The peer is gone: a write fails (maybe only the second one) and the next reconnects.
+        with pytest.raises(OSError):
+            for _ in range(100):
+                sink.write("lost\n")
+        sink.write("second\n")
+        second, _ = server.accept()
+        assert second.recv(100) == b"second\n"
+        second.close()
+    finally:
+        sink.close()
+        server.close()
+
+def test_socket_sink_waits_before_retrying():
+    server = socket.socket()
+    server.bind(("127.0.0.1", 0))
+    address = server.getsockname()
+    server.close()
+    sink = SocketSink(address, retry=60)
+    with pytest.raises(OSError):
+        sink.write("x\n")
+    with pytest.raises(ConnectionError, match="not connected"):
+        sink.write("x\n")
+
+def test_open_sink():
+    assert isinstance(open_sink("tcp:127.0.0.1:9000"), SocketSink)
+    with pytest.raises(ValueError):
+        open_sink("tcp:9000")
+    with pytest.raises(ValueError):
+        EventStream(Sink(), policy="wait")
+
+def test_room_events():
+    sink = SlowSink()
+    sink.release.set()
+    stream = EventStream(sink)
+    events = RoomEvents(stream)
+    events.update("room", {"success": True, "users": [{"user_id": 1, "is_speaker": True}]})
+    events.update("room", {"success": True, "users": [
+        {"user_id": 1, "is_speaker": True, "is_moderator": True},
+        {"user_id": 2, "raise_hands": True},
+    ]})
+    events.update("room", {"success": True, "users": [{"user_id": 2, "raise_hands": False}]})
+    assert not events.update("room", {"success": False})
+    stream.close()
+
+    assert [(line["event"], line.get("user_id")) for line in sink.lines] == [
+        ("join", 1), ("join", 2), ("hand_raise", 2), ("role_change", 1),
+        ("leave", 1), ("hand_raise", 2), ("room_end", None),
+    ]
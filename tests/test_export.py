@@ -0,0 +1,83 @@
+import csv
+import json
+import os
+
+import pytest
+
+from clubhouse.export import export_club_members, export_clubs
+from clubhouse.ratelimit import RateLimiter
+from clubhouse.utils import atomic_write, atomic_write_json, read_json
+
+LIMITER = RateLimiter(1000, 1000)
+
+def members(pages, fail_on=()):
+    """ get_club_members answer: pages of 2 users, raising once on the pages in fail_on """
+    failing = set(fail_on)
+
+    def answer(params):
+        page = int(params["page"])
+        if page in failing:
+            failing.discard(page)
+            raise ConnectionError("reset")
+        users = [{"user_id": page * 10 + n, "name": f"Zoë {page}.{n}"} for n in range(2)]
+        return {"success": True, "users": users, "next": page + 1 if page < pages else None}
+    return answer
+
+def read_lines(path):
+    with open(path, encoding="utf-8") as export_file:
+        return [json.loads(line) for line in export_file]
+
+def test_atomic_write_is_utf8(tmp_path):
+    path = str(tmp_path / "topics.json")
+    atomic_write_json(path, {"name": "日本語 Zoë"})
+    with open(path, "rb") as raw:
+        assert raw.read().decode("utf-8") == '{"name": "日本語 Zoë"}'
+    assert read_json(path) == {"name": "日本語 Zoë"}
+    atomic_write(path, b"\xff", mode="wb")
+    assert read_json(path, "broken") == "broken"
+    assert [name for name in os.listdir(tmp_path) if name.startswith(".tmp-")] == []
+
+def test_resume_after_an_interruption(client, fake, tmp_path):
+    path = str(tmp_path / "club.jsonl")
+    fake.route("get_club_members", members(4, fail_on=[3]))
+    with pytest.raises(ConnectionError):
+        export_club_members(client, 1, path, rate_limiter=LIMITER)
+
+    assert not os.path.exists(path)
+    assert read_json(path + ".cursor")["page"] == 3
+    assert len(read_lines(path + ".part")) == 4
+    # A half-written page after the cursor is dropped on resume.
+    with open(path + ".part", "a", encoding="utf-8") as part_file:
+        part_file.write('{"user_id": 3')
+
+    fake.calls.clear()
+    assert export_club_members(client, 1, path, rate_limiter=LIMITER) == 8
+    assert [int(call[2]["page"]) for call in fake.calls] == [3, 4]
+    assert [user["user_id"] for user in read_lines(path)] == [10, 11, 20, 21, 30, 31, 40, 41]
+    assert read_lines(path)[0]["name"] == "Zoë 1.0"
+    assert not os.path.exists(path + ".part")
+    assert not os.path.exists(path + ".cursor")
+
+def test_a_cursor_for_other_parameters_starts_over(client, fake, tmp_path):
+    path = str(tmp_path / "club.jsonl")
+    fake.route("get_club_members", members(2, fail_on=[2]))
+    with pytest.raises(ConnectionError):
+        export_club_members(client, 1, path, rate_limiter=LIMITER)
+
+    fake.calls.clear()
+    assert export_club_members(client, 1, path, return_followers=True, rate_limiter=LIMITER) == 4
+    assert [int(call[2]["page"]) for call in fake.calls] == [1, 2]
+
+def test_csv_export_and_errors_per_club(client, fake, tmp_path):
+    def answer(params):
+        if params["club_id"] == "2":
+            return {"success": False, "error_message": "Not a member"}
+        return members(1)(params)
+
+    fake.route("get_club_members", answer)
+    results = export_clubs(client, [1, 2], str(tmp_path), file_format="csv", rate_limiter=LIMITER)
+    assert results[1] == 2
+    assert isinstance(results[2], Exception)
+    with open(tmp_path / "club_1.csv", newline="", encoding="utf-8") as csv_file:
+        rows = list(csv.DictReader(csv_file))
+    assert [row["user_id"] for row in rows] == ["10", "11"]
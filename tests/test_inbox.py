@@ -0,0 +1,133 @@
+import pytest
+
+from clubhouse.inbox import NotificationInbox
+
+class Server:
+    """ get_notifications over a list kept newest first """
+
+    def __init__(self, fake):
+        self.notifications = []
+        self.pages = []
+        self.fail_page = None
+        fake.route("get_notifications", self.get_notifications)
+        fake.route("get_actionable_notifications", {"success": True, "notifications": []})
+
+    def add(self, first, last, is_unread=True):
+        """ Notifications first..last arrive, in that order """
+        for _id in range(first, last + 1):
+            self.notifications.insert(0, {
+                "notification_id": _id,
+                "time_created": f"2021-02-01T00:{_id // 60:02d}:{_id % 60:02d}",
+                "message": f"n{_id}",
+                "is_unread": is_unread,
+            })
+
+    def get_notifications(self, params):
+        page, size = int(params["page"]), int(params["page_size"])
+        self.pages.append(page)
+        if page == self.fail_page:
+            return {"success": False, "error_message": "try later"}
+        items = self.notifications[(page - 1) * size:page * size]
+        more = page * size < len(self.notifications)
+        return {"success": True, "notifications": items, "next": page + 1 if more else None}
+
+def ids(items):
+    return [item["id"] for item in items]
+
+@pytest.fixture
+def server(fake):
+    return Server(fake)
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "notifications.json")
+
+def test_first_sync_reads_one_page_then_backfills_unread(client, server, path):
+    server.add(1, 10, is_unread=False)
+    server.add(11, 30)
+    inbox = NotificationInbox(client, path, page_size=5)
+
+    assert ids(inbox.sync()) == list(range(26, 31))
+    assert inbox.watermark == 30
+    assert inbox.backfill["page"] == 2
+    assert server.pages == [1]
+
+    # Nothing new on top: the backfill goes on down to the first fully read page
+    assert ids(inbox.sync()) == list(range(6, 26))
+    assert inbox.backfill is None
+    assert ids(inbox.sync()) == []
+    assert ids(inbox.items) == list(range(6, 31))
+
+def test_gap_larger_than_max_pages_is_backfilled(client, server, path):
+    server.add(1, 3)
+    inbox = NotificationInbox(client, path, page_size=5)
+    inbox.sync()
+    assert inbox.watermark == 3 and inbox.backfill is None
+
+    server.add(4, 20)
+    assert ids(inbox.sync(max_pages=2)) == list(range(11, 21))
+    assert inbox.watermark == 20
+    assert inbox.backfill["until"] == 3
+
+    # More arrive before the gap is filled
+    server.add(21, 22)
+    server.pages.clear()
+    assert ids(inbox.sync()) == [4, 5, 6, 7, 8, 9, 10, 21, 22]
+    assert inbox.backfill is None
+    assert ids(inbox.items) == list(range(1, 23))
+    assert len(set(ids(inbox.items))) == len(inbox.items)
+
+def test_restart_from_the_saved_watermark(client, fake, server, path):
+    server.add(1, 4)
+    NotificationInbox(client, path, page_size=5).sync()
+
+    server.add(5, 6)
+    server.pages.clear()
+    restarted = NotificationInbox(client, path, page_size=5)
+    assert restarted.watermark == 4
+    assert ids(restarted.sync()) == [5, 6]
+    assert server.pages == [1]
+
+    server.pages.clear()
+    again = NotificationInbox(client, path, page_size=5)
+    assert ids(again.sync()) == []
+    assert server.pages == [1]
+    assert ids(again.items) == list(range(1, 7))
+
+def test_restart_resumes_a_saved_backfill_after_an_error(client, server, path):
+    server.add(1, 2)
+    inbox = NotificationInbox(client, path, page_size=5)
+    inbox.sync()
+
+    server.add(3, 20)
+    server.fail_page = 3
+    with pytest.raises(Exception, match="page 3"):
+        inbox.sync()
+    # The two pages read before the error are kept, with the cursor below them
+    assert ids(inbox.items)[-10:] == list(range(11, 21))
+    assert inbox.backfill == {"page": 3, "below": 11, "until": 2, "unread_only": False}
+
+    server.fail_page = None
+    restarted = NotificationInbox(client, path, page_size=5)
+    assert restarted.backfill == inbox.backfill
+    assert ids(restarted.sync()) == list(range(3, 11))
+    assert ids(restarted.items) == list(range(1, 21))
+
+def test_stream_stores_a_page_only_once_it_was_consumed(client, server, path):
+    server.add(1, 3)
+    inbox = NotificationInbox(client, path, page_size=5)
+    stream = inbox.stream(interval=0)
+    assert next(stream)["id"] == 1
+    stream.close()
+    assert inbox.items == [] and inbox.watermark == 0
+
+    assert ids(NotificationInbox(client, path, page_size=5).sync()) == [1, 2, 3]
+
+def test_actionable_notifications_are_delivered_once(client, fake, server, path):
+    fake.route("get_actionable_notifications", {"success": True, "notifications": [
+        {"actionable_notification_id": 7, "time_created": "2021-01-01T00:00:00"},
+    ]})
+    inbox = NotificationInbox(client, path)
+    assert [(item["kind"], item["id"]) for item in inbox.sync()] == [("actionable", 7)]
+    assert inbox.sync() == []
+    assert ids(inbox.unread()) == [7]
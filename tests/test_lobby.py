@@ -0,0 +1,74 @@
+import json
+import time
+import threading
+
+from clubhouse.lobby import Lobby
+
+def channels(*names):
+    return {"success": True, "channels": [{"channel": name, "topic": name} for name in names]}
+
+def refresh_and_wait(lobby):
+    """ Refresh, wait for the background fetch and return the on_update calls """
+    updates = []
+    running = set(threading.enumerate())
+    assert lobby.refresh(on_update=updates.append)
+    for thread in set(threading.enumerate()) - running:
+        thread.join(5)
+    return updates
+
+def test_snapshot_served_from_disk(client, fake, tmp_path):
+    path = tmp_path / "lobby.json"
+    path.write_text(json.dumps({"updated_at": time.time() - 60, "channels": channels("old")}), encoding="utf-8")
+    lobby = Lobby(client, str(path), max_age=10)
+    assert lobby.channels == channels("old")
+    assert lobby.is_stale
+    assert fake.calls == []
+
+def test_no_snapshot(client, fake, tmp_path):
+    lobby = Lobby(client, str(tmp_path / "lobby.json"))
+    assert lobby.channels == {"success": True, "channels": []}
+    assert lobby.age() is None
+    assert lobby.is_stale
+
+def test_on_update_only_when_channels_changed(client, fake, tmp_path):
+    path = tmp_path / "lobby.json"
+    fake.route("get_channels", channels("a", "b"))
+    lobby = Lobby(client, str(path))
+
+    assert refresh_and_wait(lobby) == [channels("a", "b")]
+    assert not lobby.is_stale
+    assert json.loads(path.read_text(encoding="utf-8"))["channels"] == channels("a", "b")
+
+    assert refresh_and_wait(lobby) == []
+    assert len(fake.calls) == 2
+
+    fake.route("get_channels", {"success": False, "error_message": "nope"})
+    assert refresh_and_wait(lobby) == []
+    assert lobby.channels == channels("a", "b")
+
+    fake.route("get_channels", channels("c"))
+    assert refresh_and_wait(lobby) == [channels("c")]
+    assert Lobby(client, str(path)).channels == channels("c")
+
+def test_refresh_refused_while_one_is_in_flight(client, fake, tmp_path):
+    started = threading.Event()
+    release = threading.Event()
+
+    def slow(params):
+        started.set()
+        release.wait(5)
+        return channels("a")
+
+    fake.route("get_channels", slow)
+    lobby = Lobby(client, str(tmp_path / "lobby.json"))
+    running = set(threading.enumerate())
+    assert lobby.refresh()
+    assert started.wait(5)
+    assert not lobby.refresh()
+    release.set()
+    for thread in set(threading.enumerate()) - running:
+        thread.join(5)
+
+    assert refresh_and_wait(lobby) == []
+    assert lobby.channels == channels("a")
+    assert [call[1] for call in fake.calls] == ["get_channels", "get_channels"]
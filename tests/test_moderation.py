@@ -0,0 +1,39 @@
+import pytest
+
+from clubhouse.moderation import bulk_action, mute_speakers, select_users, split_outcomes
+from clubhouse.ratelimit import RateLimiter
+
+def mute(params):
+    if params["user_id"] == 2:
+        return {"success": False, "error_message": "Not a speaker"}
+    if params["user_id"] == 3:
+        raise ConnectionError("reset")
+    return {"success": True}
+
+def test_every_user_gets_their_own_outcome(client, fake):
+    fake.route("mute_speaker", mute)
+    outcomes = mute_speakers(client, "room", [1, 2, 3, 4, 1], rate_limiter=RateLimiter(1000, 1000))
+
+    assert list(outcomes) == [1, 2, 3, 4]
+    assert outcomes[1] == {"success": True, "error": None, "result": {"success": True}}
+    assert outcomes[2]["error"] == "Not a speaker"
+    assert "reset" in outcomes[3]["error"]
+    succeeded, failed = split_outcomes(outcomes)
+    assert succeeded == [1, 4]
+    assert sorted(failed) == [2, 3]
+    assert sorted(call[2]["user_id"] for call in fake.calls) == [1, 2, 3, 4]
+    assert all(call[2]["channel"] == "room" for call in fake.calls)
+
+def test_unknown_action(client):
+    with pytest.raises(ValueError):
+        bulk_action(client, "follow", "room", [1])
+
+def test_select_users():
+    users = [
+        {"user_id": 1, "is_speaker": True, "is_moderator": True},
+        {"user_id": 2, "is_speaker": True},
+        {"user_id": 3, "raise_hands": True},
+    ]
+    assert select_users(users, is_speaker=True, is_moderator=False) == [2]
+    assert select_users(users, exclude=[2], is_speaker=True) == [1]
+    assert select_users(users, raise_hands=True) == [3]
@@ -0,0 +1,77 @@
+from clubhouse.mutations import MutationQueue, is_throttled
+
+THROTTLED = {"success": False, "error_message": "Too many requests. Please try again later."}
+
+class FlakyClient:
+    """ Answers update_bio with the given outcomes in turn (an exception is raised) """
+
+    def __init__(self, *outcomes):
+        self.outcomes = list(outcomes)
+        self.calls = []
+
+    def update_bio(self, bio):
+        self.calls.append(bio)
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+def test_retries_until_success():
+    client = FlakyClient(ConnectionError("reset"), THROTTLED, {"success": True})
+    queue = MutationQueue(client, window=60, retries=3, backoff=0)
+    queue.update_bio("hello")
+    queue.flush()
+
+    assert client.calls == ["hello"] * 3
+    assert queue.stats["retried"] == 2
+    assert queue.stats["sent"] == 2
+    assert queue.stats["failed"] == 0
+
+def test_gives_up_after_the_retries():
+    client = FlakyClient(THROTTLED, ConnectionError("reset"), THROTTLED)
+    queue = MutationQueue(client, window=60, retries=2, backoff=0)
+
+    assert queue._send("update_bio", "hello") == THROTTLED
+    assert queue.stats["retried"] == 2
+    assert queue.stats["failed"] == 1
+    assert client.calls == ["hello"] * 3
+
+def test_permanent_failures_are_not_retried():
+    refused = {"success": False, "error_message": "Your bio is too long"}
+    client = FlakyClient(refused)
+    queue = MutationQueue(client, window=60, retries=3, backoff=60)
+
+    assert queue._send("update_bio", "x" * 1000) == refused
+    assert client.calls == ["x" * 1000]
+    assert queue.stats["retried"] == 0
+    assert queue.stats["failed"] == 1
+
+def test_is_throttled():
+    assert is_throttled(THROTTLED)
+    assert is_throttled({"success": False, "error_message": "Rate limit exceeded"})
+    assert not is_throttled({"success": False, "error_message": "This username is taken"})
+    assert not is_throttled({"success": False})
+
+def test_a_failed_write_is_not_deduplicated():
+    client = FlakyClient({"success": False}, {"success": True}, {"success": True})
+    queue = MutationQueue(client, window=60, retries=0, backoff=0)
+    queue.update_bio("hello")
+    queue.flush()
+    queue.update_bio("hello")
+    queue.flush()
+    queue.update_bio("hello")
+    queue.flush()
+
+    assert client.calls == ["hello", "hello"]
+    assert queue.stats["deduped"] == 1
+
+def test_writes_within_the_window_collapse():
+    client = FlakyClient({"success": True})
+    queue = MutationQueue(client, window=60, backoff=0)
+    queue.update_bio("a")
+    queue.update_bio("b")
+    queue.update_bio("c")
+    queue.flush()
+
+    assert client.calls == ["c"]
+    assert queue.saved == 2
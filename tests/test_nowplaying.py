@@ -0,0 +1,78 @@
+import time
+
+from clubhouse.nowplaying import FakeSource, NowPlayingWatcher, YTMusicSource, make_source, song_bio
+
+def test_on_change_only_when_the_track_changes():
+    source = FakeSource()
+    changes = []
+    watcher = NowPlayingWatcher(source, changes.append)
+    watcher.poll()
+    source.play("Song", "Artist")
+    watcher.poll()
+    watcher.poll()
+    source.play("Other", "Artist")
+    watcher.poll()
+    source.pause()
+    watcher.poll()
+    watcher.poll()
+
+    assert changes == [None, ("Song", "Artist"), ("Other", "Artist"), None]
+    assert watcher.stats == {"polls": 6, "changes": 4}
+
+def test_backs_off_while_nothing_plays():
+    source = FakeSource()
+    watcher = NowPlayingWatcher(source, lambda track: None, min_interval=2, max_interval=30, backoff=2)
+    assert [watcher.poll() for _ in range(6)] == [4, 8, 16, 30, 30, 30]
+    source.play("Song")
+    assert watcher.poll() == 2
+    source.pause()
+    assert watcher.poll() == 4
+
+def test_source_min_interval():
+    source = FakeSource(("Song", ""))
+    source.min_interval = 15
+    watcher = NowPlayingWatcher(source, lambda track: None, min_interval=2, max_interval=30)
+    assert watcher.poll() == 15
+    source.pause()
+    assert [watcher.poll() for _ in range(2)] == [30, 30]
+
+def test_polling_thread_reports_changes():
+    source = FakeSource(("Song", "Artist"))
+    changes = []
+    watcher = NowPlayingWatcher(source, changes.append, min_interval=0.01).start()
+    deadline = time.monotonic() + 5
+    while not changes and time.monotonic() < deadline:
+        time.sleep(0.01)
+    source.play("Next", "Artist")
+    while len(changes) < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    watcher.stop()
+    assert changes == [("Song", "Artist"), ("Next", "Artist")]
+
+class FakeYTMusic:
+    def __init__(self):
+        self.history = [{"videoId": "a", "title": "Song", "artists": [{"name": "A"}, {"name": "B"}]}]
+        self.calls = 0
+
+    def get_history(self):
+        self.calls += 1
+        return self.history
+
+def test_ytmusic_top_entry_goes_stale():
+    ytmusic = FakeYTMusic()
+    source = YTMusicSource(stale_after=0.05, ytmusic=ytmusic)
+    assert source.current() == ("Song", "A, B")
+    time.sleep(0.06)
+    assert source.current() is None
+    ytmusic.history = [{"videoId": "b", "title": "Next", "artists": []}] + ytmusic.history
+    assert source.current() == ("Next", "")
+
+    watcher = NowPlayingWatcher(source, lambda track: None)
+    assert watcher.poll() == YTMusicSource.min_interval
+
+def test_make_source_and_bio(tmp_path):
+    path = tmp_path / "np.txt"
+    path.write_text("Artist - Title", encoding="utf-8")
+    assert make_source(f"file:{path}").current() == ("Title", "Artist")
+    assert song_bio(None, "bio") == "bio"
+    assert "Title" in song_bio(("Title", "Artist"), "bio")
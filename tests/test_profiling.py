@@ -0,0 +1,50 @@
+import os
+import time
+import threading
+
+import pytest
+
+from clubhouse.profiling import Profiler, thread_cpu_time
+
+def busy_loop(stopped):
+    while not stopped.is_set():
+        sum(range(1000))
+
+def idle_wait(stopped):
+    stopped.wait()
+
+@pytest.mark.skipif(thread_cpu_time(threading.get_ident()) is None, reason="no per-thread CPU clock")
+def test_waiting_threads_are_not_sampled():
+    stopped = threading.Event()
+    threads = [threading.Thread(target=busy_loop, args=(stopped,)),
+               threading.Thread(target=idle_wait, args=(stopped,))]
+    for thread in threads:
+        thread.start()
+    profiler = Profiler(cpu=True, interval=0.005).start()
+    time.sleep(0.3)
+    profiler.stop()
+    stopped.set()
+    for thread in threads:
+        thread.join()
+
+    functions = {name: total for name, _, total in profiler.top_functions(100)}
+    assert profiler.clock == "cpu"
+    assert functions.get("test_profiling.py:busy_loop", 0) > 0
+    assert "test_profiling.py:idle_wait" not in functions
+
+def test_profiler_can_be_restarted_and_dumped(tmp_path):
+    profiler = Profiler(cpu=True, interval=0.005).start()
+    profiler.stop()
+    profiler.start()
+    time.sleep(0.02)
+    profiler.stop()
+    written = profiler.dump(str(tmp_path))
+    assert [os.path.basename(path).split("-")[0] for path in written] == ["threads", "cpu", "cpu"]
+    assert profiler.sample_count > 0
+
+def test_from_env():
+    assert Profiler.from_env("") is None
+    profiler = Profiler.from_env("cpu")
+    assert profiler.cpu and not profiler.heap
+    profiler = Profiler.from_env("all")
+    assert profiler.cpu and profiler.heap
@@ -0,0 +1,51 @@
+from clubhouse.ranking import FollowRanker
+from clubhouse.ratelimit import RateLimiter
+
+FOLLOWING = {
+    "1": [2, 3],
+    "2": [3, 4, 5],
+    "3": [4],
+}
+
+def users(*ids):
+    return {"success": True, "users": [{"user_id": user_id} for user_id in ids], "next": None}
+
+def load_all(ranker, client, limiter):
+    ranker.load_following(client, rate_limiter=limiter)
+    ranker.load_clubs(client, [10], rate_limiter=limiter)
+    ranker.load_topics(client, [20], rate_limiter=limiter)
+
+def test_loading_again_does_not_double_the_signals(client, fake):
+    fake.route("get_following", lambda params: users(*FOLLOWING.get(params["user_id"], [])))
+    fake.route("get_club_members", lambda params: users(5, 6))
+    fake.route("get_users_for_topic", lambda params: users(6, 7))
+    limiter = RateLimiter(1000, 1000)
+    ranker = FollowRanker(1)
+
+    load_all(ranker, client, limiter)
+    first = ranker.scores()
+    assert ranker.following == {2, 3}
+    assert ranker.signals["common_follows"] == {3: 1, 4: 2, 5: 1}
+    assert ranker.top(3) == [(5, 3.0), (6, 2.5), (4, 2.0)]
+
+    load_all(ranker, client, limiter)
+    assert ranker.scores() == first
+
+def test_room_and_exclusions(client):
+    ranker = FollowRanker(1)
+    ranker.add_room([{"user_id": 8}, {"user_id": 8}, {"user_id": 1}])
+    ranker.add_room([8, 9])
+    ranker.exclude([9])
+    assert ranker.top() == [(8, 3.0)]
+
+def test_save_and_load(tmp_path):
+    path = str(tmp_path / "ranking.json")
+    ranker = FollowRanker(1)
+    ranker.set_following([2])
+    ranker.add_club_members([3, 4])
+    ranker.save(path)
+
+    loaded = FollowRanker(1)
+    assert loaded.load(path)
+    assert loaded.top() == ranker.top()
+    assert not FollowRanker(2).load(path)
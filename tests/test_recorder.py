@@ -0,0 +1,71 @@
+from clubhouse.recorder import RoomRecorder, RoomHistory
+
+def room(*users):
+    return {"success": True, "users": [
+        {"user_id": user_id, "username": f"user{user_id}", "is_speaker": is_speaker}
+        for user_id, is_speaker in users
+    ]}
+
+GONE = {"success": False, "error_message": "That room is no longer available"}
+
+def test_state_at(client, tmp_path):
+    recorder = RoomRecorder(client, str(tmp_path), keyframe_every=2)
+    recorder.record("room", room((1, True)), now=100.0)
+    recorder.record("room", room((1, True), (2, False)), now=110.0)
+    recorder.record("room", room((1, True), (2, False)), now=115.0)
+    recorder.record("room", room((2, True)), now=120.0)
+    recorder.record("room", room((2, True), (3, False)), now=130.0)
+    recorder.record("room", GONE, now=140.0)
+    recorder.flush()
+    history = RoomHistory(str(tmp_path))
+
+    assert history.state_at("room", 99.0) is None
+    assert sorted(history.state_at("room", 100.0)) == [1]
+    assert sorted(history.state_at("room", 115.0)) == [1, 2]
+    state = history.state_at("room", 125.0)
+    assert sorted(state) == [2] and state[2]["is_speaker"] is True
+    assert sorted(history.state_at("room", 139.0)) == [2, 3]
+    assert history.state_at("room", 140.0) is None
+    assert history.state_at("other", 120.0) is None
+
+def test_only_changes_and_keyframes_are_written(client, tmp_path):
+    recorder = RoomRecorder(client, str(tmp_path), keyframe_every=2)
+    for now in (100.0, 110.0, 120.0):
+        recorder.record("room", room((1, True)), now=now)
+    recorder.record("room", room((1, True), (2, False)), now=130.0)
+    recorder.record("room", GONE, now=140.0)
+    recorder.record("room", GONE, now=150.0)
+    recorder.flush()
+
+    records = list(RoomHistory(str(tmp_path)).events("room"))
+    assert [sorted(set(record) - {"t"}) for record in records] == [["k"], ["d"], ["end"]]
+    assert [record["t"] for record in records] == [100.0, 130.0, 140.0]
+
+def test_a_new_segment_starts_after_segment_records(client, tmp_path):
+    recorder = RoomRecorder(client, str(tmp_path), flush_every=1, segment_records=2)
+    for index in range(5):
+        recorder.record("room", room(*[(user_id, True) for user_id in range(index + 1)]), now=100.0 + index)
+    recorder.flush()
+    history = RoomHistory(str(tmp_path))
+
+    assert [start for start, _ in history.segments("room")] == [100.0, 102.0, 104.0]
+    assert sorted(history.state_at("room", 103.5)) == [0, 1, 2, 3]
+
+def test_failed_samples_only_end_the_room_after_end_after(client, tmp_path):
+    throttled = {"success": False, "error_message": "Too many requests"}
+    recorder = RoomRecorder(client, str(tmp_path), end_after=3)
+    recorder.record("room", room((1, True)), now=100.0)
+    assert recorder.record("room", throttled, now=110.0)
+    assert recorder.record("room", throttled, now=120.0)
+    recorder.record("room", room((1, True), (2, False)), now=130.0)
+    assert recorder.record("room", throttled, now=140.0)
+    assert recorder.record("room", throttled, now=150.0)
+    assert not recorder.record("room", throttled, now=160.0)
+    assert not recorder.record("room", throttled, now=170.0)
+    recorder.flush()
+    history = RoomHistory(str(tmp_path))
+
+    assert sorted(history.state_at("room", 125.0)) == [1]
+    assert sorted(history.state_at("room", 135.0)) == [1, 2]
+    assert history.state_at("room", 140.0) is None
+    assert [record["t"] for record in history.events("room")] == [100.0, 130.0, 140.0]
@@ -0,0 +1,43 @@
+import threading
+
+from clubhouse.rtc import FakeEngine, Scheduler
+from clubhouse.roster import roster_of, diff_rosters
+
+def test_apply_diff_follows_the_stage():
+    engine = FakeEngine(seed=1)
+    engine.set_speakers([1, 2])
+    old = roster_of([
+        {"user_id": 1, "is_speaker": True},
+        {"user_id": 2, "is_speaker": True},
+        {"user_id": 3, "is_speaker": False},
+    ])
+    new = roster_of([
+        {"user_id": 1, "is_speaker": False},
+        {"user_id": 3, "is_speaker": True},
+        {"user_id": 4, "is_speaker": True},
+        {"user_id": 5, "is_speaker": False},
+    ])
+    engine.apply_diff(diff_rosters(old, new))
+    assert engine.speakers == [3, 4]
+
+def test_join_reports_volumes_of_the_speakers_only():
+    engine = FakeEngine(join_latency=(0, 0), volume_interval=0.01, talk_rate=1.0, seed=1,
+                        scheduler=Scheduler())
+    joined = threading.Event()
+    reports = []
+    enough = threading.Event()
+
+    def on_volume(speakers):
+        reports.append(speakers)
+        if len(reports) >= 3:
+            enough.set()
+
+    engine.on_join(lambda channel, user_id, elapsed: joined.set())
+    engine.on_volume(on_volume)
+    engine.join(None, "room", 1, speakers=[1, 2])
+    engine.mute()
+    assert joined.wait(5) and enough.wait(5)
+    engine.leave()
+
+    assert engine.stats["joins"] == 1
+    assert all(sorted(user_id for user_id, _ in speakers) == [2] for speakers in reports)
@@ -0,0 +1,113 @@
+import pytest
+
+from clubhouse.schedule import EventCalendar
+
+NOW = 1_700_000_000
+
+def event(event_id, start, club_id=None, host_ids=()):
+    return {
+        "event_id": event_id,
+        "name": f"event {event_id}",
+        "time_start_epoch": start,
+        "club": {"club_id": club_id} if club_id else None,
+        "hosts": [{"user_id": user_id} for user_id in host_ids],
+    }
+
+def pages(*pages):
+    """ get_events answer serving the given pages, with "next" until the last one """
+    def answer(params):
+        page = int(params["page"])
+        return {"success": True, "events": pages[page - 1], "next": page + 1 if page < len(pages) else None}
+    return answer
+
+@pytest.fixture
+def calendar():
+    calendar = EventCalendar(":memory:", horizon=3600)
+    yield calendar
+    calendar.close()
+
+def test_sync_pages_until_the_last_page(calendar, client, fake):
+    fake.route("get_events", pages(
+        [event(1, NOW + 60, club_id=10, host_ids=[100])],
+        [event(2, NOW + 120, host_ids=[200])],
+    ))
+    result = calendar.sync(client, full=True, now=NOW)
+
+    assert result == {"pages": 2, "events": 2, "removed": 0, "full": True}
+    assert [int(call[2]["page"]) for call in fake.calls] == [1, 2]
+    assert calendar.get(event_id=2)["name"] == "event 2"
+
+def test_sync_stops_at_the_horizon(calendar, client, fake):
+    fake.route("get_events", pages(
+        [event(1, NOW + 60)],
+        [event(2, NOW + 7200)],
+        [event(3, NOW + 9000)],
+    ))
+    result = calendar.sync(client, full=False, now=NOW)
+
+    assert result["pages"] == 2
+    assert calendar.get(event_id=3) is None
+
+def test_sync_removes_events_the_server_dropped(calendar, client, fake):
+    fake.route("get_events", pages([event(1, NOW + 60), event(2, NOW + 120)]))
+    calendar.sync(client, full=True, now=NOW)
+    fake.route("get_events", pages([event(2, NOW + 120)]))
+    result = calendar.sync(client, full=True, now=NOW)
+
+    assert result["removed"] == 1
+    assert calendar.get(event_id=1) is None
+
+def test_sync_includes_events_to_start_and_for_user(calendar, client, fake):
+    fake.route("get_events", pages([event(1, NOW + 60)]))
+    fake.route("get_events_to_start", {"success": True, "events": [event(2, NOW + 30)]})
+    fake.route("get_events_for_user", pages([event(3, NOW + 90)], [event(4, NOW + 100)]))
+    result = calendar.sync(client, full=True, include_to_start=True, include_for_user=True, now=NOW)
+
+    assert result["events"] == 4
+    assert result["pages"] == 3
+    assert [e["event_id"] for e in calendar.upcoming(3600, now=NOW)] == [2, 1, 3, 4]
+    assert fake.calls[-1][2]["user_id"] == "1"
+
+def test_sync_raises_when_the_server_fails(calendar, client, fake):
+    fake.route("get_events", {"success": False, "error_message": "slow down"})
+    with pytest.raises(Exception, match="page 1"):
+        calendar.sync(client, full=True, now=NOW)
+
+def test_upcoming_filters(calendar):
+    calendar.upsert([
+        event(1, NOW + 60, club_id=10, host_ids=[100]),
+        event(2, NOW + 120, club_id=20, host_ids=[100, 200]),
+        event(3, NOW + 180, host_ids=[300]),
+        event(4, NOW + 7200, club_id=10),
+    ])
+
+    def ids(**kwargs):
+        return [e["event_id"] for e in calendar.upcoming(3600, now=NOW, **kwargs)]
+
+    assert ids() == [1, 2, 3]
+    assert ids(club_ids=[10]) == [1]
+    assert ids(host_ids=[100]) == [1, 2]
+    assert ids(host_ids=[200], club_ids=[10]) == []
+    assert ids(host_ids=[]) == []
+    assert [e["event_id"] for e in calendar.upcoming(7200, club_ids=[10], now=NOW)] == [1, 4]
+
+def test_a_sync_only_removes_events_of_the_sources_it_read(calendar, client, fake):
+    fake.route("get_events", pages([event(1, NOW + 60)]))
+    fake.route("get_events_to_start", {"success": True, "events": [event(2, NOW + 30)]})
+    fake.route("get_events_for_user", pages([event(3, NOW + 90), event(1, NOW + 60)]))
+    calendar.sync(client, full=True, include_to_start=True, include_for_user=True, now=NOW)
+
+    fake.route("get_events", pages([]))
+    result = calendar.sync(client, full=True, now=NOW)
+    assert result["removed"] == 0
+    assert [e["event_id"] for e in calendar.upcoming(3600, now=NOW)] == [2, 1, 3]
+
+    fake.route("get_events_for_user", pages([event(3, NOW + 90)]))
+    result = calendar.sync(client, full=True, include_for_user=True, now=NOW)
+    assert result["removed"] == 1
+    assert [e["event_id"] for e in calendar.upcoming(3600, now=NOW)] == [2, 3]
+
+def test_prune_forgets_the_sources(calendar):
+    calendar.upsert([event(1, NOW - 7200)], source="for_user")
+    assert calendar.prune(before=NOW) == 1
+    assert calendar._db.execute("SELECT COUNT(*) FROM event_sources").fetchone()[0] == 0
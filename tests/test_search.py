@@ -0,0 +1,82 @@
+import threading
+
+import pytest
+
+from clubhouse.search import SearchHelper
+
+USERS = [
+    {"user_id": 1, "name": "Elon Musk", "username": "elon"},
+    {"user_id": 2, "name": "Eloise", "username": "eloise"},
+    {"user_id": 3, "name": "Bob", "username": "bobelo"},
+]
+
+def answer(count=True, next_page=None):
+    def search_users(params):
+        items = [user for user in USERS if params["query"] in (user["name"].lower() + " " + user["username"])]
+        result = {"success": True, "users": items, "next": next_page}
+        if count:
+            result["count"] = len(items)
+        return result
+    return search_users
+
+def queries(fake):
+    return [call[2]["query"] for call in fake.calls]
+
+def test_refinement_of_a_complete_prefix_is_local(client, fake):
+    fake.route("search_users", answer())
+    search = SearchHelper(client)
+    assert len(search.search("Elo")["users"]) == 3
+    assert [user["user_id"] for user in search.search("elon")["users"]] == [1]
+    assert search.search("elo")["count"] == 3
+    assert queries(fake) == ["elo"]
+    assert search.stats == {"requests": 1, "hits": 1, "refined": 1, "superseded": 0}
+
+def test_incomplete_results_are_not_refined(client, fake):
+    fake.route("search_users", answer(count=False))
+    search = SearchHelper(client)
+    search.search("elo")
+    search.search("elon")
+    fake.route("search_users", answer(next_page=2))
+    search.search("bob")
+    search.search("bobe")
+    assert queries(fake) == ["elo", "elon", "bob", "bobe"]
+    assert search.stats["refined"] == 0
+
+def test_flags_are_part_of_the_key(client, fake):
+    fake.route("search_users", answer())
+    search = SearchHelper(client)
+    search.search("elo")
+    search.search("elo", following_only=True)
+    assert len(fake.calls) == 2
+
+def test_lru_eviction_and_failures_not_cached(client, fake):
+    fake.route("search_users", answer())
+    search = SearchHelper(client, cache_size=2)
+    for query in ("a", "b", "c", "a"):
+        search.search(query + "x")
+    assert len(fake.calls) == 4
+
+    fake.route("search_users", {"success": False, "error_message": "slow down"})
+    assert not search.search("zz")["success"]
+    assert not search.search("zz")["success"]
+    assert len(fake.calls) == 6
+
+def test_typing_only_searches_the_last_query(client, fake):
+    fake.route("search_users", answer())
+    search = SearchHelper(client, delay=0.05)
+    results = []
+    done = threading.Event()
+
+    def callback(query, result):
+        results.append((query, len(result["users"])))
+        done.set()
+
+    for query in ("e", "el", "elo", "elon"):
+        search.type(query, callback)
+    assert done.wait(5)
+    assert results == [("elon", 1)]
+    assert queries(fake) == ["elon"]
+
+def test_unknown_kind(client):
+    with pytest.raises(Exception, match="rooms"):
+        SearchHelper(client, kind="rooms")
@@ -0,0 +1,114 @@
+import time
+import threading
+
+import pytest
+
+def wait_until(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.001)
+    assert condition()
+
+def test_concurrent_identical_calls_share_one_request(client, fake):
+    entered = threading.Event()
+    release = threading.Event()
+
+    def get_club(params):
+        entered.set()
+        release.wait(5)
+        return {"success": True, "club": {"club_id": params["club_id"]}}
+
+    fake.route("get_club", get_club)
+    results = []
+    leader = threading.Thread(target=lambda: results.append(client.get_club(42)))
+    leader.start()
+    assert entered.wait(5)
+    followers = [threading.Thread(target=lambda: results.append(client.get_club(42))) for _ in range(4)]
+    for thread in followers:
+        thread.start()
+    wait_until(lambda: client.single_flight_stats["collapsed"] == 4)
+    release.set()
+    for thread in [leader] + followers:
+        thread.join(5)
+
+    assert len(fake.calls) == 1
+    assert client.single_flight_stats == {"calls": 5, "collapsed": 4}
+    assert len(results) == 5
+    assert all(result == {"success": True, "club": {"club_id": 42}} for result in results)
+
+def test_callers_cannot_change_each_others_result(client, fake):
+    entered = threading.Event()
+    release = threading.Event()
+
+    def get_channel(params):
+        entered.set()
+        release.wait(5)
+        return {"success": True, "users": [{"user_id": 1}]}
+
+    fake.route("get_channel", get_channel)
+    results = []
+
+    def call_and_change():
+        result = client.get_channel("room")
+        results.append(result)
+        result.pop("users")
+
+    leader = threading.Thread(target=call_and_change)
+    leader.start()
+    assert entered.wait(5)
+    followers = [threading.Thread(target=lambda: results.append(client.get_channel("room"))) for _ in range(3)]
+    for thread in followers:
+        thread.start()
+    wait_until(lambda: client.single_flight_stats["collapsed"] == 3)
+    release.set()
+    for thread in [leader] + followers:
+        thread.join(5)
+
+    assert len(fake.calls) == 1
+    assert len(results) == 4
+    assert sum("users" not in result for result in results) == 1
+    assert len({id(result) for result in results}) == 4
+
+def test_different_arguments_are_not_coalesced(client, fake):
+    client.get_club(1)
+    client.get_club(2)
+    assert [call[2]["club_id"] for call in fake.calls] == [1, 2]
+    assert client.single_flight_stats["collapsed"] == 0
+
+def test_nothing_is_cached_after_the_call_returns(client, fake):
+    client.get_club(1)
+    client.get_club(1)
+    assert len(fake.calls) == 2
+
+def test_followers_get_the_leaders_error(client, fake):
+    entered = threading.Event()
+    release = threading.Event()
+
+    def get_club(params):
+        entered.set()
+        release.wait(5)
+        raise ConnectionError("down")
+
+    fake.route("get_club", get_club)
+    errors = []
+
+    def call():
+        try:
+            client.get_club(7)
+        except ConnectionError as error:
+            errors.append(error)
+
+    leader = threading.Thread(target=call)
+    leader.start()
+    assert entered.wait(5)
+    follower = threading.Thread(target=call)
+    follower.start()
+    wait_until(lambda: client.single_flight_stats["collapsed"] == 1)
+    release.set()
+    leader.join(5)
+    follower.join(5)
+
+    assert len(errors) == 2 and errors[0] is errors[1]
+    assert len(fake.calls) == 1
+    with pytest.raises(ConnectionError):
+        client.get_club(7)
@@ -0,0 +1,51 @@
+import os
+
+from clubhouse.topics import TopicCatalog
+
+TREE = {"success": True, "topics": [
+    {"id": 1, "title": "Tech", "topics": [{"id": 11, "title": "Startups"}, {"id": 12, "title": "AI"}]},
+    {"id": 2, "title": "Music", "topics": []},
+]}
+
+def test_loaded_once_in_the_background_then_from_memory(client, fake, tmp_path):
+    fake.route("get_all_topics", TREE)
+    path = str(tmp_path / "topics.json")
+    catalog = TopicCatalog(client, path).start()
+    assert catalog.loaded.wait(5)
+    assert catalog.load_error is None
+    assert catalog.find("startups") == 11
+    assert [t["title"] for t in catalog.children(1)] == ["Startups", "AI"]
+    assert [call[1] for call in fake.calls] == ["get_all_topics"]
+
+    os.remove(path)
+    assert not catalog.refresh_if_stale()
+    assert catalog.get(12)["parent_id"] == 1
+    assert len(fake.calls) == 1
+
+def test_next_run_loads_from_disk(client, fake, tmp_path):
+    fake.route("get_all_topics", TREE)
+    path = str(tmp_path / "topics.json")
+    TopicCatalog(client, path).load()
+    fake.calls.clear()
+
+    catalog = TopicCatalog(client, path)
+    assert not catalog.load()
+    assert catalog.resolve("Music") == 2
+    assert fake.calls == []
+
+def test_stale_catalog_is_refreshed(client, fake, tmp_path):
+    fake.route("get_all_topics", TREE)
+    catalog = TopicCatalog(client, str(tmp_path / "topics.json"), max_age=60)
+    catalog.load()
+    catalog.fetched_at -= 61
+    assert catalog.is_stale
+    assert catalog.refresh_if_stale()
+    assert not catalog.is_stale
+    assert len(fake.calls) == 2
+
+def test_load_error_is_kept(client, fake, tmp_path):
+    fake.route("get_all_topics", {"success": False})
+    catalog = TopicCatalog(client, str(tmp_path / "topics.json")).start()
+    assert catalog.loaded.wait(5)
+    assert catalog.load_error is not None
+    assert catalog.by_id == {}
@@ -0,0 +1,72 @@
+import time
+
+from clubhouse.clubhouse import Clubhouse
+from clubhouse.transport import FakeTransport
+from clubhouse.warmup import DNSCache, Warmer
+
+class CountingTransport(FakeTransport):
+    """ FakeTransport that pretends to open connections """
+
+    def __init__(self):
+        super().__init__()
+        self.preconnects = 0
+
+    def preconnect(self, url, connections=1):
+        self.preconnects += 1
+        return connections
+
+def make(**kwargs):
+    transport = CountingTransport()
+    client = Clubhouse(api_url="http://127.0.0.1:8080/api", transport=transport)
+    return Warmer(client, **kwargs), transport
+
+def test_warm_connects_without_a_request():
+    warmer, transport = make(connections=3)
+    timings = warmer.warm()
+    assert transport.preconnects == 1
+    assert transport.calls == []
+    assert timings["connections"] == 3
+    assert timings["dns_ms"] is not None
+
+def test_due_after_keepalive_while_idle():
+    warmer, transport = make(keepalive=45, max_idle=600)
+    assert not warmer.due()
+    warmer.warm()
+    assert not warmer.due()
+
+    transport.last_used = warmer._warmed - 10
+    assert not warmer.due(now=warmer._warmed + 44)
+    assert warmer.due(now=warmer._warmed + 45)
+    # Given up after max_idle
+    assert not warmer.due(now=transport.last_used + 600)
+
+def test_a_request_postpones_the_rewarm():
+    warmer, transport = make(keepalive=45)
+    warmer.warm()
+    transport.last_used = warmer._warmed + 30
+    assert not warmer.due(now=warmer._warmed + 60)
+    assert warmer.due(now=warmer._warmed + 75)
+
+def test_start_rewarms_when_idle():
+    warmer, transport = make(keepalive=0.03, max_idle=60)
+    transport.last_used = time.monotonic()
+    warmer.start()
+    deadline = time.monotonic() + 5
+    while warmer.timings["rewarms"] < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    warmer.stop()
+    assert warmer.timings["rewarms"] >= 2
+    assert transport.preconnects >= 3
+
+def test_dns_cache():
+    answers = []
+
+    def resolver(*args):
+        answers.append(args)
+        return [("answer",)]
+
+    cache = DNSCache(ttl=60, resolver=resolver)
+    assert cache.resolve("example.com") == [("answer",)]
+    assert cache.resolve("example.com") == [("answer",)]
+    assert len(answers) == 1
+    assert cache.stats == {"hits": 1, "misses": 1}
@@ -0,0 +1,52 @@
+import time
+
+from clubhouse.recorder import RoomRecorder
+from clubhouse.watcher import RoomWatcher
+
+def wait_until(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.005)
+    return condition()
+
+def test_diff_between_snapshots(client):
+    watcher = RoomWatcher(client, "room")
+    seen = []
+    watcher.subscribe(lambda channel, info, diff, now: seen.append((channel, diff, now)))
+    watcher.update({"success": True, "users": [{"user_id": 1}]}, now=1)
+    watcher.update({"success": True, "users": [{"user_id": 2}]}, now=2)
+    watcher.update({"success": False}, now=3)
+
+    assert [list(diff["joined"]) for _, diff, _ in seen] == [[1], [2], []]
+    assert [diff["left"] for _, diff, _ in seen] == [[], [1], []]
+    assert [now for _, _, now in seen] == [1, 2, 3]
+
+def test_poll_errors_go_to_the_error_handlers(client, fake):
+    def get_channel(params):
+        raise ConnectionError("reset")
+
+    fake.route("get_channel", get_channel)
+    watcher = RoomWatcher(client, "room")
+    errors = []
+    watcher.subscribe(lambda *args: None, lambda channel, error: errors.append(error))
+    assert watcher.poll() is None
+    assert isinstance(errors[0], ConnectionError)
+
+def test_polls_as_often_as_the_most_demanding_subscriber(client, fake, tmp_path):
+    watcher = RoomWatcher(client, "room", interval=0.02)
+    recorder = RoomRecorder(client, str(tmp_path), interval=30)
+    recorder.watch(watcher)
+    assert watcher.poll_interval == 30
+
+    watcher.start()
+    time.sleep(0.1)
+    assert fake.calls == []
+
+    events = []
+    watcher.subscribe(lambda *args: events.append(args))
+    assert watcher.poll_interval == 0.02
+    assert wait_until(lambda: len(events) >= 2)
+
+    watcher.unsubscribe(watcher._subscribers[-1])
+    assert watcher.poll_interval == 30
+    watcher.stop()